@@ -5,14 +5,16 @@ run_entertainment_bot.py
 Discordエンタメコンテンツ制作アプリ メイン実行スクリプト
 
 統合されたエンタメBotを実行
+
+使い方:
+    python run_entertainment_bot.py                    # Botを起動
+    python run_entertainment_bot.py --profile-imports  # 起動時のimport時間を表示して終了
 """
 
 import asyncio
 import os
 import sys
 import signal
-import threading
-import time
 from dotenv import load_dotenv
 
 # プロジェクトのsrcディレクトリをPythonパスに追加
@@ -20,7 +22,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from core.entertainment_bot import create_entertainment_bot
 from utils.firestore import initialize_firebase
-from utils.health_server import start_health_server, update_bot_status
+from utils.health import HealthServer, SystemMonitor
+from utils.structured_logging import setup_logging, shutdown_logging
 
 # 環境変数読み込み
 load_dotenv()
@@ -32,10 +35,12 @@ class EntertainmentBotRunner:
         self.bot = None
         self.db = None
         self.running = False
+        self.health_server = None
+        self.system_monitor = None
         self.health_server_started = False
     
-    def start_health_server_thread(self):
-        """ヘルスチェックサーバーを別スレッドで開始"""
+    async def start_health_server(self):
+        """ヘルスチェックサーバーを開始（Botと同じイベントループ上で待ち受け）"""
         if self.health_server_started:
             return
         
@@ -47,13 +52,12 @@ class EntertainmentBotRunner:
                 print("🏥 ヘルスチェックサーバーを開始中...")
                 print(f"   ポート: {os.getenv('PORT', '8080')}")
                 
-                # 別スレッドでヘルスサーバーを起動
-                health_thread = threading.Thread(target=start_health_server, daemon=True)
-                health_thread.start()
-                
-                # 少し待ってからボット状態を更新
-                time.sleep(2)
-                update_bot_status(False)  # 初期状態は未起動
+                # /ready はBotがゲートウェイに接続するまで 503 を返す
+                self.health_server = HealthServer()
+                await self.health_server.start()
+                # リソース使用量の定期計測（/metrics と /status に反映）
+                self.system_monitor = SystemMonitor(self.health_server)
+                self.system_monitor.start()
                 
                 self.health_server_started = True
                 print("✅ ヘルスチェックサーバーが起動しました")
@@ -76,6 +80,8 @@ class EntertainmentBotRunner:
             # Bot作成
             print("🤖 Bot作成中...")
             self.bot = await create_entertainment_bot(self.db)
+            if self.health_server:
+                self.health_server.attach_bot(self.bot)
             
             print("✅ 初期化完了")
             return True
@@ -119,18 +125,11 @@ class EntertainmentBotRunner:
             print(f"   トークン取得: {'✅' if discord_token else '❌'}")
             self.running = True
             
-            # ヘルスチェックサーバーにボット起動を通知
-            if self.health_server_started:
-                update_bot_status(True)
-            
             await self.bot.start(discord_token)
             
         except Exception as e:
             print(f"❌ Bot開始エラー: {e}")
             self.running = False
-            # ヘルスチェックサーバーにエラー状態を通知
-            if self.health_server_started:
-                update_bot_status(False)
             return False
     
     async def stop(self):
@@ -139,11 +138,18 @@ class EntertainmentBotRunner:
             print("🛑 Bot停止中...")
             await self.bot.shutdown()
             self.running = False
-            # ヘルスチェックサーバーにBot停止を通知
-            if self.health_server_started:
-                update_bot_status(False)
             print("✅ Bot停止完了")
     
+    async def stop_health_server(self):
+        """ヘルスチェックサーバー停止"""
+        if self.system_monitor:
+            await self.system_monitor.stop()
+            self.system_monitor = None
+        if self.health_server:
+            await self.health_server.stop()
+            self.health_server = None
+            self.health_server_started = False
+    
     def setup_signal_handlers(self):
         """シグナルハンドラー設定"""
         def signal_handler(signum, frame):
@@ -155,6 +161,8 @@ class EntertainmentBotRunner:
 
 async def main():
     """メイン実行関数"""
+    # ログはキュー経由で別スレッドから出力（LOG_FORMAT=text で従来形式）
+    setup_logging()
     print("=" * 60)
     print("🎬 Discord エンタメコンテンツ制作アプリ")
     print("=" * 60)
@@ -163,7 +171,7 @@ async def main():
     
     try:
         # ヘルスチェックサーバーを最初に起動（Cloud Run対応）
-        runner.start_health_server_thread()
+        await runner.start_health_server()
         
         # シグナルハンドラー設定
         runner.setup_signal_handlers()
@@ -219,8 +227,14 @@ async def main():
         print(f"\n❌ 実行エラー: {e}")
     finally:
         await runner.stop()
+        await runner.stop_health_server()
+        shutdown_logging()
 
 if __name__ == "__main__":
+    if '--profile-imports' in sys.argv:
+        from scripts.profile_imports import main as profile_imports_main
+        sys.exit(profile_imports_main([arg for arg in sys.argv[1:] if arg != '--profile-imports']))
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
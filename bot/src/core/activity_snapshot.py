@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+activity_snapshot.py
+Discordエンタメコンテンツ制作アプリ - アクティビティのスナップショット
+
+週次まとめ・運営アドバイス・ポッドキャストが同じ期間の interactions / events を
+それぞれスキャンしていたため、1回収集した結果を共有する
+- 取得条件（期間・件数・時間枠）から作ったキーでキャッシュ（同じ条件なら同じ結果を再利用）
+- 同じキーの収集が同時に要求された場合は1回だけ実行して結果を待ち合わせる
+- 期間の起点は一定の時間枠に揃えるため、近い時刻に動いたジョブ同士で共有できる
+  （収集時点までの最新メッセージは含む）
+"""
+
+import logging
+import os
+import time
+import asyncio
+import hashlib
+import datetime
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+# スナップショットの再利用期間（秒）。期間の基準時刻もこの単位で揃える
+ACTIVITY_SNAPSHOT_TTL_SECONDS = int(os.getenv('ACTIVITY_SNAPSHOT_TTL_SECONDS', '900'))
+
+# interactions の取得件数（新しい順）
+SNAPSHOT_MESSAGE_LIMIT = 500
+
+# 保持するスナップショット数
+SNAPSHOT_CACHE_SIZE = 4
+
+
+class ActivitySnapshot:
+    """ある期間のアクティビティ（読み取り専用として扱う）"""
+
+    def __init__(self, key: str, days: int, window_end: datetime.datetime,
+                 messages: List[Dict[str, Any]], events: List[Dict[str, Any]], events_days: int):
+        self.key = key
+        self.days = days
+        # 期間の基準時刻（起点は window_end - days、メッセージは収集時点まで含む）
+        self.window_end = window_end
+        self.window_start = window_end - datetime.timedelta(days=days)
+        # 新しい順
+        self.messages = messages
+        self.events = events
+        self.events_days = events_days
+        self.collected_at = datetime.datetime.now(datetime.timezone.utc)
+        # 内容のハッシュ（同じデータから作った生成物の判別用）
+        self.digest = hashlib.sha256(
+            '\n'.join(str(item.get('id')) for item in messages + events).encode('utf-8')
+        ).hexdigest()
+
+    def recent_messages(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """新しい順のメッセージ（limit 件まで）"""
+        return list(self.messages[:limit] if limit else self.messages)
+
+    def events_since(self, days: int) -> List[Dict[str, Any]]:
+        """基準時刻から days 日以内に更新されたイベント"""
+        cutoff = self.window_end - datetime.timedelta(days=days)
+        return [event for event in self.events
+                if event.get('updatedAt') is None or event['updatedAt'] >= cutoff]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'key': self.key,
+            'digest': self.digest,
+            'days': self.days,
+            'window_end': self.window_end.isoformat(),
+            'messages': len(self.messages),
+            'events': len(self.events)
+        }
+
+
+def _window_end(now: Optional[datetime.datetime] = None) -> datetime.datetime:
+    """期間の基準時刻（TTL単位で切り捨て）"""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    bucket = max(1, ACTIVITY_SNAPSHOT_TTL_SECONDS)
+    return datetime.datetime.fromtimestamp(int(now.timestamp()) // bucket * bucket, datetime.timezone.utc)
+
+
+def snapshot_key(days: int, window_end: datetime.datetime, message_limit: int, events_days: int) -> str:
+    """取得条件から決まるキャッシュキー"""
+    spec = f"interactions:{days}d:{message_limit}|events:{events_days}d|end:{window_end.isoformat()}"
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()[:16]
+
+
+def _fetch_messages(db, start: datetime.datetime, limit: int) -> List[Dict[str, Any]]:
+    from firebase_admin import firestore
+
+    query = (db.collection('interactions')
+             .where('timestamp', '>=', start)
+             .order_by('timestamp', direction=firestore.Query.DESCENDING)
+             .limit(limit))
+    messages = []
+    for doc in query.get():
+        data = doc.to_dict()
+        data['id'] = doc.id
+        messages.append(data)
+    return messages
+
+
+def _fetch_events(db, start: datetime.datetime) -> List[Dict[str, Any]]:
+    from firebase_admin import firestore
+
+    query = (db.collection('events')
+             .where('updatedAt', '>=', start)
+             .order_by('updatedAt', direction=firestore.Query.DESCENDING))
+    events = []
+    for doc in query.get():
+        data = doc.to_dict()
+        data['id'] = doc.id
+        events.append(data)
+    return events
+
+
+async def collect_activity_snapshot(db, days: int, window_end: datetime.datetime, key: str,
+                                    message_limit: int = SNAPSHOT_MESSAGE_LIMIT,
+                                    events_days: Optional[int] = None) -> ActivitySnapshot:
+    """Firestoreから期間内のアクティビティを収集（interactions と events は並行して取得）"""
+    events_days = events_days or days
+    messages, events = await asyncio.gather(
+        asyncio.to_thread(_fetch_messages, db, window_end - datetime.timedelta(days=days), message_limit),
+        asyncio.to_thread(_fetch_events, db, window_end - datetime.timedelta(days=events_days))
+    )
+    logger.info(f"📸 アクティビティのスナップショットを作成: 過去{days}日間 "
+                f"(メッセージ {len(messages)}件, イベント {len(events)}件)")
+    return ActivitySnapshot(key, days, window_end, messages, events, events_days)
+
+
+class ActivitySnapshotCache:
+    """スナップショットのキャッシュ（同時要求は1回の収集にまとめる）"""
+
+    def __init__(self, ttl_seconds: int = ACTIVITY_SNAPSHOT_TTL_SECONDS, max_entries: int = SNAPSHOT_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[ActivitySnapshot]]) -> ActivitySnapshot:
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        # 同じキーを収集中なら完了を待つ
+        inflight = self._inflight.get(key)
+        if inflight:
+            self.hits += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            snapshot = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 待ち合わせ側がいない場合の「未取得の例外」警告を防ぐ
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(snapshot)
+        self._entries[key] = (time.monotonic(), snapshot)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return snapshot
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+# プロセス内で共有するキャッシュ（Bot・週次コンテンツ・スケジューラーの各ジョブで共通）
+shared_snapshot_cache = ActivitySnapshotCache()
+
+
+async def get_activity_snapshot(db, days: int = 7, events_days: Optional[int] = None,
+                                message_limit: int = SNAPSHOT_MESSAGE_LIMIT,
+                                cache: Optional[ActivitySnapshotCache] = None) -> ActivitySnapshot:
+    """共有キャッシュ経由でスナップショットを取得"""
+    cache = cache or shared_snapshot_cache
+    # ポッドキャストはイベントを2倍の期間で使うため、常にその範囲まで取得しておく
+    events_days = events_days or days * 2
+    window_end = _window_end()
+    key = snapshot_key(days, window_end, message_limit, events_days)
+    return await cache.get(
+        key, lambda: collect_activity_snapshot(db, days, window_end, key, message_limit, events_days)
+    )
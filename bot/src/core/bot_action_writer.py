@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bot_action_writer.py
+Discordエンタメコンテンツ制作アプリ - Botアクション記録のバッチ書き込み
+
+会話応答・管理者コマンドのたびに bot_actions へ add していた記録を、
+応答処理から切り離してバックグラウンドでまとめて書き込む
+- record() はバッファに積むだけで待たない（ドキュメントIDはその場で発行）
+- 一定間隔または一定件数でバッチ（WriteBatch）にまとめて書き込む
+- 書き込み前に同じアクションの更新（pending → completed など）が来たらバッファ内で統合
+- 書き込みに失敗した分はバッファに戻して次回再送（バッファは件数上限付き）
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from utils.metrics import registry, FIRESTORE_OPERATIONS, FIRESTORE_DURATION, track
+
+logger = logging.getLogger(__name__)
+
+# バッファを書き込む間隔（秒）
+BOT_ACTION_FLUSH_INTERVAL_SECONDS = float(os.getenv('BOT_ACTION_FLUSH_INTERVAL_SECONDS', '2'))
+
+# 1回のバッチで書き込む最大件数（Firestore の WriteBatch の上限は500件）
+BOT_ACTION_BATCH_SIZE = min(500, int(os.getenv('BOT_ACTION_BATCH_SIZE', '100')))
+
+# バッファに保持する最大件数（超えたら古いものから捨てる）
+BOT_ACTION_MAX_BUFFER = int(os.getenv('BOT_ACTION_MAX_BUFFER', '1000'))
+
+BOT_ACTIONS = registry.counter(
+    'nyanco_bot_actions_total', 'Botアクション記録の件数（written / merged / dropped / failed）', ['result'])
+BOT_ACTIONS_PENDING = registry.gauge(
+    'nyanco_bot_actions_pending', '書き込み待ちのBotアクション記録の件数')
+
+
+class BotActionWriter:
+    """Botアクション記録をバックグラウンドでまとめて書き込む"""
+
+    def __init__(self, firestore_client=None, collection: str = 'bot_actions',
+                 flush_interval: float = BOT_ACTION_FLUSH_INTERVAL_SECONDS,
+                 batch_size: int = BOT_ACTION_BATCH_SIZE, max_buffer: int = BOT_ACTION_MAX_BUFFER):
+        self.db = firestore_client
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.max_buffer = max(self.batch_size, max_buffer)
+
+        # アクションID -> 書き込むフィールド（記録順）
+        self._buffer: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def _ensure_task(self):
+        """書き込みタスクを起動（イベントループ上で初回のみ）"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def record(self, fields: Dict[str, Any], action_id: Optional[str] = None) -> str:
+        """アクションを記録（書き込みを待たずにアクションIDを返す）
+
+        action_id を指定した場合はそのアクションの更新として扱い、
+        まだ書き込まれていなければバッファ内の記録に統合する。
+        """
+        action_id = action_id or uuid.uuid4().hex
+        if self.db is None:
+            return action_id
+
+        buffered = self._buffer.get(action_id)
+        if buffered is not None:
+            buffered.update(fields)
+            BOT_ACTIONS.inc(result='merged')
+        else:
+            self._buffer[action_id] = dict(fields)
+            self._trim()
+        BOT_ACTIONS_PENDING.set(len(self._buffer))
+
+        if not self._closing:
+            self._ensure_task()
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+        return action_id
+
+    def _trim(self):
+        """バッファが上限を超えたら古い記録から捨てる"""
+        while len(self._buffer) > self.max_buffer:
+            action_id, _ = self._buffer.popitem(last=False)
+            BOT_ACTIONS.inc(result='dropped')
+            logger.warning(f"⚠️ Botアクション記録を破棄しました（バッファ上限 {self.max_buffer}件）: {action_id}")
+
+    def _take_batch(self) -> List[Tuple[str, Dict[str, Any]]]:
+        batch = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popitem(last=False))
+        BOT_ACTIONS_PENDING.set(len(self._buffer))
+        return batch
+
+    def _restore(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        """書き込めなかった記録をバッファの先頭に戻す（その間に来た更新を優先）"""
+        for action_id, fields in reversed(entries):
+            newer = self._buffer.pop(action_id, None)
+            self._buffer[action_id] = {**fields, **newer} if newer else fields
+            self._buffer.move_to_end(action_id, last=False)
+        self._trim()
+        BOT_ACTIONS_PENDING.set(len(self._buffer))
+
+    def _commit(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        """WriteBatch で書き込み（to_thread から呼ぶ）"""
+        batch = self.db.batch()
+        collection = self.db.collection(self.collection)
+        for action_id, fields in entries:
+            doc_ref = collection.document(action_id)
+            # 計測用ラッパーではなく元の参照を WriteBatch に渡す
+            batch.set(getattr(doc_ref, 'wrapped', doc_ref), fields, merge=True)
+        with track(FIRESTORE_OPERATIONS, FIRESTORE_DURATION, collection=self.collection, op='batch_commit'):
+            batch.commit()
+
+    async def flush(self) -> int:
+        """バッファの記録をすべて書き込み、書き込めた件数を返す"""
+        written = 0
+        while self._buffer:
+            entries = self._take_batch()
+            try:
+                await asyncio.to_thread(self._commit, entries)
+            except Exception as e:
+                BOT_ACTIONS.inc(len(entries), result='failed')
+                logger.warning(f"⚠️ Botアクション記録の書き込みエラー（{len(entries)}件、次回再送）: {e}")
+                self._restore(entries)
+                break
+            written += len(entries)
+            BOT_ACTIONS.inc(len(entries), result='written')
+        return written
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._buffer:
+                written = await self.flush()
+                if written:
+                    logger.info(f"📝 Botアクション記録を書き込みました: {written}件")
+
+    async def close(self):
+        """書き込みタスクを止め、残りの記録を書き込む"""
+        self._closing = True
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._buffer:
+            await self.flush()
+        if self._buffer:
+            logger.warning(f"⚠️ 書き込めなかったBotアクション記録: {len(self._buffer)}件")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+checkpoint.py
+Discordエンタメコンテンツ制作アプリ - ステージ単位のチェックポイント
+
+週次コンテンツ制作の途中で失敗しても、再実行時に完了済みのステージ
+（まとめ生成・音声合成・Driveアップロード・Discord投稿）をやり直さないための記録
+- ステージの結果はFirestoreの content_checkpoints コレクションに週ごとのキーで保存
+- 音声などのバイナリはSHA-256をキーにローカルのチェックポイントディレクトリへ保存
+  （インスタンスローカルのため、別インスタンスや再起動後の再開では見つからないことがある。
+  load_blob() が None を返した場合、呼び出し側はそのバイナリを作るステージを再実行する）
+"""
+
+import logging
+import os
+import json
+import asyncio
+import hashlib
+import datetime
+import tempfile
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# バイナリの保存先（Cloud Runではインスタンスのメモリ上のファイルシステム。
+# 再起動・別インスタンスでは失われるので、見つからない場合はステージを再実行する前提）
+CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', os.path.join(tempfile.gettempdir(), 'nyanco_checkpoints'))
+
+
+def weekly_idempotency_key(kind: str, days: int, now: Optional[datetime.datetime] = None) -> str:
+    """週ごとの冪等キー（例: weekly_content_2025-W23_7d）"""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    iso_year, iso_week, _ = now.isocalendar()
+    return f"{kind}_{iso_year}-W{iso_week:02d}_{days}d"
+
+
+class CheckpointStore:
+    """ステージ結果の保存・復元"""
+
+    def __init__(self, firestore_client=None, collection: str = 'content_checkpoints', blob_dir: str = CHECKPOINT_DIR):
+        self.db = firestore_client
+        self.collection = collection
+        self.blob_dir = blob_dir
+
+    def _doc(self, key: str):
+        return self.db.collection(self.collection).document(key)
+
+    async def load_state(self, key: str) -> Dict[str, Any]:
+        """チェックポイントの状態を取得（{'stages': {ステージ名: 結果}, 'completed': 全ステージ完了済みか}）"""
+        state: Dict[str, Any] = {'stages': {}, 'completed': False}
+        if not self.db:
+            return state
+        try:
+            snapshot = await asyncio.to_thread(self._doc(key).get)
+            if not snapshot.exists:
+                return state
+            data = snapshot.to_dict() or {}
+            # 値はネストした配列を含むことがあるためJSON文字列で保存している
+            state['stages'] = {name: json.loads(payload) for name, payload in data.get('stages', {}).items()}
+            state['completed'] = bool(data.get('completed', False))
+            return state
+        except Exception as e:
+            logger.warning(f"⚠️ チェックポイント読み込みエラー ({key}): {e}")
+            return {'stages': {}, 'completed': False}
+
+    async def load(self, key: str) -> Dict[str, Any]:
+        """再開に使う完了済みステージの結果を取得（{ステージ名: 結果}）
+
+        全ステージ完了済みの週は再開の対象外なので空を返す
+        """
+        state = await self.load_state(key)
+        return {} if state['completed'] else state['stages']
+
+    async def save_stage(self, key: str, stage: str, value: Any):
+        """ステージの結果を保存"""
+        if not self.db:
+            return
+        try:
+            payload = json.dumps(value, ensure_ascii=False, default=str)
+            await asyncio.to_thread(self._doc(key).set, {
+                'stages': {stage: payload},
+                'updatedAt': datetime.datetime.now(datetime.timezone.utc)
+            }, merge=True)
+        except Exception as e:
+            logger.warning(f"⚠️ チェックポイント保存エラー ({key}/{stage}): {e}")
+
+    async def mark_completed(self, key: str, completed: bool = True):
+        """全ステージ完了を記録"""
+        if not self.db:
+            return
+        try:
+            await asyncio.to_thread(self._doc(key).set, {
+                'completed': completed,
+                'updatedAt': datetime.datetime.now(datetime.timezone.utc)
+            }, merge=True)
+        except Exception as e:
+            logger.warning(f"⚠️ チェックポイント完了記録エラー ({key}): {e}")
+
+    async def clear(self, key: str):
+        """チェックポイントを削除（最初からやり直す場合）"""
+        if not self.db:
+            return
+        try:
+            await asyncio.to_thread(self._doc(key).delete)
+        except Exception as e:
+            logger.warning(f"⚠️ チェックポイント削除エラー ({key}): {e}")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest)
+
+    def _save_blob_sync(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(self.blob_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def _load_blob_sync(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # 破損したファイルは使わない
+        return data if hashlib.sha256(data).hexdigest() == digest else None
+
+    async def save_blob(self, data: bytes) -> str:
+        """バイナリを保存してSHA-256を返す"""
+        return await asyncio.to_thread(self._save_blob_sync, data)
+
+    async def load_blob(self, digest: str) -> Optional[bytes]:
+        """SHA-256からバイナリを取得（見つからない・破損している場合はNone）"""
+        return await asyncio.to_thread(self._load_blob_sync, digest)
+
+    def delete_blob(self, digest: str):
+        """不要になったバイナリを削除"""
+        try:
+            os.remove(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
@@ -7,45 +7,86 @@ content_creator.py
 週次まとめテキスト・音声ファイル生成、Google Drive保存、Discord投稿の統合処理
 """
 
+import logging
 import os
 import json
 import datetime
 import asyncio
 import tempfile
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple
 from google.cloud import texttospeech
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
+import google_auth_httplib2
+import httplib2
 from firebase_admin import firestore
 import discord
 from .discord_analytics import DiscordAnalytics
+from .activity_snapshot import ActivitySnapshot
 from .podcast import PodcastGenerator
+from .pipeline import Pipeline
+from .checkpoint import CheckpointStore, weekly_idempotency_key
+from .lease import ensure_lease
+from utils.artifacts import Artifact, new_run_id
+from utils.metrics import (
+    TTS_REQUESTS, TTS_DURATION, TTS_AUDIO_BYTES, DRIVE_UPLOADS, DRIVE_DURATION, track
+)
+from utils.structured_logging import get_correlation_id
+from utils.tracing import tracer, traced, timing_report
+
+logger = logging.getLogger(__name__)
 
 class ContentCreator:
     """エンタメコンテンツ制作統合クラス"""
     
-    def __init__(self, firestore_client, discord_bot: Optional[discord.Client] = None):
+    def __init__(self, firestore_client, discord_bot: Optional[discord.Client] = None,
+                 analytics: Optional[DiscordAnalytics] = None,
+                 podcast_generator: Optional[PodcastGenerator] = None):
         self.db = firestore_client
         self.bot = discord_bot
         
-        # Discord分析システム
-        self.analytics = DiscordAnalytics(firestore_client)
+        # Discord分析システム（共有インスタンスが渡された場合はそれを使う）
+        self.analytics = analytics or DiscordAnalytics(firestore_client)
         
         # Podcast生成システム
-        self.podcast_generator = PodcastGenerator()
+        self.podcast_generator = podcast_generator or PodcastGenerator(firestore_client)
         
-        # Google Drive API初期化
-        self.drive_service = None
-        self._initialize_drive_service()
+        # Google Drive API（初回アップロード時に初期化）
+        self._drive_service = None
+        self.drive_credentials = None
+        self._drive_initialized = False
         
-        # TTS設定
-        self.tts_client = None
-        self._initialize_tts_client()
+        # Google Driveの再開可能アップロード設定（チャンクは256KBの倍数）
+        chunk_mb = max(1, int(os.getenv('DRIVE_UPLOAD_CHUNK_MB', '5')))
+        self.drive_upload_chunk_size = chunk_mb * 1024 * 1024
+        self.drive_upload_max_retries = int(os.getenv('DRIVE_UPLOAD_MAX_RETRIES', '5'))
         
         # Discord設定
         self.target_channel_id = os.getenv('DISCORD_SUMMARY_CHANNEL_ID')
         
+        # 週次コンテンツのステージ単位チェックポイント（失敗時の再実行で完了済みステージを省略）
+        self.checkpoints = CheckpointStore(firestore_client)
+        
+    @property
+    def drive_service(self):
+        """Google Drive API サービス（初回アクセス時に初期化）"""
+        if not self._drive_initialized:
+            self._drive_initialized = True
+            self._initialize_drive_service()
+        return self._drive_service
+    
+    @property
+    def tts_client(self):
+        """Text-to-Speech クライアント（PodcastGenerator と共有）"""
+        try:
+            return self.podcast_generator._get_tts_client()
+        except Exception as e:
+            logger.warning(f"⚠️ TTS クライアント初期化エラー: {e}")
+            return None
+    
     def _initialize_drive_service(self):
         """Google Drive API サービスを初期化"""
         try:
@@ -66,65 +107,57 @@ class ContentCreator:
             else:
                 raise FileNotFoundError("Google Cloud認証情報が見つかりません")
             
-            self.drive_service = build('drive', 'v3', credentials=credentials)
-            print("✅ Google Drive API初期化完了")
+            self.drive_credentials = credentials
+            self._drive_service = build('drive', 'v3', credentials=credentials)
+            logger.info("✅ Google Drive API初期化完了")
             
         except Exception as e:
-            print(f"⚠️ Google Drive API初期化エラー: {e}")
-            self.drive_service = None
-    
-    def _initialize_tts_client(self):
-        """Text-to-Speech クライアントを初期化"""
-        try:
-            key_path = os.getenv('FIREBASE_SERVICE_ACCOUNT_KEY_PATH', 
-                               './nyanco-bot-firebase-adminsdk-fbsvc-d65403c7ca.json')
-            
-            if os.path.exists(key_path):
-                self.tts_client = texttospeech.TextToSpeechClient.from_service_account_json(key_path)
-            elif os.getenv('FIREBASE_SERVICE_ACCOUNT'):
-                service_account_info = json.loads(os.getenv('FIREBASE_SERVICE_ACCOUNT'))
-                credentials = service_account.Credentials.from_service_account_info(service_account_info)
-                self.tts_client = texttospeech.TextToSpeechClient(credentials=credentials)
-            else:
-                self.tts_client = texttospeech.TextToSpeechClient()
-            
-            print("✅ Text-to-Speech クライアント初期化完了")
-            
-        except Exception as e:
-            print(f"⚠️ TTS クライアント初期化エラー: {e}")
-            self.tts_client = None
+            logger.warning(f"⚠️ Google Drive API初期化エラー: {e}")
+            self._drive_service = None
     
     async def generate_enhanced_tts_audio(self, content: str, filename: Optional[str] = None) -> Optional[str]:
         """強化されたText-to-Speech音声生成（キャラクター別対応）"""
-        if not self.tts_client:
-            print("❌ TTS クライアントが初期化されていません")
-            return None
-        
         if not filename:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"weekly_summary_{timestamp}.mp3"
         
+        audio_content = await self.generate_enhanced_tts_audio_bytes(content)
+        if not audio_content:
+            return None
+        
+        with open(filename, 'wb') as out:
+            out.write(audio_content)
+        return filename
+    
+    @traced('tts.generate_enhanced_tts_audio')
+    async def generate_enhanced_tts_audio_bytes(self, content: str) -> Optional[bytes]:
+        """強化されたText-to-Speech音声生成（キャラクター別対応、MP3バイト列を返す）"""
+        if not self.tts_client:
+            logger.error("❌ TTS クライアントが初期化されていません")
+            return None
+        
         try:
-            print("🎵 強化された音声ファイル生成中...")
+            logger.info("🎵 強化された音声ファイル生成中...")
             
             # キャラクター別音声生成を使用
-            audio_files = await self.podcast_generator.generate_character_audio(content, filename.replace('.mp3', ''))
-            
-            if audio_files:
-                # 最初の音声ファイルを返す（統合版は別途実装可能）
-                first_audio = list(audio_files.values())[0]
-                print(f"✅ 強化音声ファイル生成完了: {first_audio}")
-                return first_audio
+            # 使うのは最初の話者の音声のみなので、その話者だけ合成する（統合版は別途実装可能）
+            character_texts = self.podcast_generator.group_character_lines(content)
+            
+            if character_texts:
+                character, character_text = next(iter(character_texts.items()))
+                audio_content = await self.podcast_generator.synthesize_character_audio(character, character_text)
+                logger.info(f"✅ 強化音声生成完了: {character} ({len(audio_content)}バイト)")
+                return audio_content
             else:
                 # フォールバック: 通常のTTS
-                return await self._generate_standard_tts(content, filename)
+                return await self._generate_standard_tts_bytes(content)
                 
         except Exception as e:
-            print(f"❌ 強化TTS生成エラー: {e}")
-            return await self._generate_standard_tts(content, filename)
+            logger.error(f"❌ 強化TTS生成エラー: {e}")
+            return await self._generate_standard_tts_bytes(content)
     
-    async def _generate_standard_tts(self, content: str, filename: str) -> Optional[str]:
-        """標準のTTS音声生成"""
+    async def _generate_standard_tts_bytes(self, content: str) -> Optional[bytes]:
+        """標準のTTS音声生成（MP3バイト列を返す）"""
         try:
             # テキストクリーンアップ
             clean_content = self.podcast_generator.clean_text_for_tts(content)
@@ -145,75 +178,142 @@ class ContentCreator:
             )
             
             # 音声合成
-            response = await asyncio.to_thread(
-                self.tts_client.synthesize_speech,
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
-            
-            # ファイル保存
-            with open(filename, 'wb') as out:
-                out.write(response.audio_content)
+            with track(TTS_REQUESTS, TTS_DURATION, caller='content_creator'):
+                response = await asyncio.to_thread(
+                    self.tts_client.synthesize_speech,
+                    input=synthesis_input,
+                    voice=voice,
+                    audio_config=audio_config
+                )
+            TTS_AUDIO_BYTES.inc(len(response.audio_content), caller='content_creator')
             
-            print(f"✅ 標準音声ファイル生成完了: {filename}")
-            return filename
+            logger.info(f"✅ 標準音声生成完了: {len(response.audio_content)}バイト")
+            return response.audio_content
             
         except Exception as e:
-            print(f"❌ 標準TTS生成エラー: {e}")
+            logger.error(f"❌ 標準TTS生成エラー: {e}")
             return None
     
+    @staticmethod
+    def _guess_mimetype(filename: str) -> str:
+        """ファイル名から MIME タイプを推定"""
+        if filename.endswith('.mp3'):
+            return 'audio/mpeg'
+        elif filename.endswith('.txt'):
+            return 'text/plain'
+        elif filename.endswith('.json'):
+            return 'application/json'
+        return 'application/octet-stream'
+    
+    def _new_drive_http(self):
+        """アップロード1件ごとのHTTPクライアントを作成
+        
+        httplib2はスレッドセーフではないため、並列アップロードでは接続を共有しない
+        """
+        return google_auth_httplib2.AuthorizedHttp(self.drive_credentials, http=httplib2.Http())
+    
+    def _execute_resumable_upload(self, request, filename: str, http) -> Dict[str, Any]:
+        """再開可能アップロードをチャンク単位で実行（ワーカースレッドで実行）
+        
+        チャンク送信に失敗した場合は最初からやり直さず、送信済みの位置から再開する
+        """
+        response = None
+        failures = 0
+        
+        while response is None:
+            try:
+                status, response = request.next_chunk(http=http)
+                failures = 0
+                if status:
+                    logger.info(f"   ⬆️ {filename}: {int(status.progress() * 100)}%")
+            except (HttpError, OSError, httplib2.HttpLib2Error) as e:
+                retryable = not isinstance(e, HttpError) or e.resp.status in (408, 429, 500, 502, 503, 504)
+                failures += 1
+                if not retryable or failures > self.drive_upload_max_retries:
+                    raise
+                wait_seconds = min(2 ** failures, 30)
+                logger.warning(f"⚠️ {filename} のチャンク送信失敗（{failures}回目）、{wait_seconds}秒後に再開: {e}")
+                time.sleep(wait_seconds)
+        
+        return response
+    
+    def _upload_media_sync(self, media_factory: Callable[[], Any], filename: str, folder_id: Optional[str]) -> Dict[str, Any]:
+        """メディアをアップロードして共有設定まで行う（ワーカースレッドで実行）"""
+        http = self._new_drive_http()
+        
+        # ファイルメタデータ
+        file_metadata = {
+            'name': filename,
+            'parents': [folder_id] if folder_id else []
+        }
+        
+        media = media_factory()
+        request = self.drive_service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id,name,webViewLink,webContentLink'
+        )
+        result = self._execute_resumable_upload(request, filename, http)
+        
+        # ファイル共有設定（読み取り専用で誰でもアクセス可能）
+        permission = {
+            'type': 'anyone',
+            'role': 'reader'
+        }
+        self.drive_service.permissions().create(
+            fileId=result['id'],
+            body=permission
+        ).execute(http=http, num_retries=self.drive_upload_max_retries)
+        
+        return result
+    
     async def upload_to_google_drive(self, file_path: str, filename: str, folder_id: Optional[str] = None) -> Optional[Dict[str, str]]:
-        """Google Driveにファイルをアップロード"""
+        """Google Driveにファイルをアップロード（再開可能・チャンク送信）"""
+        def media_factory():
+            return MediaFileUpload(
+                file_path,
+                mimetype=self._guess_mimetype(filename),
+                chunksize=self.drive_upload_chunk_size,
+                resumable=True
+            )
+        
+        return await self._upload_to_google_drive(media_factory, filename, folder_id)
+    
+    async def upload_artifact_to_google_drive(self, artifact: Artifact, folder_id: Optional[str] = None,
+                                              raise_errors: bool = False) -> Optional[Dict[str, str]]:
+        """メモリ上の生成物をファイルに書き出さずGoogle Driveにアップロード"""
+        def media_factory():
+            return MediaIoBaseUpload(
+                artifact.stream(),
+                mimetype=artifact.mimetype,
+                chunksize=self.drive_upload_chunk_size,
+                resumable=True
+            )
+        
+        return await self._upload_to_google_drive(media_factory, artifact.name, folder_id, raise_errors)
+    
+    @traced('drive.upload_to_google_drive')
+    async def _upload_to_google_drive(self, media_factory: Callable[[], Any], filename: str, folder_id: Optional[str],
+                                      raise_errors: bool = False) -> Optional[Dict[str, str]]:
+        """Google Driveへのアップロード共通処理
+        
+        API呼び出しはすべてワーカースレッドで行い、イベントループをブロックしない。
+        Driveが設定されていない場合はNoneを返す。アップロードの失敗は raise_errors=True なら例外、
+        それ以外はNoneを返す
+        """
         if not self.drive_service:
-            print("❌ Google Drive サービスが初期化されていません")
+            logger.error("❌ Google Drive サービスが初期化されていません")
             return None
         
         try:
-            print(f"☁️ Google Driveにアップロード中: {filename}")
+            logger.info(f"☁️ Google Driveにアップロード中: {filename}")
             
-            # ファイルメタデータ
-            file_metadata = {
-                'name': filename,
-                'parents': [folder_id] if folder_id else []
-            }
-            
-            # ファイルの MIME タイプを推定
-            if filename.endswith('.mp3'):
-                mimetype = 'audio/mpeg'
-            elif filename.endswith('.txt'):
-                mimetype = 'text/plain'
-            elif filename.endswith('.json'):
-                mimetype = 'application/json'
-            else:
-                mimetype = 'application/octet-stream'
+            with track(DRIVE_UPLOADS, DRIVE_DURATION):
+                result = await asyncio.to_thread(self._upload_media_sync, media_factory, filename, folder_id)
             
-            # ファイルアップロード
-            media = MediaFileUpload(file_path, mimetype=mimetype)
-            file = await asyncio.to_thread(
-                self.drive_service.files().create,
-                body=file_metadata,
-                media_body=media,
-                fields='id,name,webViewLink,webContentLink'
-            )
-            
-            result = file.execute()
-            
-            # ファイル共有設定（読み取り専用で誰でもアクセス可能）
-            permission = {
-                'type': 'anyone',
-                'role': 'reader'
-            }
-            
-            await asyncio.to_thread(
-                self.drive_service.permissions().create,
-                fileId=result['id'],
-                body=permission
-            )
-            
-            print(f"✅ Google Driveアップロード完了")
-            print(f"   ファイルID: {result['id']}")
-            print(f"   表示リンク: {result['webViewLink']}")
+            logger.info(f"✅ Google Driveアップロード完了")
+            logger.info(f"   ファイルID: {result['id']}")
+            logger.info(f"   表示リンク: {result['webViewLink']}")
             
             return {
                 'file_id': result['id'],
@@ -224,23 +324,33 @@ class ContentCreator:
             }
             
         except Exception as e:
-            print(f"❌ Google Driveアップロードエラー: {e}")
+            logger.error(f"❌ Google Driveアップロードエラー: {e}")
+            if raise_errors:
+                raise
             return None
     
     async def post_to_discord(self, summary_text: str, audio_file_info: Optional[Dict] = None, 
                             text_file_info: Optional[Dict] = None) -> bool:
         """Discordチャンネルに投稿"""
-        if not self.bot or not self.target_channel_id:
-            print("❌ Discord設定が不完全です")
-            return False
+        prepared = self.prepare_discord_post(summary_text)
+        return await self.send_discord_post(prepared, audio_file_info, text_file_info)
+    
+    @property
+    def has_post_target(self) -> bool:
+        """週次まとめの投稿先（Bot と DISCORD_SUMMARY_CHANNEL_ID）が設定されているか"""
+        return bool(self.bot and self.target_channel_id)
+    
+    def prepare_discord_post(self, summary_text: str) -> Optional[Tuple[Any, discord.Embed]]:
+        """投稿先チャンネルとまとめ本文のEmbedを準備（Driveリンクは送信時に追加）"""
+        if not self.has_post_target:
+            logger.error("❌ Discord設定が不完全です")
+            return None
         
         try:
             channel = self.bot.get_channel(int(self.target_channel_id))
             if not channel:
-                print(f"❌ チャンネルが見つかりません: {self.target_channel_id}")
-                return False
-            
-            print(f"📝 Discord投稿中...")
+                logger.error(f"❌ チャンネルが見つかりません: {self.target_channel_id}")
+                return None
             
             # 投稿用のメッセージ作成
             embed = discord.Embed(
@@ -262,6 +372,25 @@ class ContentCreator:
                 inline=False
             )
             
+            return channel, embed
+            
+        except Exception as e:
+            logger.error(f"❌ Discord投稿準備エラー: {e}")
+            return None
+    
+    @traced('discord.post_to_discord')
+    async def send_discord_post(self, prepared: Optional[Tuple[Any, discord.Embed]],
+                                audio_file_info: Optional[Dict] = None,
+                                text_file_info: Optional[Dict] = None) -> bool:
+        """準備済みの投稿にDriveリンクを追加して送信"""
+        if not prepared:
+            return False
+        
+        channel, embed = prepared
+        
+        try:
+            logger.info(f"📝 Discord投稿中...")
+            
             # Google Driveリンク追加
             if audio_file_info:
                 embed.add_field(
@@ -282,98 +411,235 @@ class ContentCreator:
             # メッセージ送信
             message = await channel.send(embed=embed)
             
-            print(f"✅ Discord投稿完了: {message.jump_url}")
+            logger.info(f"✅ Discord投稿完了: {message.jump_url}")
             return True
             
         except Exception as e:
-            print(f"❌ Discord投稿エラー: {e}")
+            logger.error(f"❌ Discord投稿エラー: {e}")
             return False
     
-    async def create_weekly_content(self, days: int = 7) -> Dict[str, Any]:
-        """週次コンテンツ制作のメイン処理"""
-        print("🎬 週次エンタメコンテンツ制作を開始...")
+    async def create_weekly_content(self, days: int = 7,
+                                    progress_callback: Optional[Callable[[str], Awaitable[Any]]] = None,
+                                    resume: bool = True,
+                                    snapshot: Optional[ActivitySnapshot] = None) -> Dict[str, Any]:
+        """週次コンテンツ制作のメイン処理
         
-        try:
-            # 1. 週次まとめテキスト生成
-            print("📊 週次活動分析中...")
-            summary_result = await self.analytics.generate_and_save_weekly_summary(days)
-            
+        各工程は依存関係に沿って並行に実行する
+        （まとめ生成 → 音声合成・テキスト作成 → 各アップロード → Discord投稿）。
+        テキストのアップロードや投稿の準備は音声合成と同時に進む。
+        完了したステージは週ごとの冪等キーでチェックポイントに記録し、
+        resume=True の再実行では未完了のステージからやり直す。
+        投稿まで完了済みの週は resume=True では何もせず already_completed を返し、
+        resume=False ではチェックポイントを消して最初から作り直す。
+        progress_callback を渡すと各工程の開始時に進捗メッセージを通知する
+        snapshot を渡すとそのアクティビティでまとめを作る（未指定時は共有キャッシュから取得）
+        """
+        logger.info("🎬 週次エンタメコンテンツ制作を開始...")
+        
+        async def report(text: str):
+            if progress_callback:
+                await progress_callback(text)
+        
+        # 同時実行でも名前が衝突しないよう実行ごとに一意なIDを付ける
+        run_id = new_run_id()
+        drive_folder_id = os.getenv('GOOGLE_DRIVE_FOLDER_ID')
+        
+        # チェックポイント（同じ週・同じ日数の実行で共有）
+        idempotency_key = weekly_idempotency_key('weekly_content', days)
+        if not resume:
+            await self.checkpoints.clear(idempotency_key)
+        state = await self.checkpoints.load_state(idempotency_key)
+        if state['completed']:
+            # 完了済みの週の結果を再利用して二重に記録・報告しない
+            logger.info(f"⏭️ 今週の週次コンテンツは作成済みです: {idempotency_key}")
+            return {
+                'success': True,
+                'already_completed': True,
+                'run_id': run_id,
+                'idempotency_key': idempotency_key,
+                'discord_posted': False
+            }
+        checkpoint = state['stages']
+        if checkpoint:
+            logger.info(f"♻️ チェックポイントから再開: {idempotency_key} (完了済み: {', '.join(checkpoint)})")
+        
+        # 定期実行でリースを保持している場合、書き込みのたびにフェンシングトークンを確認し
+        # リースを失った（他のインスタンスが引き継いだ）実行は以降の書き込みをしない
+        async def save_stage(stage: str, value: Any):
+            await ensure_lease()
+            await self.checkpoints.save_stage(idempotency_key, stage, value)
+        
+        # 1. 週次まとめテキスト生成
+        async def generate_summary(results):
+            if 'summary' in checkpoint:
+                return checkpoint['summary']
+            logger.info("📊 週次活動分析中...")
+            await report(f"📊 過去{days}日間の活動分析・まとめ生成中...")
+            activity = snapshot or await self.analytics.get_activity_snapshot(days)
+            await ensure_lease()
+            summary_result = await self.analytics.generate_and_save_weekly_summary(days, activity)
             if not summary_result['success']:
-                return {'success': False, 'error': 'Failed to generate summary'}
-            
-            summary_text = summary_result['summary_text']
-            
-            # 2. 音声ファイル生成
-            print("🎵 音声ファイル生成中...")
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            audio_filename = f"weekly_summary_{timestamp}.mp3"
-            
-            audio_file_path = await self.generate_enhanced_tts_audio(summary_text, audio_filename)
-            
-            # 3. テキストファイル保存
-            text_filename = f"weekly_summary_{timestamp}.txt"
-            with open(text_filename, 'w', encoding='utf-8') as f:
-                f.write("# Discord コミュニティ 今週のまとめ\n")
-                f.write(f"# 生成日時: {datetime.datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}\n\n")
-                f.write(summary_text)
-            
-            # 4. Google Driveアップロード
-            drive_folder_id = os.getenv('GOOGLE_DRIVE_FOLDER_ID')
-            
-            audio_drive_info = None
-            text_drive_info = None
-            
-            if audio_file_path and os.path.exists(audio_file_path):
-                audio_drive_info = await self.upload_to_google_drive(
-                    audio_file_path, audio_filename, drive_folder_id
-                )
-            
-            if os.path.exists(text_filename):
-                text_drive_info = await self.upload_to_google_drive(
-                    text_filename, text_filename, drive_folder_id
-                )
-            
-            # 5. Discord投稿
-            discord_posted = await self.post_to_discord(
-                summary_text, audio_drive_info, text_drive_info
+                raise RuntimeError('Failed to generate summary')
+            summary_result['activity_snapshot'] = activity.describe()
+            await save_stage('summary', summary_result)
+            return summary_result
+        
+        # 2. 音声生成（ファイルには書き出さずメモリ上で扱う）
+        async def synthesize_audio(results):
+            saved = checkpoint.get('tts')
+            if saved:
+                audio_content = await self.checkpoints.load_blob(saved['sha256'])
+                if audio_content is not None or 'upload_audio' in checkpoint:
+                    # アップロード済みなら音声本体は不要（名前とサイズだけ引き継ぐ）
+                    artifact = Artifact(saved['name'], saved['mimetype'], audio_content)
+                    artifact.size = saved['size']
+                    artifact.sha256 = saved['sha256']
+                    return artifact
+                # 一時保存はインスタンスローカルなので、別インスタンス・再起動後の再開では作り直す
+                logger.info(f"♻️ 保存済みの音声が見つからないため再合成します: {saved['sha256'][:12]}")
+            
+            logger.info("🎵 音声ファイル生成中...")
+            await report("🎵 音声ファイル生成中...")
+            audio_content = await self.generate_enhanced_tts_audio_bytes(results['summary']['summary_text'])
+            if not audio_content:
+                return None
+            artifact = Artifact(f"weekly_summary_{run_id}.mp3", 'audio/mpeg', audio_content)
+            artifact.sha256 = await self.checkpoints.save_blob(audio_content)
+            await save_stage('tts', {
+                'name': artifact.name,
+                'mimetype': artifact.mimetype,
+                'size': artifact.size,
+                'sha256': artifact.sha256
+            })
+            return artifact
+        
+        # 3. テキスト生成
+        async def build_text(results):
+            return Artifact.from_text(
+                f"weekly_summary_{run_id}.txt",
+                "# Discord コミュニティ 今週のまとめ\n"
+                f"# 生成日時: {datetime.datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}\n\n"
+                f"{results['summary']['summary_text']}"
             )
-            
-            # 6. 結果のまとめ
+        
+        # 4. Google Driveアップロード（音声とテキストは独立して進む）
+        def upload(stage_name: str, artifact_stage: str):
+            async def run(results):
+                artifact = results[artifact_stage]
+                if not artifact:
+                    return None
+                try:
+                    if checkpoint.get(stage_name):
+                        return checkpoint[stage_name]
+                    await report(f"☁️ Google Driveにアップロード中: {artifact.name}")
+                    await ensure_lease()
+                    # 失敗した場合はステージを失敗にし、再実行でアップロードからやり直す
+                    drive_info = await self.upload_artifact_to_google_drive(artifact, drive_folder_id, raise_errors=True)
+                    if drive_info:
+                        await save_stage(stage_name, drive_info)
+                    return drive_info
+                finally:
+                    # メモリ（退避した一時ファイル）を解放
+                    artifact.close()
+            return run
+        
+        # 5. Discord投稿（本文は先に準備し、リンクが揃い次第送信）
+        async def prepare_post(results):
+            if checkpoint.get('post'):
+                return None
+            return self.prepare_discord_post(results['summary']['summary_text'])
+        
+        async def send_post(results):
+            # 投稿済みの週は二重投稿しない
+            if checkpoint.get('post'):
+                return True
+            if not self.has_post_target:
+                # 投稿先が設定されていない場合は投稿せずに完了とする
+                return False
+            await report("📝 Discordに投稿中...")
+            await ensure_lease()
+            posted = await self.send_discord_post(
+                results['prepare_post'], results['upload_audio'], results['upload_text']
+            )
+            if not posted:
+                # 失敗した投稿は再実行でやり直す（週は完了にしない）
+                raise RuntimeError('Discord投稿に失敗しました')
+            await save_stage('post', True)
+            return True
+        
+        pipeline = (Pipeline('weekly_content')
+                    .add_stage('summary', generate_summary)
+                    .add_stage('tts', synthesize_audio, depends_on=['summary'])
+                    .add_stage('text', build_text, depends_on=['summary'])
+                    .add_stage('prepare_post', prepare_post, depends_on=['summary'])
+                    .add_stage('upload_audio', upload('upload_audio', 'tts'), depends_on=['tts'])
+                    .add_stage('upload_text', upload('upload_text', 'text'), depends_on=['text'])
+                    .add_stage('post', send_post, depends_on=['prepare_post', 'upload_audio', 'upload_text']))
+        
+        # 実行全体をトレースし、ステージ・Gemini・TTS・Drive・Firestore の内訳を記録
+        with tracer.span('weekly_content', days=days, run_id=run_id,
+                         correlation_id=get_correlation_id()) as trace_root:
+            run = await pipeline.run()
+        trace = timing_report(trace_root)
+        if trace:
+            logger.info(f"🔍 トレース {trace['trace_id']}: " +
+                        " → ".join(f"{step['name']} {step['duration_ms']:.0f}ms" for step in trace['critical_path']))
+        
+        if not run.success:
+            error = '; '.join(f"{stage}: {message}" for stage, message in run.errors.items())
+            logger.error(f"❌ コンテンツ制作エラー: {error}")
             result = {
-                'success': True,
-                'summary_id': summary_result['summary_id'],
-                'summary_text': summary_text,
-                'audio_file': {
-                    'local_path': audio_file_path,
-                    'drive_info': audio_drive_info
-                },
-                'text_file': {
-                    'local_path': text_filename,
-                    'drive_info': text_drive_info
-                },
-                'discord_posted': discord_posted,
-                'generated_at': datetime.datetime.now().isoformat(),
-                'stats': summary_result['activities_stats']
+                'success': False,
+                'run_id': run_id,
+                'idempotency_key': idempotency_key,
+                'error': error,
+                'stage_timings': run.timing_summary(),
+                'trace': trace
             }
-            
-            # 7. ローカルファイルクリーンアップ（オプション）
-            cleanup_local_files = os.getenv('CLEANUP_LOCAL_FILES', 'true').lower() == 'true'
-            if cleanup_local_files:
-                try:
-                    if audio_file_path and os.path.exists(audio_file_path):
-                        os.remove(audio_file_path)
-                    if os.path.exists(text_filename):
-                        os.remove(text_filename)
-                    print("🧹 ローカルファイルクリーンアップ完了")
-                except Exception as e:
-                    print(f"⚠️ ファイルクリーンアップエラー: {e}")
-            
-            print("✅ 週次エンタメコンテンツ制作完了！")
+            await ensure_lease()
+            await self.save_content_record(result)
             return result
-            
-        except Exception as e:
-            print(f"❌ コンテンツ制作エラー: {e}")
-            return {'success': False, 'error': str(e)}
+        
+        # 6. 結果のまとめ
+        summary_result = run.results['summary']
+        audio_artifact = run.results['tts']
+        text_artifact = run.results['text']
+        result = {
+            'success': True,
+            'run_id': run_id,
+            'idempotency_key': idempotency_key,
+            'resumed_stages': list(checkpoint),
+            'summary_id': summary_result['summary_id'],
+            'summary_text': summary_result['summary_text'],
+            'audio_file': {
+                'filename': audio_artifact.name if audio_artifact else None,
+                'size_bytes': audio_artifact.size if audio_artifact else 0,
+                'drive_info': run.results['upload_audio']
+            },
+            'text_file': {
+                'filename': text_artifact.name,
+                'size_bytes': text_artifact.size,
+                'drive_info': run.results['upload_text']
+            },
+            'discord_posted': run.results['post'],
+            'generated_at': datetime.datetime.now().isoformat(),
+            'stats': summary_result['activities_stats'],
+            'activity_snapshot': summary_result.get('activity_snapshot'),
+            'stage_timings': run.timing_summary(),
+            'trace': trace
+        }
+        
+        await ensure_lease()
+        await self.save_content_record(result)
+        
+        # 投稿まで終わった週（投稿先がない場合は制作まで）は完了として記録し、音声の一時保存は削除
+        if result['discord_posted'] or not self.has_post_target:
+            await self.checkpoints.mark_completed(idempotency_key)
+            if audio_artifact and audio_artifact.sha256:
+                self.checkpoints.delete_blob(audio_artifact.sha256)
+        
+        logger.info("✅ 週次エンタメコンテンツ制作完了！")
+        return result
     
     async def save_content_record(self, result: Dict[str, Any]) -> Optional[str]:
         """コンテンツ制作記録をFirestoreに保存"""
@@ -389,6 +655,11 @@ class ContentCreator:
                 'discord_posted': result.get('discord_posted', False),
                 'stats': result.get('stats', {}),
                 'success': result.get('success', False),
+                'error': result.get('error'),
+                'run_id': result.get('run_id'),
+                'stage_timings': result.get('stage_timings', {}),
+                'trace': result.get('trace'),
+                'activity_snapshot': result.get('activity_snapshot'),
                 'metadata': {
                     'system': 'content_creator.py',
                     'version': '1.0'
@@ -398,9 +669,9 @@ class ContentCreator:
             doc_ref = await asyncio.to_thread(self.db.collection('content_records').add, record_data)
             record_id = doc_ref[1].id
             
-            print(f"✅ コンテンツ記録保存完了: {record_id}")
+            logger.info(f"✅ コンテンツ記録保存完了: {record_id}")
             return record_id
             
         except Exception as e:
-            print(f"❌ コンテンツ記録保存エラー: {e}")
+            logger.error(f"❌ コンテンツ記録保存エラー: {e}")
             return None
\ No newline at end of file
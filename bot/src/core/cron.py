@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cron.py
+Discordエンタメコンテンツ制作アプリ - asyncioネイティブのcronスケジューラー
+
+Botと同じイベントループ上でジョブをタスクとして実行するスケジューラー
+- cron形式（分 時 日 月 曜日）の実行時刻指定
+- 次回実行時刻まで待機（1分ごとのポーリングは行わない）
+- ジッター（実行時刻を少しずらして同時アクセスを避ける）
+- ミスファイア処理（猶予時間を過ぎた実行はスキップ）
+- リソースグループごとの同時実行数制限（Firestoreを大きくスキャンするジョブ同士など）
+- リースを設定した場合は取得できたインスタンスだけが実行（複数インスタンスでの重複防止）
+"""
+
+import logging
+import asyncio
+import datetime
+import random
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Set
+
+from utils.structured_logging import correlation_scope
+from .lease import LeaseLostError
+
+logger = logging.getLogger(__name__)
+
+# 曜日・月の名前（cron表記）
+_DAY_NAMES = {'sun': 0, 'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6}
+_MONTH_NAMES = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+# 曜日の英語名（WEEKLY_SCHEDULE_DAY 互換）
+WEEKDAY_NAMES = {
+    'sunday': 0, 'monday': 1, 'tuesday': 2, 'wednesday': 3,
+    'thursday': 4, 'friday': 5, 'saturday': 6
+}
+
+_MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *'
+}
+
+# 長時間の待機は区切って時刻を再確認する（スリープ・時計の補正対策）
+MAX_SLEEP_SECONDS = 3600
+
+# 次回実行時刻を探す最大日数
+_MAX_SEARCH_DAYS = 366 * 5
+
+
+def _parse_field(field: str, minimum: int, maximum: int, names: Optional[Dict[str, int]] = None) -> Set[int]:
+    """cronの1フィールドを値の集合に変換"""
+    values: Set[int] = set()
+
+    def to_int(token: str) -> int:
+        token = token.lower()
+        if names and token in names:
+            return names[token]
+        return int(token)
+
+    for part in field.split(','):
+        step = 1
+        has_step = '/' in part
+        if has_step:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"ステップは1以上で指定してください: {field}")
+
+        if part == '*':
+            start, end = minimum, maximum
+        elif '-' in part:
+            start_text, end_text = part.split('-', 1)
+            start, end = to_int(start_text), to_int(end_text)
+        else:
+            start = to_int(part)
+            # 「5/15」は5から最大値まで15刻み
+            end = maximum if has_step else start
+
+        if start < minimum or end > maximum or start > end:
+            raise ValueError(f"範囲外の値です: {field}（{minimum}-{maximum}）")
+        values.update(range(start, end + 1, step))
+
+    return values
+
+
+class CronExpression:
+    """cron形式の実行時刻（分 時 日 月 曜日）"""
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = _MACROS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron式は5フィールドで指定してください: {expression}")
+
+        minute, hour, day, month, weekday = fields
+        self.minutes = sorted(_parse_field(minute, 0, 59))
+        self.hours = sorted(_parse_field(hour, 0, 23))
+        self.days = _parse_field(day, 1, 31)
+        self.months = _parse_field(month, 1, 12, _MONTH_NAMES)
+        # 7も日曜日として扱う
+        self.weekdays = {value % 7 for value in _parse_field(weekday, 0, 7, _DAY_NAMES)}
+
+        # 日と曜日の両方が指定された場合はどちらかに一致すれば実行（標準cronと同じ）
+        self._day_restricted = day != '*'
+        self._weekday_restricted = weekday != '*'
+
+    @classmethod
+    def weekly(cls, day: str, time_text: str) -> 'CronExpression':
+        """曜日と時刻（HH:MM）から週次のcron式を作成"""
+        weekday = WEEKDAY_NAMES.get(day.lower())
+        if weekday is None:
+            raise ValueError(f"無効な曜日設定: {day}")
+        hour_text, minute_text = time_text.split(':', 1)
+        return cls(f"{int(minute_text)} {int(hour_text)} * * {weekday}")
+
+    def _matches_day(self, date: datetime.datetime) -> bool:
+        if date.month not in self.months:
+            return False
+        day_match = date.day in self.days
+        weekday_match = (date.weekday() + 1) % 7 in self.weekdays
+        if self._day_restricted and self._weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_after(self, after: datetime.datetime) -> datetime.datetime:
+        """指定時刻より後の次回実行時刻"""
+        candidate = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+
+        for _ in range(_MAX_SEARCH_DAYS):
+            if self._matches_day(candidate):
+                for hour in self.hours:
+                    if hour < candidate.hour:
+                        continue
+                    for minute in self.minutes:
+                        if hour == candidate.hour and minute < candidate.minute:
+                            continue
+                        return candidate.replace(hour=hour, minute=minute)
+            # 翌日の0:00から探す
+            candidate = (candidate + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+
+        raise ValueError(f"実行時刻が見つかりません: {self.expression}")
+
+    def __str__(self) -> str:
+        return self.expression
+
+
+class ScheduledJob:
+    """スケジュール登録されたジョブ"""
+
+    def __init__(self, name: str, cron: CronExpression, func: Callable[[], Awaitable[Any]],
+                 jitter_seconds: float = 0, misfire_grace_seconds: float = 300,
+                 resource_group: Optional[str] = None, description: str = ''):
+        self.name = name
+        self.cron = cron
+        self.func = func
+        self.jitter_seconds = jitter_seconds
+        self.misfire_grace_seconds = misfire_grace_seconds
+        self.resource_group = resource_group
+        self.description = description
+
+        self.next_run: Optional[datetime.datetime] = None
+        self.last_run: Optional[datetime.datetime] = None
+        self.last_duration_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.run_count = 0
+        self.misfire_count = 0
+        # 他のインスタンスがリースを保持していたため実行しなかった回数
+        self.lease_skip_count = 0
+        self.last_lease_token: Optional[int] = None
+        self.running = False
+        # リソースグループの空き待ち
+        self.waiting = False
+        self._task: Optional[asyncio.Task] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'description': self.description,
+            'cron': str(self.cron),
+            'resource_group': self.resource_group,
+            'next_run': self.next_run.isoformat() if self.next_run else None,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_duration_seconds': self.last_duration_seconds,
+            'last_error': self.last_error,
+            'run_count': self.run_count,
+            'misfire_count': self.misfire_count,
+            'lease_skip_count': self.lease_skip_count,
+            'last_lease_token': self.last_lease_token,
+            'running': self.running,
+            'waiting': self.waiting
+        }
+
+
+class CronScheduler:
+    """イベントループ上でcronジョブを実行するスケジューラー"""
+
+    def __init__(self, tz: Optional[datetime.tzinfo] = None,
+                 clock: Optional[Callable[[], datetime.datetime]] = None,
+                 lease_manager=None, lease_prefix: str = 'scheduler_'):
+        self.tz = tz
+        self._clock = clock
+        # core.lease.LeaseManager（None の場合はリースなしで実行）
+        self.lease_manager = lease_manager
+        self.lease_prefix = lease_prefix
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.is_running = False
+        # リソースグループ名 -> 同時実行数の制限
+        self._group_limits: Dict[str, int] = {}
+        self._group_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def now(self) -> datetime.datetime:
+        if self._clock:
+            return self._clock()
+        if self.tz:
+            return datetime.datetime.now(self.tz)
+        return datetime.datetime.now().astimezone()
+
+    def set_group_limit(self, group: str, limit: int):
+        """リソースグループの同時実行数を設定"""
+        self._group_limits[group] = max(1, limit)
+        self._group_semaphores.pop(group, None)
+
+    def _group_semaphore(self, group: Optional[str]) -> Optional[asyncio.Semaphore]:
+        if not group or group not in self._group_limits:
+            return None
+        if group not in self._group_semaphores:
+            self._group_semaphores[group] = asyncio.Semaphore(self._group_limits[group])
+        return self._group_semaphores[group]
+
+    def add_job(self, name: str, cron: CronExpression, func: Callable[[], Awaitable[Any]],
+                jitter_seconds: float = 0, misfire_grace_seconds: float = 300,
+                resource_group: Optional[str] = None, description: str = '') -> ScheduledJob:
+        """ジョブを登録（同名のジョブは設定を置き換え、実行中なら即座にスケジュール開始）"""
+        job = self.jobs.get(name)
+        if job:
+            job.cron = cron
+            job.func = func
+            job.jitter_seconds = jitter_seconds
+            job.misfire_grace_seconds = misfire_grace_seconds
+            job.resource_group = resource_group
+            job.description = description or job.description
+            # 実行中のジョブは完了後に新しいスケジュールで次回時刻を計算する
+            if job._task and not job.running and not job.waiting:
+                job._task.cancel()
+                job._task = None
+        else:
+            job = ScheduledJob(name, cron, func, jitter_seconds, misfire_grace_seconds,
+                               resource_group, description)
+            self.jobs[name] = job
+        if self.is_running and not job._task:
+            job._task = asyncio.create_task(self._job_loop(job))
+        return job
+
+    def remove_job(self, name: str):
+        """ジョブを削除"""
+        job = self.jobs.pop(name, None)
+        if job and job._task:
+            job._task.cancel()
+
+    def start(self):
+        """全ジョブのスケジュールを開始（イベントループ上から呼び出す）"""
+        if self.is_running:
+            return
+        self.is_running = True
+        for job in self.jobs.values():
+            job._task = asyncio.create_task(self._job_loop(job))
+
+    async def stop(self):
+        """全ジョブのスケジュールを停止"""
+        self.is_running = False
+        tasks = [job._task for job in self.jobs.values() if job._task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            job._task = None
+            job.next_run = None
+
+    def get_jobs(self) -> List[Dict[str, Any]]:
+        return [job.to_dict() for job in self.jobs.values()]
+
+    async def run_now(self, name: str):
+        """ジョブをスケジュール外で即時実行（リソースグループの制限は適用）"""
+        job = self.jobs.get(name)
+        if not job:
+            raise KeyError(f"未登録のジョブ: {name}")
+        if job.running or job.waiting:
+            raise RuntimeError(f"ジョブ '{name}' は実行中です")
+        return await self._run_job(job, raise_errors=True)
+
+    async def _sleep_until(self, target: datetime.datetime):
+        """指定時刻まで待機"""
+        while True:
+            remaining = (target - self.now()).total_seconds()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, MAX_SLEEP_SECONDS))
+
+    async def _job_loop(self, job: ScheduledJob):
+        """1ジョブの実行ループ"""
+        while self.is_running:
+            scheduled = job.cron.next_after(self.now())
+            job.next_run = scheduled
+            fire_at = scheduled + datetime.timedelta(seconds=random.uniform(0, job.jitter_seconds))
+            await self._sleep_until(fire_at)
+
+            # ループが長時間ブロックされた・インスタンスが停止していた場合など
+            delay = (self.now() - scheduled).total_seconds()
+            if delay > job.jitter_seconds + job.misfire_grace_seconds:
+                job.misfire_count += 1
+                logger.warning(f"⚠️ ジョブ '{job.name}' の実行時刻を{delay:.0f}秒過ぎたためスキップしました")
+                continue
+
+            # 1回の実行のログを相関IDでまとめる
+            with correlation_scope(prefix=f"{job.name}-"):
+                await self._run_job(job, slot=scheduled.isoformat())
+
+    async def _run_job(self, job: ScheduledJob, raise_errors: bool = False, slot: Optional[str] = None):
+        """ジョブを1回実行（例外はログに記録してスケジュールは継続）
+
+        slot はスケジュール上の実行時刻。リース使用時は同じ回を複数インスタンスで実行しない
+        """
+        semaphore = self._group_semaphore(job.resource_group)
+        if semaphore:
+            job.waiting = True
+            if semaphore.locked():
+                logger.info(f"⏳ ジョブ '{job.name}' はリソースグループ '{job.resource_group}' の空き待ち")
+            try:
+                await semaphore.acquire()
+            finally:
+                job.waiting = False
+
+        try:
+            if not self.lease_manager:
+                return await self._execute(job, raise_errors)
+
+            async with self.lease_manager.hold(f"{self.lease_prefix}{job.name}", slot) as lease:
+                if lease is None:
+                    job.lease_skip_count += 1
+                    logger.info(f"⏭️ ジョブ '{job.name}' は他のインスタンスが実行中のためスキップしました")
+                    if raise_errors:
+                        raise RuntimeError(f"ジョブ '{job.name}' は他のインスタンスが実行中です")
+                    return None
+                job.last_lease_token = lease.token
+                try:
+                    result = await self._execute(job, raise_errors)
+                except asyncio.CancelledError:
+                    if not lease.lost:
+                        raise
+                    # リースを失ったため LeaseManager が中断した（スケジューラー自体は止めない）
+                    task = asyncio.current_task()
+                    if hasattr(task, 'uncancel'):
+                        task.uncancel()
+                    job.last_error = f"リースを失ったため中断しました（トークン {lease.token}）"
+                    logger.error(f"❌ ジョブ '{job.name}' はリースを失ったため中断しました（トークン {lease.token}）")
+                    if raise_errors:
+                        raise LeaseLostError(job.last_error)
+                    return None
+                lease.completed = job.last_error is None and not lease.lost
+                if lease.lost:
+                    logger.warning(f"⚠️ ジョブ '{job.name}' の実行中にリースを失いました（トークン {lease.token}）")
+                return result
+        finally:
+            if semaphore:
+                semaphore.release()
+
+    async def _execute(self, job: ScheduledJob, raise_errors: bool):
+        job.running = True
+        job.last_run = self.now()
+        started = time.perf_counter()
+        logger.info(f"📅 定期実行: {job.name}")
+        try:
+            result = await job.func()
+            job.last_error = None
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.last_error = str(e)
+            logger.error(f"❌ ジョブ '{job.name}' 実行エラー: {e}")
+            if raise_errors:
+                raise
+        finally:
+            job.running = False
+            job.run_count += 1
+            job.last_duration_seconds = round(time.perf_counter() - started, 3)
@@ -7,6 +7,7 @@ daily_analytics.py
 Discordの日次活動データを収集してFirestoreに保存
 """
 
+import logging
 import discord
 import datetime
 import asyncio
@@ -16,6 +17,8 @@ from firebase_admin import firestore
 from collections import Counter, defaultdict
 import json
 
+logger = logging.getLogger(__name__)
+
 class DailyAnalytics:
     """日次アナリティクスデータの収集と管理"""
     
@@ -136,7 +139,7 @@ class DailyAnalytics:
             return analytics_data
             
         except Exception as e:
-            print(f"❌ アナリティクスデータ収集エラー: {e}")
+            logger.error(f"❌ アナリティクスデータ収集エラー: {e}")
             return analytics_data
     
     async def _count_new_members(self, start_time: datetime.datetime, end_time: datetime.datetime) -> int:
@@ -151,7 +154,7 @@ class DailyAnalytics:
             return len(new_members)
             
         except Exception as e:
-            print(f"新規メンバー数取得エラー: {e}")
+            logger.info(f"新規メンバー数取得エラー: {e}")
             return 0
     
     async def _count_reengagements(self, start_time: datetime.datetime, end_time: datetime.datetime) -> int:
@@ -167,7 +170,7 @@ class DailyAnalytics:
             return len(reengagements)
             
         except Exception as e:
-            print(f"再エンゲージメント数取得エラー: {e}")
+            logger.info(f"再エンゲージメント数取得エラー: {e}")
             return 0
     
     async def save_daily_analytics(self, analytics_data: Dict[str, Any]) -> str:
@@ -180,23 +183,23 @@ class DailyAnalytics:
             )
             
             analytics_id = doc_ref[1].id
-            print(f"✅ 日次アナリティクスデータを保存: {analytics_id}")
-            print(f"   日付: {analytics_data['date']}")
-            print(f"   アクティブユーザー: {analytics_data['activeUsers']}")
-            print(f"   メッセージ数: {analytics_data['messageCount']}")
+            logger.info(f"✅ 日次アナリティクスデータを保存: {analytics_id}")
+            logger.info(f"   日付: {analytics_data['date']}")
+            logger.info(f"   アクティブユーザー: {analytics_data['activeUsers']}")
+            logger.info(f"   メッセージ数: {analytics_data['messageCount']}")
             
             return analytics_id
             
         except Exception as e:
-            print(f"❌ アナリティクスデータ保存エラー: {e}")
+            logger.error(f"❌ アナリティクスデータ保存エラー: {e}")
             return None
     
-    async def run_daily_analytics(self) -> Dict[str, Any]:
-        """日次アナリティクスの実行（収集と保存）"""
-        print("📊 日次アナリティクスを開始...")
+    async def run_daily_analytics(self, date: Optional[datetime.date] = None) -> Dict[str, Any]:
+        """日次アナリティクスの実行（収集と保存、デフォルトは今日）"""
+        logger.info("📊 日次アナリティクスを開始...")
         
-        # 今日のデータを収集
-        analytics_data = await self.collect_daily_analytics()
+        # 対象日のデータを収集
+        analytics_data = await self.collect_daily_analytics(date)
         
         # データを保存
         analytics_id = await self.save_daily_analytics(analytics_data)
@@ -214,7 +217,7 @@ class DailyAnalytics:
             }
         }
         
-        print("✅ 日次アナリティクス完了")
+        logger.info("✅ 日次アナリティクス完了")
         return result
     
     async def get_analytics_for_date(self, date: datetime.date) -> Optional[Dict[str, Any]]:
@@ -235,5 +238,5 @@ class DailyAnalytics:
                 return None
                 
         except Exception as e:
-            print(f"❌ アナリティクスデータ取得エラー: {e}")
+            logger.error(f"❌ アナリティクスデータ取得エラー: {e}")
             return None
\ No newline at end of file
@@ -7,6 +7,7 @@ Discord アクティビティ分析・まとめ生成機能
 Discord内のアクションに対するまとめ情報生成、週次レポート作成
 """
 
+import logging
 import discord
 import datetime
 import asyncio
@@ -18,6 +19,11 @@ from firebase_admin import firestore
 from collections import Counter, defaultdict
 import vertexai
 from vertexai.generative_models import GenerativeModel
+from .activity_snapshot import ActivitySnapshot, get_activity_snapshot
+from utils.metrics import LLM_REQUESTS, LLM_DURATION, track
+from utils.tracing import tracer, traced
+
+logger = logging.getLogger(__name__)
 
 class DiscordAnalytics:
     """Discord活動データの分析とまとめ生成"""
@@ -55,10 +61,15 @@ class DiscordAnalytics:
             }
         }
     
-    async def collect_weekly_activities(self, days: int = 7) -> Dict[str, Any]:
-        """週間のDiscordアクティビティを収集"""
-        cutoff_date = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+    async def get_activity_snapshot(self, days: int = 7) -> ActivitySnapshot:
+        """期間内のアクティビティのスナップショット（他の処理と共有）"""
+        return await get_activity_snapshot(self.db, days)
+    
+    async def collect_weekly_activities(self, days: int = 7, snapshot: Optional[ActivitySnapshot] = None) -> Dict[str, Any]:
+        """週間のDiscordアクティビティを収集
         
+        snapshot を渡した場合はFirestoreを再スキャンせずにその内容を使う
+        """
         activities = {
             'messages': [],
             'reactions': [],
@@ -70,16 +81,11 @@ class DiscordAnalytics:
         }
         
         try:
-            # メッセージアクティビティ収集
-            interactions_ref = (self.db.collection('interactions')
-                              .where('timestamp', '>=', cutoff_date)
-                              .order_by('timestamp', direction=firestore.Query.DESCENDING)
-                              .limit(500))
+            if snapshot is None:
+                snapshot = await self.get_activity_snapshot(days)
             
-            docs = await asyncio.to_thread(interactions_ref.get)
-            for doc in docs:
-                data = doc.to_dict()
-                data['id'] = doc.id
+            # メッセージアクティビティ
+            for data in snapshot.recent_messages():
                 activities['messages'].append(data)
                 
                 # ユーザー別アクティビティ
@@ -90,16 +96,8 @@ class DiscordAnalytics:
                 channel = data.get('channelName', 'Unknown')
                 activities['channel_activities'][channel].append(data)
             
-            # イベントデータ収集
-            events_ref = (self.db.collection('events')
-                         .where('updatedAt', '>=', cutoff_date)
-                         .order_by('updatedAt', direction=firestore.Query.DESCENDING))
-            
-            event_docs = await asyncio.to_thread(events_ref.get)
-            for doc in event_docs:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                activities['events'].append(data)
+            # イベントデータ
+            activities['events'] = snapshot.events_since(days)
             
             # 統計情報生成
             activities['summary_stats'] = self._generate_summary_stats(activities)
@@ -107,7 +105,7 @@ class DiscordAnalytics:
             return activities
             
         except Exception as e:
-            print(f"❌ アクティビティ収集エラー: {e}")
+            logger.error(f"❌ アクティビティ収集エラー: {e}")
             return activities
     
     def _generate_summary_stats(self, activities: Dict[str, Any]) -> Dict[str, Any]:
@@ -160,7 +158,9 @@ class DiscordAnalytics:
         
         try:
             # Geminiで生成
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
+            with tracer.child_span('llm.generate', purpose='weekly_summary', prompt_chars=len(prompt)), \
+                    track(LLM_REQUESTS, LLM_DURATION, purpose='weekly_summary'):
+                response = await asyncio.to_thread(self.model.generate_content, prompt)
             
             # レスポンステキスト取得
             summary_text = response.text if hasattr(response, 'text') else str(response)
@@ -168,7 +168,7 @@ class DiscordAnalytics:
             return summary_text
             
         except Exception as e:
-            print(f"❌ AI要約生成エラー: {e}")
+            logger.error(f"❌ AI要約生成エラー: {e}")
             return self._create_fallback_summary(activities)
     
     def _create_summary_prompt(self, activities: Dict[str, Any]) -> str:
@@ -281,22 +281,23 @@ class DiscordAnalytics:
             doc_ref = await asyncio.to_thread(self.db.collection('weekly_summaries').add, summary_data)
             summary_id = doc_ref[1].id
             
-            print(f"✅ 週次まとめをFirestoreに保存: {summary_id}")
+            logger.info(f"✅ 週次まとめをFirestoreに保存: {summary_id}")
             return summary_id
             
         except Exception as e:
-            print(f"❌ 週次まとめ保存エラー: {e}")
+            logger.error(f"❌ 週次まとめ保存エラー: {e}")
             return None
     
-    async def generate_and_save_weekly_summary(self, days: int = 7) -> Dict[str, Any]:
+    @traced('analytics.generate_and_save_weekly_summary')
+    async def generate_and_save_weekly_summary(self, days: int = 7, snapshot: Optional[ActivitySnapshot] = None) -> Dict[str, Any]:
         """週次まとめ生成・保存のメイン処理"""
-        print("📊 週次アクティビティ分析を開始...")
+        logger.info("📊 週次アクティビティ分析を開始...")
         
         # アクティビティ収集
-        activities = await self.collect_weekly_activities(days)
+        activities = await self.collect_weekly_activities(days, snapshot)
         
         # AI要約生成
-        print("🤖 AI による要約生成中...")
+        logger.info("🤖 AI による要約生成中...")
         summary_text = await self.generate_weekly_summary_with_ai(activities)
         
         # 保存
@@ -310,5 +311,5 @@ class DiscordAnalytics:
             'generated_at': datetime.datetime.now().isoformat()
         }
         
-        print("✅ 週次まとめ生成完了")
+        logger.info("✅ 週次まとめ生成完了")
         return result
\ No newline at end of file
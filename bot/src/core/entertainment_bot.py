@@ -7,27 +7,53 @@ Discordエンタメコンテンツ制作アプリ統合メインシステム
 全ての機能を統合したメインBot実装
 """
 
+import logging
 import discord
 import datetime
 import asyncio
 import os
+import io
 import json
-from typing import Optional, Dict, Any, List
-from firebase_admin import firestore
+import threading
+from typing import Optional, Dict, Any, List, Tuple, TYPE_CHECKING
 from dotenv import load_dotenv
 
-# 内部モジュール
-from .discord_analytics import DiscordAnalytics
-from .content_creator import ContentCreator
-from .scheduler import SchedulerManager
-from .podcast import PodcastGenerator
-from .daily_analytics import DailyAnalytics
+# 内部モジュール（Vertex AI・TTS・Google Drive を使うサービスは ServiceContainer が初回利用時にimport）
+from .bot_action_writer import BotActionWriter
+from .job_queue import JobQueue, make_dedupe_key
+from .lease import LeaseBusyError
+from .services import ServiceContainer
+from .sharding import ShardTracker, shard_options
+from utils.firestore_metrics import instrument_firestore
+from utils.metrics import (
+    LLM_REQUESTS, LLM_DURATION, FIRESTORE_OPERATIONS, FIRESTORE_DURATION, timed_event, track
+)
+from utils.sampling_profiler import SamplingProfiler, ProfilerBusyError, PROFILE_MAX_SECONDS
+from utils.structured_logging import correlation_scope
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from .discord_analytics import DiscordAnalytics
+    from .content_creator import ContentCreator
+    from .scheduler import SchedulerManager
+    from .podcast import PodcastGenerator
+    from .daily_analytics import DailyAnalytics
 
 # .envファイルから環境変数を読み込み
 load_dotenv()
 
-class EntertainmentBot(discord.Client):
-    """Discordエンタメコンテンツ制作Bot"""
+# ギルド情報を1回のバッチで書き込む件数と、同時に書き込むバッチ数
+GUILD_INFO_BATCH_SIZE = min(500, int(os.getenv('GUILD_INFO_BATCH_SIZE', '200')))
+GUILD_INFO_CONCURRENCY = int(os.getenv('GUILD_INFO_CONCURRENCY', '4'))
+
+
+class EntertainmentBot(discord.AutoShardedClient):
+    """Discordエンタメコンテンツ制作Bot
+
+    AutoShardedClient としてシャード単位でゲートウェイに接続する
+    （シャード数・担当シャードは create_entertainment_bot が環境変数から設定）
+    """
     
     def __init__(self, firestore_client, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -36,12 +62,20 @@ class EntertainmentBot(discord.Client):
         # Firestoreクライアントの正規化
         self._firestore_client = self._get_firestore_client()
         
-        # コア機能の初期化
-        self.analytics = DiscordAnalytics(firestore_client)
-        self.daily_analytics = DailyAnalytics(self, firestore_client)
-        self.content_creator = ContentCreator(firestore_client, self)
-        self.scheduler_manager = SchedulerManager(firestore_client, self)
-        self.podcast_generator = PodcastGenerator()
+        # コア機能（初回利用時に1度だけ生成し、Bot・コンテンツ制作・スケジューラーで共有）
+        self.services = ServiceContainer(self._firestore_client, self)
+        
+        # 時間のかかるコマンド（!summary, !podcast）はバックグラウンドジョブで実行
+        self.job_queue = JobQueue(
+            self._firestore_client,
+            max_workers=int(os.getenv('JOB_QUEUE_MAX_WORKERS', '2'))
+        )
+        
+        # Botアクション記録は応答を待たせないようバックグラウンドでまとめて書き込む
+        self.bot_action_writer = BotActionWriter(self._firestore_client)
+        
+        # シャードごとの接続状態
+        self.shard_tracker = ShardTracker()
         
         # 設定
         self.command_prefix = os.getenv('BOT_COMMAND_PREFIX', '!')
@@ -51,14 +85,35 @@ class EntertainmentBot(discord.Client):
         self.last_natural_response = {}  # {channel_id: timestamp}
         self.natural_response_cooldown = 300  # 5分間のクールダウン
         
-        print("🎬 エンタメコンテンツ制作Bot初期化完了")
+        logger.info("🎬 エンタメコンテンツ制作Bot初期化完了")
+    
+    @property
+    def analytics(self) -> 'DiscordAnalytics':
+        return self.services.analytics
+    
+    @property
+    def daily_analytics(self) -> 'DailyAnalytics':
+        return self.services.daily_analytics
+    
+    @property
+    def content_creator(self) -> 'ContentCreator':
+        return self.services.content_creator
+    
+    @property
+    def scheduler_manager(self) -> 'SchedulerManager':
+        return self.services.scheduler_manager
+    
+    @property
+    def podcast_generator(self) -> 'PodcastGenerator':
+        return self.services.podcast_generator
     
     def _get_firestore_client(self):
         """Firestoreクライアントを取得"""
+        # 操作ごとの回数・所要時間を /metrics に記録する
         if hasattr(self.db, 'collection'):
-            return self.db
+            return instrument_firestore(self.db)
         elif hasattr(self.db, 'db'):
-            return self.db.db
+            return instrument_firestore(self.db.db)
         else:
             raise ValueError("無効なFirestoreクライアント")
     
@@ -69,25 +124,61 @@ class EntertainmentBot(discord.Client):
             try:
                 return [int(id_str.strip()) for id_str in admin_ids_str.split(',')]
             except ValueError:
-                print("⚠️ 管理者ユーザーID設定エラー")
+                logger.warning("⚠️ 管理者ユーザーID設定エラー")
         return []
     
+    @timed_event
     async def on_ready(self):
         """Botが準備完了時の処理"""
-        print(f'✅ {self.user} がログインしました')
-        print(f'📊 接続サーバー数: {len(self.guilds)}')
+        logger.info(f'✅ {self.user} がログインしました')
+        logger.info(f'📊 接続サーバー数: {len(self.guilds)} (シャード: {sorted(self.shards)} / 全{self.shard_count})')
         
-        # ギルド情報をFirestoreに記録
-        await self._update_guild_info()
+        # ギルド情報はシャードごとに on_shard_ready で記録済み
         
         # 自動スケジューラー開始（設定されている場合）
         auto_start_scheduler = os.getenv('AUTO_START_SCHEDULER', 'false').lower() == 'true'
         if auto_start_scheduler:
-            print("🚀 自動スケジューラー開始...")
+            logger.info("🚀 自動スケジューラー開始...")
             self.scheduler_manager.scheduler.start_scheduler()
     
+    @timed_event
+    async def on_shard_connect(self, shard_id: int):
+        """シャードのゲートウェイ接続時の処理"""
+        self.shard_tracker.connected(shard_id)
+        logger.info(f"🔌 シャード {shard_id} 接続")
+    
+    @timed_event
+    async def on_shard_ready(self, shard_id: int):
+        """シャードの準備完了時の処理（そのシャードのギルド情報を記録）"""
+        self.shard_tracker.ready(shard_id)
+        guilds = [guild for guild in self.guilds if guild.shard_id == shard_id]
+        logger.info(f"✅ シャード {shard_id} 準備完了: {len(guilds)}サーバー")
+        await self._update_guild_info(guilds)
+    
+    @timed_event
+    async def on_shard_resumed(self, shard_id: int):
+        """シャードのセッション再開時の処理"""
+        self.shard_tracker.resumed(shard_id)
+        logger.info(f"🔁 シャード {shard_id} 再開")
+    
+    @timed_event
+    async def on_shard_disconnect(self, shard_id: int):
+        """シャードの切断時の処理"""
+        self.shard_tracker.disconnected(shard_id)
+        logger.warning(f"⚠️ シャード {shard_id} 切断")
+    
+    def shard_status(self) -> List[Dict[str, Any]]:
+        """シャードごとの状態（ヘルスチェック・メトリクス用）"""
+        guild_counts: Dict[int, int] = {}
+        for guild in self.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+        return self.shard_tracker.snapshot(dict(self.latencies), guild_counts)
+    
+    @timed_event
     async def on_message(self, message):
         """メッセージ受信時の処理"""
+        self.shard_tracker.message(message.guild.shard_id if message.guild else 0)
+        
         # Bot自身のメッセージは無視
         if message.author == self.user:
             return
@@ -96,6 +187,12 @@ class EntertainmentBot(discord.Client):
         if message.author.bot:
             return
         
+        # このメッセージから始まる処理（コマンド・ジョブ投入など）のログを相関IDでまとめる
+        with correlation_scope(f"msg-{message.id}"):
+            await self._route_message(message)
+    
+    async def _route_message(self, message):
+        """メッセージの種類に応じて処理を振り分け"""
         # メンション処理（最優先）
         if self.user in message.mentions:
             await self._handle_mention(message)
@@ -114,6 +211,7 @@ class EntertainmentBot(discord.Client):
         # メッセージログ記録（既存機能との連携）
         await self._log_message_activity(message)
 
+    @timed_event
     async def on_message_edit(self, before, after):
         """メッセージ編集時の処理"""
         if after.author == self.user:
@@ -121,6 +219,7 @@ class EntertainmentBot(discord.Client):
         
         await self._log_message_edit_activity(before, after)
 
+    @timed_event
     async def on_message_delete(self, message):
         """メッセージ削除時の処理"""
         if message.author == self.user:
@@ -128,6 +227,7 @@ class EntertainmentBot(discord.Client):
         
         await self._log_message_delete_activity(message)
 
+    @timed_event
     async def on_reaction_add(self, reaction, user):
         """リアクション追加時の処理"""
         if user == self.user:
@@ -135,6 +235,7 @@ class EntertainmentBot(discord.Client):
         
         await self._log_reaction_activity(reaction, user, 'reaction_add')
 
+    @timed_event
     async def on_reaction_remove(self, reaction, user):
         """リアクション削除時の処理"""
         if user == self.user:
@@ -142,30 +243,37 @@ class EntertainmentBot(discord.Client):
         
         await self._log_reaction_activity(reaction, user, 'reaction_remove')
 
+    @timed_event
     async def on_member_join(self, member):
         """メンバー参加時の処理"""
         await self._log_member_activity(member, 'member_join')
 
+    @timed_event
     async def on_member_remove(self, member):
         """メンバー退出時の処理"""
         await self._log_member_activity(member, 'member_leave')
 
+    @timed_event
     async def on_scheduled_event_create(self, event):
         """スケジュールイベント作成時の処理"""
         await self._log_event_activity(event, 'scheduled_event_create')
 
+    @timed_event
     async def on_scheduled_event_update(self, before, after):
         """スケジュールイベント更新時の処理"""
         await self._log_event_activity(after, 'scheduled_event_update', before)
 
+    @timed_event
     async def on_scheduled_event_delete(self, event):
         """スケジュールイベント削除時の処理"""
         await self._log_event_activity(event, 'scheduled_event_delete')
 
+    @timed_event
     async def on_scheduled_event_user_add(self, event, user):
         """スケジュールイベント参加時の処理"""
         await self._log_event_user_activity(event, user, 'scheduled_event_user_add')
 
+    @timed_event
     async def on_scheduled_event_user_remove(self, event, user):
         """スケジュールイベント離脱時の処理"""
         await self._log_event_user_activity(event, user, 'scheduled_event_user_remove')
@@ -181,7 +289,7 @@ class EntertainmentBot(discord.Client):
         
         try:
             # 管理者権限が必要なコマンド
-            admin_commands = ['scheduler', 'summary', 'analytics', 'podcast', 'advice', 'daily_analytics']
+            admin_commands = ['scheduler', 'summary', 'analytics', 'podcast', 'advice', 'daily_analytics', 'profile']
             if command in admin_commands and message.author.id not in self.admin_user_ids:
                 await message.reply("❌ このコマンドは管理者専用です")
                 return
@@ -221,11 +329,14 @@ class EntertainmentBot(discord.Client):
             elif command == 'daily_analytics':
                 await self._cmd_daily_analytics(message)
             
+            elif command == 'profile':
+                await self._cmd_profile(message, command_parts)
+            
             else:
                 await message.reply(f"❓ 不明なコマンド: {command}")
         
         except Exception as e:
-            print(f"❌ コマンド処理エラー: {e}")
+            logger.error(f"❌ コマンド処理エラー: {e}")
             await message.reply(f"❌ コマンド実行エラー: {e}")
     
     async def _handle_mention(self, message):
@@ -253,7 +364,7 @@ class EntertainmentBot(discord.Client):
             await self._natural_conversation_response(message, content)
             
             # メンション処理をログに記録
-            await self._log_bot_action(
+            self._log_bot_action(
                 'conversation',
                 str(message.author.id),
                 str(message.guild.id) if message.guild else None,
@@ -262,7 +373,7 @@ class EntertainmentBot(discord.Client):
             )
             
         except Exception as e:
-            print(f"❌ メンション処理エラー: {e}")
+            logger.error(f"❌ メンション処理エラー: {e}")
             error_responses = [
                 "ごめんなさい、ちょっと混乱してしまいました💦",
                 "申し訳ございません、うまく理解できませんでした",
@@ -316,7 +427,8 @@ class EntertainmentBot(discord.Client):
             """
             
             model = GenerativeModel("gemini-1.5-flash")
-            response = model.generate_content(prompt)
+            with track(LLM_REQUESTS, LLM_DURATION, purpose='natural_conversation'):
+                response = await asyncio.to_thread(model.generate_content, prompt)
             ai_response = response.text
             
             # 考え中メッセージを削除
@@ -326,7 +438,7 @@ class EntertainmentBot(discord.Client):
             await message.reply(ai_response)
             
         except Exception as e:
-            print(f"❌ 会話応答生成エラー: {e}")
+            logger.error(f"❌ 会話応答生成エラー: {e}")
             # エラー時はシンプルな応答
             fallback_responses = [
                 f"{message.author.display_name}さん、ちょっと考えがまとまりませんでした💦 もう一度お話しいただけますか？",
@@ -425,7 +537,8 @@ class EntertainmentBot(discord.Client):
             """
             
             model = GenerativeModel("gemini-1.5-flash")
-            response = model.generate_content(prompt)
+            with track(LLM_REQUESTS, LLM_DURATION, purpose='short_reply'):
+                response = await asyncio.to_thread(model.generate_content, prompt)
             ai_response = response.text
             
             # 考え中メッセージを削除
@@ -435,7 +548,7 @@ class EntertainmentBot(discord.Client):
             await message.reply(ai_response)
             
             # ログ記録
-            await self._log_bot_action(
+            self._log_bot_action(
                 'natural_conversation',
                 str(message.author.id),
                 str(message.guild.id) if message.guild else None,
@@ -444,7 +557,7 @@ class EntertainmentBot(discord.Client):
             )
             
         except Exception as e:
-            print(f"❌ 自然会話応答エラー: {e}")
+            logger.error(f"❌ 自然会話応答エラー: {e}")
             # エラー時は控えめな応答
             casual_responses = [
                 "😊",
@@ -479,12 +592,13 @@ class EntertainmentBot(discord.Client):
                 name="🔧 管理者コマンド",
                 value="""
 `!scheduler start/stop/status/run` - スケジューラー操作
-`!summary [days]` - 手動で週次まとめ生成
+`!summary [days] [force]` - 手動で週次まとめ生成（force: 今週の途中結果を使わず作り直す）
 `!analytics [days]` - アクティビティ分析
 `!podcast [days]` - ポッドキャスト生成
 `!advice` - 週次運営アドバイス生成
 `!botactions [--limit=N] [--type=TYPE]` - Botアクション履歴表示
 `!daily_analytics` - 日次アナリティクス生成
+`!profile [seconds]` - 稼働中のBotをサンプリングプロファイル（collapsed 形式で添付）
                 """,
                 inline=False
             )
@@ -492,53 +606,100 @@ class EntertainmentBot(discord.Client):
         help_embed.set_footer(text="Powered by Discord Entertainment Bot")
         await message.reply(embed=help_embed)
     
+    def _reply_listener(self, reply):
+        """ジョブの進捗で返信メッセージを更新するリスナーを作成"""
+        async def listener(text: str, embed: Optional[discord.Embed] = None):
+            await reply.edit(content=text, embed=embed)
+        return listener
+    
+    async def _submit_command_job(self, message, kind: str, params: Dict[str, Any], handler, accepted_text: str,
+                                  dedupe_key: Optional[str] = None):
+        """コマンドをジョブとして投入し、受付結果を返信"""
+        reply = await message.reply(accepted_text)
+        job, created = await self.job_queue.submit(
+            kind,
+            params,
+            handler,
+            listener=self._reply_listener(reply),
+            requested_by=str(message.author.id),
+            dedupe_key=dedupe_key
+        )
+        
+        if not created:
+            # 同じ条件のジョブが実行中の場合は相乗りして完了を待つ
+            await reply.edit(content=f"⏳ 同じ条件のジョブがすでに実行中です（ジョブID: {job.id}）。完了したらこのメッセージを更新します")
+    
     async def _cmd_summary(self, message, command_parts):
         """週次まとめ生成コマンド"""
         days = 7
-        if len(command_parts) > 1:
+        # force 指定時はチェックポイントを使わず最初から作り直す
+        force = 'force' in [part.lower() for part in command_parts[1:]]
+        day_args = [part for part in command_parts[1:] if part.lower() != 'force']
+        if day_args:
             try:
-                days = int(command_parts[1])
+                days = int(day_args[0])
                 days = max(1, min(days, 30))  # 1-30日の範囲
             except ValueError:
                 await message.reply("❌ 日数は数字で指定してください")
                 return
         
-        await message.reply("🎬 週次エンタメコンテンツ制作を開始します...")
+        # 同じ週のチェックポイントを共有するので force の有無にかかわらず同じ日数の実行は1つにまとめる
+        await self._submit_command_job(
+            message, 'weekly_content', {'days': days, 'force': force}, self._run_summary_job,
+            "🎬 週次エンタメコンテンツ制作を開始します...",
+            dedupe_key=make_dedupe_key('weekly_content', {'days': days})
+        )
+    
+    async def _run_summary_job(self, job) -> Dict[str, Any]:
+        """週次まとめ生成ジョブ"""
+        days = job.params['days']
+        
+        async def create():
+            return await self.content_creator.create_weekly_content(
+                days,
+                progress_callback=job.update_progress,
+                resume=not job.params.get('force', False)
+            )
         
+        # 定期実行・他のインスタンスと同じ週を同時に作らないよう、定期実行と同じリースを保持して実行
         try:
-            result = await self.content_creator.create_weekly_content(days)
+            result = await self.scheduler_manager.run_weekly_exclusive(create)
+        except LeaseBusyError:
+            raise RuntimeError("週次コンテンツ制作は別の実行（定期実行・他のインスタンス）が実行中です。完了後に再実行してください")
+        
+        if result.get('already_completed'):
+            await job.update_progress("⏭️ 今週の週次コンテンツは作成済みです（作り直す場合は `!summary force`）")
+        elif result['success']:
+            embed = discord.Embed(
+                title="✅ 週次コンテンツ制作完了",
+                description=f"過去{days}日間のデータからコンテンツを生成しました",
+                color=0x00ff00
+            )
             
-            if result['success']:
-                embed = discord.Embed(
-                    title="✅ 週次コンテンツ制作完了",
-                    description=f"過去{days}日間のデータからコンテンツを生成しました",
-                    color=0x00ff00
-                )
-                
-                stats = result.get('stats', {})
-                embed.add_field(
-                    name="📊 統計情報",
-                    value=f"""
+            stats = result.get('stats', {})
+            embed.add_field(
+                name="📊 統計情報",
+                value=f"""
 メッセージ数: {stats.get('total_messages', 0)}
 アクティブユーザー: {stats.get('active_users_count', 0)}名
 アクティブチャンネル: {stats.get('active_channels_count', 0)}個
-                    """,
+                """,
+                inline=True
+            )
+            
+            if result.get('discord_posted'):
+                embed.add_field(
+                    name="📝 投稿状態",
+                    value="✅ Discord投稿完了",
                     inline=True
                 )
-                
-                if result.get('discord_posted'):
-                    embed.add_field(
-                        name="📝 投稿状態",
-                        value="✅ Discord投稿完了",
-                        inline=True
-                    )
-                
-                await message.reply(embed=embed)
-            else:
-                await message.reply(f"❌ コンテンツ制作失敗: {result.get('error', 'Unknown error')}")
+            
+            await job.update_progress("✅ 週次コンテンツ制作完了", embed=embed)
+        else:
+            raise RuntimeError(f"コンテンツ制作失敗: {result.get('error', 'Unknown error')}")
         
-        except Exception as e:
-            await message.reply(f"❌ コマンド実行エラー: {e}")
+        return {'summary_id': result.get('summary_id'), 'discord_posted': result.get('discord_posted', False),
+                'already_completed': result.get('already_completed', False)}
     
     async def _cmd_analytics(self, message, command_parts):
         """アナリティクスコマンド"""
@@ -610,69 +771,109 @@ class EntertainmentBot(discord.Client):
                 await message.reply("❌ 日数は数字で指定してください")
                 return
         
-        await message.reply(f"🎙️ 過去{days}日間のデータからポッドキャストを生成中...")
+        await self._submit_command_job(
+            message, 'podcast', {'days': days}, self._run_podcast_job,
+            f"🎙️ 過去{days}日間のデータからポッドキャストを生成中..."
+        )
+    
+    async def _run_podcast_job(self, job) -> Dict[str, Any]:
+        """ポッドキャスト生成ジョブ"""
+        result = await self.podcast_generator.generate_podcast(
+            days=job.params['days'],
+            save_to_firestore=True,
+            save_to_file=True,
+            generate_audio=True,
+            progress_callback=job.update_progress
+        )
         
-        try:
-            result = await self.podcast_generator.generate_podcast(
-                days=days,
-                save_to_firestore=True,
-                save_to_file=True,
-                generate_audio=True
+        if result['success']:
+            embed = discord.Embed(
+                title="🎙️ ポッドキャスト生成完了",
+                description="高品質な音声コンテンツを生成しました",
+                color=0xff6600
             )
             
-            if result['success']:
-                embed = discord.Embed(
-                    title="🎙️ ポッドキャスト生成完了",
-                    description="高品質な音声コンテンツを生成しました",
-                    color=0xff6600
+            if 'audio_file' in result:
+                embed.add_field(
+                    name="🎵 音声ファイル",
+                    value=f"生成完了: {result['audio_file']}",
+                    inline=False
                 )
-                
-                if 'audio_file' in result:
-                    embed.add_field(
-                        name="🎵 音声ファイル",
-                        value=f"生成完了: {result['audio_file']}",
-                        inline=False
-                    )
-                
-                if 'character_audio_files' in result:
-                    char_files = result['character_audio_files']
-                    embed.add_field(
-                        name="🎭 キャラクター別音声",
-                        value=f"生成ファイル数: {len(char_files)}個",
-                        inline=True
-                    )
-                
-                await message.reply(embed=embed)
-            else:
-                await message.reply(f"❌ ポッドキャスト生成失敗: {result.get('error', 'Unknown error')}")
+            
+            if 'character_audio_files' in result:
+                char_files = result['character_audio_files']
+                embed.add_field(
+                    name="🎭 キャラクター別音声",
+                    value=f"生成ファイル数: {len(char_files)}個",
+                    inline=True
+                )
+            
+            await job.update_progress("🎙️ ポッドキャスト生成完了", embed=embed)
+        else:
+            raise RuntimeError(f"ポッドキャスト生成失敗: {result.get('error', 'Unknown error')}")
         
-        except Exception as e:
-            await message.reply(f"❌ ポッドキャスト生成エラー: {e}")
+        return {'firestore_id': result.get('firestore_id'), 'audio_file': result.get('audio_file')}
     
     async def _cmd_status(self, message):
         """システム状態表示コマンド"""
-        scheduler_status = self.scheduler_manager.scheduler.get_status()
-        
         embed = discord.Embed(
             title="🤖 Bot システム状態",
             description="各機能の動作状況",
             color=0x9932cc
         )
         
-        # スケジューラー状態
-        scheduler_text = "✅ 実行中" if scheduler_status['is_running'] else "⏹️ 停止中"
-        next_run = scheduler_status['next_run'] if scheduler_status['next_run'] else "未設定"
+        # スケジューラー状態（未使用の場合は状態表示のために生成しない）
+        scheduler_manager = self.services.get_if_created('scheduler_manager')
+        if scheduler_manager:
+            scheduler_status = scheduler_manager.scheduler.get_status()
+            scheduler_text = "✅ 実行中" if scheduler_status['is_running'] else "⏹️ 停止中"
+            next_run = scheduler_status['next_run'] if scheduler_status['next_run'] else "未設定"
+            scheduler_value = f"""
+状態: {scheduler_text}
+設定: {scheduler_status['schedule_text']}
+次回実行: {next_run}
+            """
+        else:
+            scheduler_value = "⏹️ 未初期化（`!scheduler start` で開始）"
         
         embed.add_field(
             name="📅 スケジューラー",
+            value=scheduler_value,
+            inline=False
+        )
+        
+        # シャード状態
+        shard_lines = []
+        for shard in self.shard_status():
+            latency = f"{shard['latency_seconds'] * 1000:.0f}ms" if shard['latency_seconds'] is not None else "-"
+            shard_lines.append(f"#{shard['shard_id']}: {shard['status']} {latency} {shard['guilds']}サーバー")
+        embed.add_field(
+            name=f"🧩 シャード（全{self.shard_count}）",
+            value="\n".join(shard_lines)[:1024] or "なし",
+            inline=False
+        )
+        
+        # ジョブキュー状態
+        job_status = self.job_queue.get_status()
+        embed.add_field(
+            name="🧵 ジョブキュー",
             value=f"""
-状態: {scheduler_text}
-設定: 毎週{scheduler_status['schedule_day']} {scheduler_status['schedule_time']}
-次回実行: {next_run}
+実行中: {', '.join(job_status['running']) or 'なし'}
+待機中: {len(job_status['queued'])}件
+ワーカー数: {job_status['max_workers']}
             """,
             inline=False
         )
         
+        # 初期化済みサービス
+        service_status = self.services.get_status()
+        service_lines = [f"{name}: {seconds:.2f}秒" for name, seconds in service_status['init_seconds'].items()]
+        embed.add_field(
+            name="🧩 初期化済みサービス",
+            value="\n".join(service_lines) or "なし",
+            inline=False
+        )
+        
         # Bot基本情報
         embed.add_field(
             name="🔧 Bot情報",
@@ -785,7 +986,7 @@ class EntertainmentBot(discord.Client):
             await asyncio.to_thread(self._firestore_client.collection('interactions').add, interaction_data)
             
         except Exception as e:
-            print(f"⚠️ メッセージアクティビティログエラー: {e}")
+            logger.warning(f"⚠️ メッセージアクティビティログエラー: {e}")
 
     async def _log_message_edit_activity(self, before, after):
         """メッセージ編集アクティビティをログ記録"""
@@ -814,7 +1015,7 @@ class EntertainmentBot(discord.Client):
             await asyncio.to_thread(self._firestore_client.collection('interactions').add, interaction_data)
             
         except Exception as e:
-            print(f"⚠️ メッセージ編集ログエラー: {e}")
+            logger.warning(f"⚠️ メッセージ編集ログエラー: {e}")
 
     async def _log_message_delete_activity(self, message):
         """メッセージ削除アクティビティをログ記録"""
@@ -842,7 +1043,7 @@ class EntertainmentBot(discord.Client):
             await asyncio.to_thread(self._firestore_client.collection('interactions').add, interaction_data)
             
         except Exception as e:
-            print(f"⚠️ メッセージ削除ログエラー: {e}")
+            logger.warning(f"⚠️ メッセージ削除ログエラー: {e}")
 
     async def _log_reaction_activity(self, reaction, user, reaction_type):
         """リアクションアクティビティをログ記録"""
@@ -870,7 +1071,7 @@ class EntertainmentBot(discord.Client):
             await asyncio.to_thread(self._firestore_client.collection('interactions').add, interaction_data)
             
         except Exception as e:
-            print(f"⚠️ リアクションログエラー: {e}")
+            logger.warning(f"⚠️ リアクションログエラー: {e}")
 
     async def _log_member_activity(self, member, activity_type):
         """メンバーアクティビティをログ記録"""
@@ -895,7 +1096,7 @@ class EntertainmentBot(discord.Client):
             await asyncio.to_thread(self._firestore_client.collection('interactions').add, interaction_data)
             
         except Exception as e:
-            print(f"⚠️ メンバーアクティビティログエラー: {e}")
+            logger.warning(f"⚠️ メンバーアクティビティログエラー: {e}")
 
     async def _log_event_activity(self, event, activity_type, before_event=None):
         """スケジュールイベントアクティビティをログ記録"""
@@ -925,7 +1126,7 @@ class EntertainmentBot(discord.Client):
             await asyncio.to_thread(self._firestore_client.collection('interactions').add, interaction_data)
             
         except Exception as e:
-            print(f"⚠️ イベントアクティビティログエラー: {e}")
+            logger.warning(f"⚠️ イベントアクティビティログエラー: {e}")
 
     async def _log_event_user_activity(self, event, user, activity_type):
         """イベントユーザーアクティビティをログ記録"""
@@ -951,44 +1152,67 @@ class EntertainmentBot(discord.Client):
             await asyncio.to_thread(self._firestore_client.collection('interactions').add, interaction_data)
             
         except Exception as e:
-            print(f"⚠️ イベントユーザーアクティビティログエラー: {e}")
+            logger.warning(f"⚠️ イベントユーザーアクティビティログエラー: {e}")
 
-    async def _update_guild_info(self):
-        """ギルド情報をFirestoreに更新"""
-        try:
-            for guild in self.guilds:
-                guild_data = {
-                    'guildId': str(guild.id),
-                    'name': guild.name,
-                    'memberCount': guild.member_count,
-                    'description': guild.description if guild.description else None,
-                    'icon': str(guild.icon.url) if guild.icon else None,
-                    'ownerID': str(guild.owner_id),
-                    'createdAt': guild.created_at.isoformat(),
-                    'premiumTier': guild.premium_tier,
-                    'premiumSubscriptionCount': guild.premium_subscription_count,
-                    'channels': {
-                        'text': len([ch for ch in guild.channels if str(ch.type) == 'text']),
-                        'voice': len([ch for ch in guild.channels if str(ch.type) == 'voice']),
-                        'category': len([ch for ch in guild.channels if str(ch.type) == 'category']),
-                        'total': len(guild.channels)
-                    },
-                    'roles': len(guild.roles),
-                    'emojis': len(guild.emojis),
-                    'lastUpdated': datetime.datetime.now(datetime.timezone.utc),
-                    'features': list(guild.features) if guild.features else []
-                }
-                
-                # Firestoreのguildsコレクションに保存（ドキュメントIDはguildId）
-                await asyncio.to_thread(
-                    self._firestore_client.collection('guilds').document(str(guild.id)).set,
-                    guild_data
-                )
-                
-                print(f"📊 ギルド情報更新: {guild.name} ({guild.member_count}名)")
-                
-        except Exception as e:
-            print(f"⚠️ ギルド情報更新エラー: {e}")
+    def _guild_info(self, guild) -> Dict[str, Any]:
+        """Firestoreのguildsコレクションに保存するギルド情報"""
+        return {
+            'guildId': str(guild.id),
+            'name': guild.name,
+            'memberCount': guild.member_count,
+            'description': guild.description if guild.description else None,
+            'icon': str(guild.icon.url) if guild.icon else None,
+            'ownerID': str(guild.owner_id),
+            'createdAt': guild.created_at.isoformat(),
+            'premiumTier': guild.premium_tier,
+            'premiumSubscriptionCount': guild.premium_subscription_count,
+            'channels': {
+                'text': len([ch for ch in guild.channels if str(ch.type) == 'text']),
+                'voice': len([ch for ch in guild.channels if str(ch.type) == 'voice']),
+                'category': len([ch for ch in guild.channels if str(ch.type) == 'category']),
+                'total': len(guild.channels)
+            },
+            'roles': len(guild.roles),
+            'emojis': len(guild.emojis),
+            'lastUpdated': datetime.datetime.now(datetime.timezone.utc),
+            'shardId': guild.shard_id,
+            'features': list(guild.features) if guild.features else []
+        }
+    
+    def _write_guild_batch(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        """ギルド情報を1回のバッチで書き込み（to_thread から呼ぶ）"""
+        batch = self._firestore_client.batch()
+        collection = self._firestore_client.collection('guilds')
+        for guild_id, guild_data in entries:
+            # ドキュメントIDはguildId（計測用ラッパーではなく元の参照を WriteBatch に渡す）
+            doc_ref = collection.document(guild_id)
+            batch.set(getattr(doc_ref, 'wrapped', doc_ref), guild_data)
+        with track(FIRESTORE_OPERATIONS, FIRESTORE_DURATION, collection='guilds', op='batch_commit'):
+            batch.commit()
+    
+    async def _update_guild_info(self, guilds: Optional[List[Any]] = None):
+        """ギルド情報をFirestoreに更新
+        
+        ギルドをバッチに分け、上限付きで並行に書き込む（1ギルドずつ順に書き込むとギルド数に比例して遅くなる）
+        """
+        guilds = list(self.guilds if guilds is None else guilds)
+        if not guilds:
+            return
+        # Discordのキャッシュはループ上で読み、ワーカースレッドには書き込むデータだけを渡す
+        entries = [(str(guild.id), self._guild_info(guild)) for guild in guilds]
+        semaphore = asyncio.Semaphore(max(1, GUILD_INFO_CONCURRENCY))
+        
+        async def write(chunk):
+            async with semaphore:
+                await asyncio.to_thread(self._write_guild_batch, chunk)
+        
+        chunks = [entries[i:i + GUILD_INFO_BATCH_SIZE] for i in range(0, len(entries), GUILD_INFO_BATCH_SIZE)]
+        results = await asyncio.gather(*(write(chunk) for chunk in chunks), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            logger.warning(f"⚠️ ギルド情報更新エラー: {error}")
+        updated = sum(len(chunk) for chunk, result in zip(chunks, results) if not isinstance(result, Exception))
+        logger.info(f"📊 ギルド情報更新: {updated}/{len(guilds)}サーバー（{len(chunks)}バッチ）")
     
     def _extract_keywords(self, content: str) -> List[str]:
         """メッセージからキーワードを抽出"""
@@ -1079,12 +1303,12 @@ class EntertainmentBot(discord.Client):
                 await asyncio.to_thread(user_doc_ref.update, user_data)
             
         except Exception as e:
-            print(f"⚠️ ユーザー情報保存エラー: {e}")
+            logger.warning(f"⚠️ ユーザー情報保存エラー: {e}")
     
-    async def _log_bot_action(self, action_type: str, user_id: str, guild_id: str = None, 
-                             payload: Dict[str, Any] = None, target_id: str = None, 
-                             status: str = "pending", result: Dict[str, Any] = None):
-        """Botアクションをログに記録"""
+    def _log_bot_action(self, action_type: str, user_id: str, guild_id: str = None, 
+                        payload: Dict[str, Any] = None, target_id: str = None, 
+                        status: str = "pending", result: Dict[str, Any] = None):
+        """Botアクションをログに記録（書き込みはバックグラウンド、アクションIDをすぐ返す）"""
         try:
             bot_action_data = {
                 'actionType': action_type,
@@ -1099,23 +1323,23 @@ class EntertainmentBot(discord.Client):
                 'version': '1.0.0'
             }
             
-            # Firestoreのbot_actionsコレクションに保存
-            doc_ref = await asyncio.to_thread(
-                self._firestore_client.collection('bot_actions').add, 
-                bot_action_data
-            )
+            # Firestoreのbot_actionsコレクションへの保存はバッファに積むだけ
+            action_id = self.bot_action_writer.record(bot_action_data)
             
-            print(f"📝 Botアクションログ記録: {action_type} (ID: {doc_ref[1].id})")
-            return doc_ref[1].id
+            logger.info(
+                f"📝 Botアクションログ記録: {action_type} (ID: {action_id})",
+                extra={'sample': 'bot_action', 'action_type': action_type}
+            )
+            return action_id
             
         except Exception as e:
-            print(f"⚠️ Botアクションログエラー: {e}")
+            logger.warning(f"⚠️ Botアクションログエラー: {e}")
             return None
     
     async def generate_weekly_advice(self, guild_id: str = None) -> Dict[str, Any]:
         """週次運営アドバイスを生成"""
         try:
-            print("🧠 週次運営アドバイス生成開始...")
+            logger.info("🧠 週次運営アドバイス生成開始...")
             
             # 過去7日間のアクティビティデータを収集
             activities = await self.analytics.collect_weekly_activities(days=7)
@@ -1147,7 +1371,8 @@ class EntertainmentBot(discord.Client):
             
             # Vertex AI (Gemini) でアドバイス生成
             model = GenerativeModel("gemini-1.5-flash")
-            response = model.generate_content(prompt)
+            with track(LLM_REQUESTS, LLM_DURATION, purpose='weekly_advice'):
+                response = await asyncio.to_thread(model.generate_content, prompt)
             advice_content = response.text
             
             # 週の期間を計算
@@ -1176,7 +1401,7 @@ class EntertainmentBot(discord.Client):
                 advice_data
             )
             
-            print(f"✅ 週次アドバイス生成完了: {doc_ref[1].id}")
+            logger.info(f"✅ 週次アドバイス生成完了: {doc_ref[1].id}")
             
             return {
                 'success': True,
@@ -1187,7 +1412,7 @@ class EntertainmentBot(discord.Client):
             }
             
         except Exception as e:
-            print(f"❌ 週次アドバイス生成エラー: {e}")
+            logger.error(f"❌ 週次アドバイス生成エラー: {e}")
             return {
                 'success': False,
                 'error': str(e)
@@ -1243,6 +1468,8 @@ class EntertainmentBot(discord.Client):
                     elif part.startswith('--type=') or part.startswith('-t='):
                         action_type = part.split('=')[1]
             
+            from firebase_admin import firestore
+
             # Firestoreからbotアクション履歴を取得
             query = self._firestore_client.collection('bot_actions') \
                 .order_by('timestamp', direction=firestore.Query.DESCENDING) \
@@ -1327,7 +1554,7 @@ class EntertainmentBot(discord.Client):
             await message.reply(embed=embed)
             
             # アクション記録
-            await self._log_bot_action(
+            self._log_bot_action(
                 'admin_command',
                 str(message.author.id),
                 str(message.guild.id) if message.guild else None,
@@ -1338,7 +1565,7 @@ class EntertainmentBot(discord.Client):
             
         except Exception as e:
             await message.reply(f"❌ Botアクション履歴取得エラー: {e}")
-            print(f"❌ Botアクション履歴コマンドエラー: {e}")
+            logger.error(f"❌ Botアクション履歴コマンドエラー: {e}")
     
     async def _cmd_daily_analytics(self, message):
         """日次アナリティクス生成コマンド"""
@@ -1391,17 +1618,68 @@ class EntertainmentBot(discord.Client):
         
         except Exception as e:
             await message.reply(f"❌ エラー: {e}")
-            print(f"❌ 日次アナリティクスコマンドエラー: {e}")
+            logger.error(f"❌ 日次アナリティクスコマンドエラー: {e}")
+    
+    async def _cmd_profile(self, message, command_parts):
+        """サンプリングプロファイルコマンド（!profile [秒数]）"""
+        try:
+            seconds = float(command_parts[1]) if len(command_parts) > 1 else 30.0
+        except ValueError:
+            await message.reply("❌ 秒数は数値で指定してください")
+            return
+        seconds = min(max(1.0, seconds), PROFILE_MAX_SECONDS)
+        
+        reply = await message.reply(f"🔬 {seconds:.0f}秒間プロファイル中...")
+        profiler = SamplingProfiler(loop_thread_id=threading.get_ident())
+        try:
+            # 採取はワーカースレッドで行い、その間もBotは通常どおり動き続ける
+            result = await asyncio.to_thread(profiler.run, seconds)
+        except ProfilerBusyError:
+            await reply.edit(content="⏳ 別のプロファイルを実行中です")
+            return
+        
+        summary = result.summary(limit=8)
+        embed = discord.Embed(
+            title="🔬 プロファイル結果",
+            description=f"{summary['duration_seconds']}秒・{summary['samples']}サンプル"
+                        f"（待機中 {summary['idle_samples']}件を除外）",
+            color=0x9b59b6
+        )
+        threads = "\n".join(f"{name}: {count}" for name, count in list(summary['threads'].items())[:8])
+        embed.add_field(name="🧵 スレッド", value=threads or "なし", inline=False)
+        functions = "\n".join(f"`{name[:80]}` {count}" for name, count in summary['top_functions'])
+        embed.add_field(name="🔥 サンプルの多い関数", value=functions[:1024] or "なし", inline=False)
+        embed.set_footer(text="添付ファイルは flamegraph.pl / speedscope で表示できます")
+        
+        filename = f"profile_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed"
+        await reply.edit(content=None, embed=embed)
+        await message.channel.send(file=discord.File(io.BytesIO(result.to_collapsed().encode('utf-8')), filename=filename))
+        
+        self._log_bot_action(
+            'admin_command',
+            str(message.author.id),
+            str(message.guild.id) if message.guild else None,
+            {'command': 'profile', 'seconds': seconds},
+            status='completed',
+            result={key: summary[key] for key in ('duration_seconds', 'samples', 'idle_samples')}
+        )
     
     async def shutdown(self):
         """Bot終了処理"""
-        print("🛑 Bot終了処理を開始...")
+        logger.info("🛑 Bot終了処理を開始...")
         
         # スケジューラー停止
-        if self.scheduler_manager.scheduler.is_running:
-            self.scheduler_manager.scheduler.stop_scheduler()
+        scheduler_manager = self.services.get_if_created('scheduler_manager')
+        if scheduler_manager and scheduler_manager.scheduler.is_running:
+            await scheduler_manager.scheduler.stop_scheduler()
+        
+        # バックグラウンドジョブ停止
+        await self.job_queue.shutdown()
+        
+        # 書き込み待ちのBotアクション記録を保存
+        await self.bot_action_writer.close()
         
-        print("✅ Bot終了処理完了")
+        logger.info("✅ Bot終了処理完了")
         await self.close()
 
 
@@ -1418,6 +1696,7 @@ async def create_entertainment_bot(firestore_client) -> EntertainmentBot:
     intents.presences = True
     
     # Bot作成
-    bot = EntertainmentBot(firestore_client, intents=intents)
+    # シャード設定（DISCORD_SHARD_COUNT / DISCORD_SHARD_IDS、未設定ならDiscordの推奨シャード数）
+    bot = EntertainmentBot(firestore_client, intents=intents, **shard_options())
     
     return bot
\ No newline at end of file
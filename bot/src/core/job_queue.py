@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+job_queue.py
+Discordエンタメコンテンツ制作アプリ - バックグラウンドジョブキュー
+
+!podcast や !summary のような時間のかかる処理をメッセージハンドラから切り離して実行
+- asyncio.Queue と上限付きワーカーで実行
+- ジョブの状態をFirestoreの bot_jobs コレクションに記録
+- 同じ種類・同じ引数のジョブが実行中なら新しく作らず既存ジョブに相乗り
+- 進捗はリスナー（返信メッセージの編集など）に通知
+"""
+
+import logging
+import asyncio
+import datetime
+import json
+import uuid
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Tuple
+
+from utils.structured_logging import correlation_scope, get_correlation_id
+
+logger = logging.getLogger(__name__)
+
+# ジョブの状態
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+# 進捗リスナー: await listener(text, **extra)
+ProgressListener = Callable[..., Awaitable[Any]]
+# ジョブ本体: await handler(job) -> 結果
+JobHandler = Callable[['Job'], Awaitable[Dict[str, Any]]]
+
+
+class Job:
+    """キューに積まれたジョブ"""
+
+    def __init__(self, kind: str, params: Dict[str, Any], handler: JobHandler, requested_by: Optional[str] = None,
+                 dedupe_key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.dedupe_key = dedupe_key or make_dedupe_key(kind, params)
+        self.handler = handler
+        self.requested_by = requested_by
+        # 投入元（コマンドなど）の相関IDを引き継ぐ
+        self.correlation_id = get_correlation_id() or f"job-{self.id[:12]}"
+        self.status = JOB_QUEUED
+        self.progress = None
+        self.error = None
+        self.result = None
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.started_at = None
+        self.finished_at = None
+        self.listeners: List[ProgressListener] = []
+        self.done = asyncio.get_running_loop().create_future()
+        self._owner: Optional['JobQueue'] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    def add_listener(self, listener: Optional[ProgressListener]):
+        """進捗リスナーを追加"""
+        if listener:
+            self.listeners.append(listener)
+
+    async def update_progress(self, text: str, **extra):
+        """進捗を全リスナーに通知し、Firestoreに記録"""
+        self.progress = text
+        for listener in list(self.listeners):
+            try:
+                await listener(text, **extra)
+            except Exception as e:
+                # 返信メッセージが削除された等でジョブ自体は止めない
+                logger.warning(f"⚠️ ジョブ進捗通知エラー ({self.kind}/{self.id}): {e}")
+        if self._owner:
+            await self._owner._persist(self, {'progress': text})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Firestore保存用の辞書に変換"""
+        return {
+            'jobId': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'dedupeKey': self.dedupe_key,
+            'status': self.status,
+            'requestedBy': self.requested_by,
+            'correlationId': self.correlation_id,
+            'progress': self.progress,
+            'error': self.error,
+            'createdAt': self.created_at,
+            'startedAt': self.started_at,
+            'finishedAt': self.finished_at,
+        }
+
+
+def make_dedupe_key(kind: str, params: Dict[str, Any]) -> str:
+    """ジョブの種類と引数から重複判定用のキーを作成"""
+    return f"{kind}:{json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)}"
+
+
+class JobQueue:
+    """上限付きワーカーでジョブを順に実行するキュー"""
+
+    def __init__(self, firestore_client=None, max_workers: int = 2, collection: str = 'bot_jobs', history_size: int = 50):
+        self.db = firestore_client
+        self.max_workers = max(1, max_workers)
+        self.collection = collection
+        self.history_size = history_size
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._active: Dict[str, Job] = {}  # dedupe_key -> 実行中/待機中のジョブ
+        self._history: List[Job] = []  # 完了したジョブ（新しい順）
+
+    def _ensure_workers(self):
+        """ワーカーを起動（イベントループ上で初回のみ）"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.max_workers:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def submit(self, kind: str, params: Dict[str, Any], handler: JobHandler,
+                     listener: Optional[ProgressListener] = None,
+                     requested_by: Optional[str] = None,
+                     dedupe_key: Optional[str] = None) -> Tuple[Job, bool]:
+        """ジョブを投入
+
+        同じ種類・引数のジョブが待機中または実行中の場合は新しく作らず、
+        既存ジョブにリスナーを追加して (既存ジョブ, False) を返す。
+        dedupe_key を指定した場合は引数の代わりにそのキーで重複を判定する。
+        """
+        self._ensure_workers()
+
+        dedupe_key = dedupe_key or make_dedupe_key(kind, params)
+        existing = self._active.get(dedupe_key)
+        if existing and existing.is_active:
+            existing.add_listener(listener)
+            logger.info(f"🔁 実行中のジョブに相乗り: {kind} ({existing.id})")
+            return existing, False
+
+        job = Job(kind, params, handler, requested_by, dedupe_key)
+        job._owner = self
+        job.add_listener(listener)
+        self._active[dedupe_key] = job
+
+        await self._persist(job, job.to_dict())
+        await self._queue.put(job)
+        logger.info(f"📥 ジョブ投入: {kind} ({job.id}) 待機数: {self._queue.qsize()}")
+        return job, True
+
+    async def _worker(self):
+        """キューからジョブを取り出して実行"""
+        while True:
+            job = await self._queue.get()
+            try:
+                with correlation_scope(job.correlation_id):
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        """ジョブを1件実行"""
+        job.status = JOB_RUNNING
+        job.started_at = datetime.datetime.now(datetime.timezone.utc)
+        await self._persist(job, {'status': job.status, 'startedAt': job.started_at})
+        logger.info(f"▶️ ジョブ開始: {job.kind} ({job.id})")
+
+        try:
+            job.result = await job.handler(job)
+            job.status = JOB_SUCCEEDED
+        except asyncio.CancelledError:
+            job.status = JOB_FAILED
+            job.error = 'cancelled'
+            raise
+        except Exception as e:
+            job.status = JOB_FAILED
+            job.error = str(e)
+            logger.error(f"❌ ジョブ実行エラー: {job.kind} ({job.id}): {e}")
+            await job.update_progress(f"❌ ジョブ実行エラー: {e}")
+        finally:
+            job.finished_at = datetime.datetime.now(datetime.timezone.utc)
+            if self._active.get(job.dedupe_key) is job:
+                del self._active[job.dedupe_key]
+            self._history.insert(0, job)
+            del self._history[self.history_size:]
+            if not job.done.done():
+                job.done.set_result(job)
+            await self._persist(job, {
+                'status': job.status,
+                'error': job.error,
+                'finishedAt': job.finished_at,
+                'durationSeconds': (job.finished_at - job.started_at).total_seconds()
+            })
+
+        log = logger.info if job.status == JOB_SUCCEEDED else logger.warning
+        log(f"{'✅' if job.status == JOB_SUCCEEDED else '❌'} ジョブ終了: {job.kind} ({job.id}) {job.status}")
+
+    async def _persist(self, job: Job, fields: Dict[str, Any]):
+        """ジョブの状態をFirestoreに記録"""
+        if not self.db:
+            return
+        try:
+            doc_ref = self.db.collection(self.collection).document(job.id)
+            await asyncio.to_thread(doc_ref.set, fields, merge=True)
+        except Exception as e:
+            logger.warning(f"⚠️ ジョブ状態保存エラー ({job.id}): {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """キューの状態を取得"""
+        active = list(self._active.values())
+        return {
+            'max_workers': self.max_workers,
+            'running': [job.kind for job in active if job.status == JOB_RUNNING],
+            'queued': [job.kind for job in active if job.status == JOB_QUEUED],
+            'recent': [
+                {'id': job.id, 'kind': job.kind, 'status': job.status, 'error': job.error}
+                for job in self._history[:5]
+            ]
+        }
+
+    async def shutdown(self):
+        """ワーカーを停止"""
+        for task in self._workers:
+            task.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+lease.py
+Discordエンタメコンテンツ制作アプリ - 分散リース（リーダー選出）
+
+複数インスタンス（Cloud Runのスケールアウトや、みやにゃん・イヴにゃん両Bot）が
+同じ定期ジョブを重複実行しないよう、実行前にリースを取得する
+- 有効期限（TTL）付きで、保持中は定期的に延長する
+- 取得のたびに単調増加するフェンシングトークンを発行（古い保持者の書き込みを判別できる）
+- 保持中のリースは contextvars でジョブの処理に引き継ぎ、書き込みの直前に ensure_lease() で
+  トークンがまだ有効か確認する（延長に失敗した場合はジョブのタスクを中断する）
+- 実行枠（スケジュール上の実行時刻）を完了として記録し、ジッターで遅れて起動した
+  他のインスタンスが同じ回を再実行しないようにする
+- Firestore（scheduler_leases コレクション）とテスト用のメモリ上の実装
+"""
+
+import logging
+import os
+import uuid
+import socket
+import asyncio
+import datetime
+import contextlib
+import contextvars
+from typing import Optional, Dict, Any, Callable, Awaitable, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# リースの有効期限（秒）
+LEASE_TTL_SECONDS = float(os.getenv('SCHEDULER_LEASE_TTL_SECONDS', '120'))
+
+# 実行中のジョブが保持しているリース（LeaseManager, Lease）
+_current_lease: contextvars.ContextVar = contextvars.ContextVar('current_lease', default=None)
+
+
+class LeaseLostError(RuntimeError):
+    """リースを失った（他のインスタンスが取得した可能性がある）"""
+
+
+class LeaseBusyError(RuntimeError):
+    """他の実行がリースを保持している"""
+
+
+def default_holder_id() -> str:
+    """このインスタンスを識別するID（ホスト名 + プロセスID + ランダム文字列）"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class Lease:
+    """取得済みのリース"""
+
+    def __init__(self, name: str, holder: str, token: int, expires_at: datetime.datetime,
+                 slot: Optional[str] = None):
+        self.name = name
+        self.holder = holder
+        # フェンシングトークン（取得のたびに増加）
+        self.token = token
+        self.expires_at = expires_at
+        # 実行枠（スケジュール上の実行時刻など）
+        self.slot = slot
+        # 延長に失敗した（他のインスタンスに奪われた可能性がある）
+        self.lost = False
+        # 実行枠の処理が完了した（解放時に記録する）
+        self.completed = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'token': self.token,
+            'expires_at': self.expires_at.isoformat(),
+            'slot': self.slot,
+            'lost': self.lost
+        }
+
+
+def _try_acquire(current: Optional[Dict[str, Any]], holder: str, now: datetime.datetime,
+                 ttl_seconds: float, slot: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """現在の記録から取得後の記録を計算（取得できない場合はNone）"""
+    current = current or {}
+    expires_at = current.get('expiresAt')
+    if current.get('holder') not in (None, holder) and expires_at and expires_at > now:
+        return None
+    # 同じ実行枠は他のインスタンスが完了済み
+    if slot is not None and current.get('completedSlot') == slot:
+        return None
+    return {
+        'holder': holder,
+        'token': int(current.get('token', 0)) + 1,
+        'acquiredAt': now,
+        'expiresAt': now + datetime.timedelta(seconds=ttl_seconds)
+    }
+
+
+def _is_current(current: Optional[Dict[str, Any]], lease: Lease) -> bool:
+    """記録がまだこのリースのものか（トークンで判定）"""
+    return bool(current) and current.get('holder') == lease.holder and current.get('token') == lease.token
+
+
+def _released(lease: Lease, now: datetime.datetime) -> Dict[str, Any]:
+    """解放時の更新内容（トークンを単調増加させるため記録は残し、期限だけ切る）"""
+    record: Dict[str, Any] = {'expiresAt': now}
+    if lease.completed and lease.slot is not None:
+        record['completedSlot'] = lease.slot
+    return record
+
+
+def _is_valid(current: Optional[Dict[str, Any]], lease: Lease, now: datetime.datetime) -> bool:
+    """このリースのトークンがまだ有効か（記録が同じトークンで期限内）"""
+    return _is_current(current, lease) and current.get('expiresAt') is not None and current['expiresAt'] > now
+
+
+class InMemoryLeaseBackend:
+    """メモリ上のリース（テスト・単一プロセス用）"""
+
+    def __init__(self, clock: Callable[[], datetime.datetime] = _utcnow):
+        self.clock = clock
+        self.records: Dict[str, Dict[str, Any]] = {}
+
+    async def acquire(self, name: str, holder: str, ttl_seconds: float,
+                      slot: Optional[str] = None) -> Optional[Lease]:
+        current = self.records.get(name)
+        record = _try_acquire(current, holder, self.clock(), ttl_seconds, slot)
+        if record is None:
+            return None
+        self.records[name] = {**(current or {}), **record}
+        return Lease(name, holder, record['token'], record['expiresAt'], slot)
+
+    async def renew(self, lease: Lease, ttl_seconds: float) -> bool:
+        current = self.records.get(lease.name)
+        if not _is_current(current, lease):
+            return False
+        current['expiresAt'] = self.clock() + datetime.timedelta(seconds=ttl_seconds)
+        lease.expires_at = current['expiresAt']
+        return True
+
+    async def check(self, lease: Lease) -> bool:
+        return _is_valid(self.records.get(lease.name), lease, self.clock())
+
+    async def release(self, lease: Lease):
+        current = self.records.get(lease.name)
+        if _is_current(current, lease):
+            current.update(_released(lease, self.clock()))
+
+
+class FirestoreLeaseBackend:
+    """Firestoreのトランザクションによるリース"""
+
+    def __init__(self, firestore_client, collection: str = 'scheduler_leases'):
+        self.db = firestore_client
+        self.collection = collection
+
+    def _doc(self, name: str):
+        return self.db.collection(self.collection).document(name)
+
+    def _run_transaction(self, name: str, update: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]):
+        """ドキュメントを読み、update の戻り値があれば書き込む（戻り値をそのまま返す）"""
+        from firebase_admin import firestore
+
+        ref = self._doc(name)
+
+        @firestore.transactional
+        def run(transaction):
+            snapshot = ref.get(transaction=transaction)
+            record = update(snapshot.to_dict() if snapshot.exists else None)
+            if record is not None:
+                transaction.set(ref, record, merge=True)
+            return record
+
+        return run(self.db.transaction())
+
+    async def acquire(self, name: str, holder: str, ttl_seconds: float,
+                      slot: Optional[str] = None) -> Optional[Lease]:
+        record = await asyncio.to_thread(
+            self._run_transaction, name,
+            lambda current: _try_acquire(current, holder, _utcnow(), ttl_seconds, slot)
+        )
+        if record is None:
+            return None
+        return Lease(name, holder, record['token'], record['expiresAt'], slot)
+
+    async def renew(self, lease: Lease, ttl_seconds: float) -> bool:
+        def update(current):
+            if not _is_current(current, lease):
+                return None
+            return {'expiresAt': _utcnow() + datetime.timedelta(seconds=ttl_seconds)}
+
+        record = await asyncio.to_thread(self._run_transaction, lease.name, update)
+        if record is None:
+            return False
+        lease.expires_at = record['expiresAt']
+        return True
+
+    def _check_sync(self, lease: Lease) -> bool:
+        from firebase_admin import firestore
+
+        ref = self._doc(lease.name)
+
+        @firestore.transactional
+        def run(transaction):
+            snapshot = ref.get(transaction=transaction)
+            return _is_valid(snapshot.to_dict() if snapshot.exists else None, lease, _utcnow())
+
+        return run(self.db.transaction())
+
+    async def check(self, lease: Lease) -> bool:
+        return await asyncio.to_thread(self._check_sync, lease)
+
+    async def release(self, lease: Lease):
+        await asyncio.to_thread(
+            self._run_transaction, lease.name,
+            lambda current: _released(lease, _utcnow()) if _is_current(current, lease) else None
+        )
+
+
+class LeaseManager:
+    """リースの取得・自動延長・解放"""
+
+    def __init__(self, backend, holder_id: Optional[str] = None, ttl_seconds: float = LEASE_TTL_SECONDS):
+        self.backend = backend
+        self.holder_id = holder_id or default_holder_id()
+        self.ttl_seconds = ttl_seconds
+        # 期限の1/3ごとに延長
+        self.renew_interval = ttl_seconds / 3
+
+    async def _keep_alive(self, lease: Lease, holder_task: Optional[asyncio.Task] = None):
+        """保持中はリースを延長し続ける（失った場合は保持中の処理を中断）"""
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            try:
+                renewed = await self.backend.renew(lease, self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ リース延長エラー ({lease.name}): {e}")
+                renewed = False
+            if not renewed:
+                lease.lost = True
+                logger.warning(f"⚠️ リース '{lease.name}' を失いました（トークン {lease.token}）")
+                if holder_task is not None:
+                    holder_task.cancel()
+                return
+
+    async def verify(self, lease: Lease):
+        """リースのトークンがまだ有効か確認（失っていれば LeaseLostError）"""
+        if not lease.lost and not await self.backend.check(lease):
+            lease.lost = True
+        if lease.lost:
+            raise LeaseLostError(f"リース '{lease.name}' を失いました（トークン {lease.token}）")
+
+    @contextlib.asynccontextmanager
+    async def hold(self, name: str, slot: Optional[str] = None,
+                   holder: Optional[str] = None) -> AsyncIterator[Optional[Lease]]:
+        """リースを保持して処理を実行（取得できなかった場合は None）
+
+        slot を指定した場合、処理側で lease.completed = True にすると
+        その実行枠は完了済みとして記録され、以降は他のインスタンスも取得できない。
+        延長に失敗してリースを失うと、このブロックを実行しているタスクをキャンセルする。
+        holder を省略するとこのインスタンスのIDで取得する（同じIDの保持中リースは引き継げる）
+        """
+        try:
+            lease = await self.backend.acquire(name, holder or self.holder_id, self.ttl_seconds, slot)
+        except Exception as e:
+            logger.warning(f"⚠️ リース取得エラー ({name}): {e}")
+            lease = None
+
+        if lease is None:
+            yield None
+            return
+
+        keeper = asyncio.create_task(self._keep_alive(lease, asyncio.current_task()))
+        token = _current_lease.set((self, lease))
+        try:
+            yield lease
+        finally:
+            _current_lease.reset(token)
+            keeper.cancel()
+            await asyncio.gather(keeper, return_exceptions=True)
+            if not lease.lost:
+                try:
+                    await self.backend.release(lease)
+                except Exception as e:
+                    logger.warning(f"⚠️ リース解放エラー ({name}): {e}")
+
+    async def run_exclusive(self, name: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """リースを保持して func を実行（手動実行など、定期実行と同じ処理を重複させない場合）
+
+        同じインスタンスの定期実行とも重ならないよう実行ごとに別の保持者として取得する。
+        保持中の実行があれば LeaseBusyError、実行中にリースを失えば LeaseLostError
+        """
+        holder = f"{self.holder_id}-{uuid.uuid4().hex[:6]}"
+        async with self.hold(name, holder=holder) as lease:
+            if lease is None:
+                raise LeaseBusyError(f"'{name}' は他の実行がリースを保持しています")
+            try:
+                return await func()
+            except asyncio.CancelledError:
+                if not lease.lost:
+                    raise
+                # リースを失ったため hold が中断した（呼び出し元のタスクは止めない）
+                task = asyncio.current_task()
+                if hasattr(task, 'uncancel'):
+                    task.uncancel()
+                raise LeaseLostError(f"リース '{name}' を失ったため中断しました（トークン {lease.token}）")
+
+
+def current_lease() -> Optional[Lease]:
+    """実行中のジョブが保持しているリース（リースなしで実行中ならNone）"""
+    held = _current_lease.get()
+    return held[1] if held else None
+
+
+async def ensure_lease():
+    """書き込みの直前に呼び、保持中のリースを失っていれば LeaseLostError で中断する
+
+    リースなしで実行中（手動実行など）の場合は何もしない
+    """
+    held = _current_lease.get()
+    if held is not None:
+        manager, lease = held
+        await manager.verify(lease)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+maintenance.py
+Discordエンタメコンテンツ制作アプリ - 集計データのコンパクション
+
+定期実行でFirestoreの集計・運用データを整理する
+- 日次アナリティクス（analytics_sessions）の同じ日付の重複を最新の1件にまとめる
+- 完了済みのチェックポイント・ジョブ記録を保持期間経過後に削除
+"""
+
+import logging
+import os
+import asyncio
+import datetime
+from typing import Dict, Any, List
+
+from .lease import ensure_lease
+
+logger = logging.getLogger(__name__)
+
+# 1回のバッチで削除する最大件数（Firestoreの上限は500）
+DELETE_BATCH_SIZE = 400
+
+# 運用データの保持日数
+OPERATIONAL_RECORD_RETENTION_DAYS = int(os.getenv('OPERATIONAL_RECORD_RETENTION_DAYS', '30'))
+
+# 重複をまとめる日次アナリティクスの対象期間（日）
+ROLLUP_COMPACTION_LOOKBACK_DAYS = int(os.getenv('ROLLUP_COMPACTION_LOOKBACK_DAYS', '14'))
+
+# 保持期間経過後に削除するコレクションと日時フィールド
+_EXPIRING_COLLECTIONS = {
+    'content_checkpoints': 'updatedAt',
+    'bot_jobs': 'finishedAt'
+}
+
+
+class RollupCompactor:
+    """集計データのコンパクション"""
+
+    def __init__(self, firestore_client,
+                 retention_days: int = OPERATIONAL_RECORD_RETENTION_DAYS,
+                 lookback_days: int = ROLLUP_COMPACTION_LOOKBACK_DAYS):
+        self.db = firestore_client
+        self.retention_days = retention_days
+        self.lookback_days = lookback_days
+
+    def _commit_delete_batch(self, refs: List[Any]):
+        batch = self.db.batch()
+        for ref in refs:
+            batch.delete(ref)
+        batch.commit()
+
+    async def _delete_refs(self, refs: List[Any]) -> int:
+        """ドキュメントをバッチ削除（コミットのたびにリースがまだ有効か確認）"""
+        for start in range(0, len(refs), DELETE_BATCH_SIZE):
+            await ensure_lease()
+            await asyncio.to_thread(self._commit_delete_batch, refs[start:start + DELETE_BATCH_SIZE])
+        return len(refs)
+
+    def _find_duplicate_rollups_sync(self) -> List[Any]:
+        """同じ日付の日次集計のうち、最新以外のドキュメント"""
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=self.lookback_days)
+        docs = (self.db.collection('analytics_sessions')
+                .where('timestamp', '>=', cutoff)
+                .get())
+
+        # 日付ごとに最新の集計だけを残す
+        latest: Dict[str, Any] = {}
+        duplicates = []
+        for doc in docs:
+            data = doc.to_dict() or {}
+            date = data.get('date')
+            if not date:
+                continue
+            current = latest.get(date)
+            if current is None:
+                latest[date] = doc
+            elif data.get('timestamp') > (current.to_dict() or {}).get('timestamp'):
+                duplicates.append(current.reference)
+                latest[date] = doc
+            else:
+                duplicates.append(doc.reference)
+
+        return duplicates
+
+    def _find_expired_sync(self, collection: str, field: str) -> List[Any]:
+        """保持期間を過ぎたドキュメント"""
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=self.retention_days)
+        docs = (self.db.collection(collection)
+                .where(field, '<', cutoff)
+                .get())
+        return [doc.reference for doc in docs]
+
+    async def run(self) -> Dict[str, Any]:
+        """コンパクションを実行"""
+        logger.info("🧹 集計データのコンパクションを開始...")
+        duplicates = await asyncio.to_thread(self._find_duplicate_rollups_sync)
+        result = {
+            'success': True,
+            'compacted_daily_rollups': await self._delete_refs(duplicates),
+            'pruned': {}
+        }
+        for collection, field in _EXPIRING_COLLECTIONS.items():
+            expired = await asyncio.to_thread(self._find_expired_sync, collection, field)
+            result['pruned'][collection] = await self._delete_refs(expired)
+
+        logger.info(f"✅ コンパクション完了: 重複した日次集計 {result['compacted_daily_rollups']}件, "
+                    f"期限切れ記録 {sum(result['pruned'].values())}件を削除")
+        return result
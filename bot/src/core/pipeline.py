@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pipeline.py
+Discordエンタメコンテンツ制作アプリ - ステージ並列実行パイプライン
+
+依存関係を持つ非同期ステージを、依存が満たされたものから並行して実行する
+- 依存のないステージ同士（TTSとテキストアップロードなど）は同時に進む
+- ステージごとの開始時刻・所要時間・状態を記録
+- 失敗したステージに依存するステージはスキップ
+- トレースの実行中は各ステージを子スパン（stage.<名前>）として記録
+"""
+
+import logging
+import asyncio
+import time
+from typing import Dict, Any, List, Callable, Awaitable, Iterable, Optional
+
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# ステージの状態
+STAGE_SUCCEEDED = 'succeeded'
+STAGE_FAILED = 'failed'
+STAGE_SKIPPED = 'skipped'
+
+# ステージ本体: await func(results) -> 結果（results は依存ステージの結果を含む辞書）
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class Stage:
+    """パイプラインの1ステージ"""
+
+    def __init__(self, name: str, func: StageFunc, depends_on: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+
+
+class PipelineRun:
+    """パイプライン実行結果"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, str] = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self.total_seconds = 0.0
+
+    @property
+    def success(self) -> bool:
+        return not self.errors
+
+    def status(self, stage_name: str) -> Optional[str]:
+        """ステージの状態を取得"""
+        timing = self.timings.get(stage_name)
+        return timing['status'] if timing else None
+
+    def slowest_stage(self) -> Optional[str]:
+        """最も時間のかかったステージ名"""
+        if not self.timings:
+            return None
+        return max(self.timings, key=lambda name: self.timings[name]['duration_seconds'])
+
+    def timing_summary(self) -> Dict[str, Any]:
+        """Firestore保存用のタイミング情報"""
+        return {
+            'total_seconds': round(self.total_seconds, 3),
+            'slowest_stage': self.slowest_stage(),
+            'stages': self.timings
+        }
+
+
+class Pipeline:
+    """依存関係に従ってステージを並行実行するパイプライン"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: List[Stage] = []
+        self._names = set()
+
+    def add_stage(self, name: str, func: StageFunc, depends_on: Iterable[str] = ()) -> 'Pipeline':
+        """ステージを追加（依存先は追加済みのステージのみ指定可能）"""
+        depends_on = list(depends_on)
+        if name in self._names:
+            raise ValueError(f"ステージ名が重複しています: {name}")
+        unknown = [dep for dep in depends_on if dep not in self._names]
+        if unknown:
+            raise ValueError(f"未定義の依存ステージ: {', '.join(unknown)}")
+        self.stages.append(Stage(name, func, depends_on))
+        self._names.add(name)
+        return self
+
+    async def run(self) -> PipelineRun:
+        """全ステージを実行"""
+        run = PipelineRun(self.name)
+        started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        for stage in self.stages:
+            dependencies = [tasks[dep] for dep in stage.depends_on]
+            tasks[stage.name] = asyncio.create_task(self._run_stage(stage, dependencies, run, started))
+
+        await asyncio.gather(*tasks.values())
+        run.total_seconds = time.perf_counter() - started
+
+        logger.info(f"⏱️ パイプライン '{self.name}' 完了: {run.total_seconds:.2f}秒")
+        for name, timing in run.timings.items():
+            logger.info(f"   - {name}: {timing['duration_seconds']:.2f}秒 "
+                        f"(開始 +{timing['started_at_offset']:.2f}秒, {timing['status']})")
+        return run
+
+    async def _run_stage(self, stage: Stage, dependencies: List[asyncio.Task], run: PipelineRun, pipeline_started: float):
+        """依存ステージの完了を待ってから1ステージを実行"""
+        if dependencies:
+            await asyncio.gather(*dependencies)
+
+        stage_started = time.perf_counter()
+        failed_deps = [dep for dep in stage.depends_on if run.status(dep) != STAGE_SUCCEEDED]
+
+        if failed_deps:
+            status = STAGE_SKIPPED
+        else:
+            try:
+                with tracer.child_span(f"stage.{stage.name}"):
+                    run.results[stage.name] = await stage.func(run.results)
+                status = STAGE_SUCCEEDED
+            except Exception as e:
+                status = STAGE_FAILED
+                run.errors[stage.name] = str(e)
+                logger.error(f"❌ ステージ '{stage.name}' 失敗: {e}")
+
+        run.timings[stage.name] = {
+            'status': status,
+            'started_at_offset': round(stage_started - pipeline_started, 3),
+            'duration_seconds': round(time.perf_counter() - stage_started, 3)
+        }
@@ -8,6 +8,7 @@ Discord にゃんこエージェント - ポッドキャスト生成スクリプ
 登場人物：みやにゃん、イヴにゃん（２匹の猫のキャラクター）
 """
 
+import logging
 import os
 import json
 import datetime
@@ -17,21 +18,40 @@ from firebase_admin import credentials, firestore
 from dotenv import load_dotenv
 from collections import Counter
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, Callable, Awaitable
 from google.cloud import texttospeech
 from google.oauth2 import service_account
 import tempfile
 import io
+from dataclasses import replace
+from functools import lru_cache
+from utils.ssml import split_ssml, split_plain_text
+from utils.tts_text import get_text_normalizer, NYA_PATTERN
+from utils.metrics import TTS_REQUESTS, TTS_DURATION, TTS_AUDIO_BYTES, track
+from .podcast_script import Utterance, NARRATOR, parse_script, render_script_text
+from .activity_snapshot import ActivitySnapshot, get_activity_snapshot
+
+logger = logging.getLogger(__name__)
 
 # .envファイルから環境変数を読み込み
 load_dotenv()
 
+# SSML生成用に文末で分割（区切り文字も要素として残す）
+_SENTENCE_SPLIT_PATTERN = re.compile(r'([。！？])')
+
 class PodcastGenerator:
     """ポッドキャスト生成クラス"""
     
-    def __init__(self):
-        self.db = None
-        self.initialize_firebase()
+    def __init__(self, firestore_client=None):
+        # Firestoreクライアントが渡された場合は再初期化しない
+        self.db = firestore_client
+        if self.db is None:
+            self.initialize_firebase()
+        
+        # Text-to-Speechクライアント（初回利用時に生成）
+        self.tts_client = None
+        # 分割したチャンクの同時合成数
+        self.tts_max_concurrency = int(os.getenv('TTS_MAX_CONCURRENCY', '4'))
         
         # キャラクター設定（改善版）
         self.characters = {
@@ -78,6 +98,14 @@ class PodcastGenerator:
                 }
             }
         }
+        
+        # 発話単位の感情検出・SSML生成をメモ化（キャラクター設定は固定のため結果は引数だけで決まる）
+        # 統合音声とキャラクター別音声で同じセリフを処理しても計算は1度だけ
+        cache_size = int(os.getenv('PODCAST_RENDER_CACHE_SIZE', '1024'))
+        self.detect_emotion_from_content = lru_cache(maxsize=cache_size)(self.detect_emotion_from_content)
+        self.create_ssml_content = lru_cache(maxsize=cache_size)(self.create_ssml_content)
+        self._create_utterance = lru_cache(maxsize=cache_size)(self._create_utterance)
+        self._render_utterance_ssml = lru_cache(maxsize=cache_size)(self._render_utterance_ssml)
     
     def initialize_firebase(self):
         """Firebase Firestoreを初期化"""
@@ -88,10 +116,10 @@ class PodcastGenerator:
                                    './nyanco-bot-firebase-adminsdk-fbsvc-d65403c7ca.json')
                 
                 if os.path.exists(key_path):
-                    print(f"🔑 Firebaseサービスアカウントキーファイルを読み込み中: {key_path}")
+                    logger.info(f"🔑 Firebaseサービスアカウントキーファイルを読み込み中: {key_path}")
                     cred = credentials.Certificate(key_path)
                 elif os.getenv('FIREBASE_SERVICE_ACCOUNT'):
-                    print("🔑 環境変数からFirebaseサービスアカウント情報を読み込み中...")
+                    logger.info("🔑 環境変数からFirebaseサービスアカウント情報を読み込み中...")
                     service_account_info = json.loads(os.getenv('FIREBASE_SERVICE_ACCOUNT'))
                     cred = credentials.Certificate(service_account_info)
                 else:
@@ -100,11 +128,11 @@ class PodcastGenerator:
                 firebase_admin.initialize_app(cred)
             
             self.db = firestore.client()
-            print("✅ Firebase Firestoreへの接続準備ができました。")
+            logger.info("✅ Firebase Firestoreへの接続準備ができました。")
             return True
             
         except Exception as e:
-            print(f"❌ Firebase Firestoreの初期化に失敗しました: {e}")
+            logger.error(f"❌ Firebase Firestoreの初期化に失敗しました: {e}")
             return False
     
     async def get_recent_interactions(self, days: int = 7, limit: int = 100) -> List[Dict]:
@@ -130,11 +158,11 @@ class PodcastGenerator:
                 data['id'] = doc.id
                 interactions.append(data)
             
-            print(f"📊 最近{days}日間のインタラクション: {len(interactions)}件取得")
+            logger.info(f"📊 最近{days}日間のインタラクション: {len(interactions)}件取得")
             return interactions
             
         except Exception as e:
-            print(f"❌ インタラクションデータ取得エラー: {e}")
+            logger.error(f"❌ インタラクションデータ取得エラー: {e}")
             return []
     
     async def get_recent_events(self, days: int = 14) -> List[Dict]:
@@ -159,11 +187,11 @@ class PodcastGenerator:
                 data['id'] = doc.id
                 events.append(data)
             
-            print(f"📅 最近{days}日間のイベント: {len(events)}件取得")
+            logger.info(f"📅 最近{days}日間のイベント: {len(events)}件取得")
             return events
             
         except Exception as e:
-            print(f"❌ イベントデータ取得エラー: {e}")
+            logger.error(f"❌ イベントデータ取得エラー: {e}")
             return []
     
     def analyze_topics(self, interactions: List[Dict]) -> Dict[str, Any]:
@@ -216,65 +244,85 @@ class PodcastGenerator:
             'total_interactions': len(interactions)
         }
     
-    def generate_podcast_content(self, analysis: Dict[str, Any], events: List[Dict]) -> str:
-        """分析結果とイベント情報からポッドキャスト内容を生成"""
+    def _create_utterance(self, speaker: str, text: str) -> Utterance:
+        """発話レコードを作成（読み上げ用テキストから感情を検出）"""
+        speech = self.clean_text_for_tts(text, remove_character_names=False)
+        return Utterance(speaker, text, self.detect_emotion_from_content(speech, speaker))
+    
+    def _as_script(self, content: Union[str, List[Utterance]]) -> List[Utterance]:
+        """台本を発話リストとして取得（Markdown文字列の場合は変換）"""
+        if isinstance(content, str):
+            script = []
+            for parsed in parse_script(content, self.characters):
+                utterance = self._create_utterance(parsed.speaker, parsed.text)
+                if parsed.pause_before or parsed.pause_after:
+                    # キャッシュされた発話に空行の休止を引き継ぐ
+                    utterance = replace(utterance, pause_before=parsed.pause_before, pause_after=parsed.pause_after)
+                script.append(utterance)
+            return script
+        return content
+    
+    def generate_podcast_script(self, analysis: Dict[str, Any], events: List[Dict]) -> List[Utterance]:
+        """分析結果とイベント情報からポッドキャストの台本（発話リスト）を生成"""
+        script = []
+        say = self._create_utterance
         
         # 開始の挨拶（落ち着いたテンポ良く）
-        content = f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: こんにちは！今週のレポートをお届けするにゃ〜\n\n"
-        content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: 週刊にゃんこレポート、始めましょうにゃ。今週も興味深いデータが集まりましたにゃ\n\n"
+        script.append(say('miya', "こんにちは！今週のレポートをお届けするにゃ〜"))
+        script.append(say('eve', "週刊にゃんこレポート、始めましょうにゃ。今週も興味深いデータが集まりましたにゃ"))
         
         # 統計情報の紹介（数字を魅力的に、でも落ち着いて）
         total_interactions = analysis['total_interactions']
         if total_interactions > 100:
-            content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: 今週は{total_interactions}件のやり取り！とても活発だったにゃ〜\n\n"
-            content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: 素晴らしい参加率ですにゃ。コミュニティの活気を感じますにゃ\n\n"
+            script.append(say('miya', f"今週は{total_interactions}件のやり取り！とても活発だったにゃ〜"))
+            script.append(say('eve', "素晴らしい参加率ですにゃ。コミュニティの活気を感じますにゃ"))
         elif total_interactions > 50:
-            content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: {total_interactions}件の投稿がありましたにゃ！良いペースだにゃ〜\n\n"
-            content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: 安定した活動量ですにゃ。質の高い議論が多かったようですにゃ\n\n"
+            script.append(say('miya', f"{total_interactions}件の投稿がありましたにゃ！良いペースだにゃ〜"))
+            script.append(say('eve', "安定した活動量ですにゃ。質の高い議論が多かったようですにゃ"))
         else:
-            content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: {total_interactions}件の投稿。深い議論が中心だったにゃ〜\n\n"
-            content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: 少数精鋭の濃密な交流でしたにゃ\n\n"
+            script.append(say('miya', f"{total_interactions}件の投稿。深い議論が中心だったにゃ〜"))
+            script.append(say('eve', "少数精鋭の濃密な交流でしたにゃ"))
         
         # 人気トピックの紹介（興味深く）
         if analysis['popular_keywords']:
             top_keyword = analysis['popular_keywords'][0]
-            content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: 今週の注目キーワードは「{top_keyword[0]}」。{top_keyword[1]}回登場しましたにゃ\n\n"
-            content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: みんなの関心が集まってるトピックだにゃ〜\n\n"
+            script.append(say('eve', f"今週の注目キーワードは「{top_keyword[0]}」。{top_keyword[1]}回登場しましたにゃ"))
+            script.append(say('miya', "みんなの関心が集まってるトピックだにゃ〜"))
         
         # 技術トピックの紹介（専門的に）
         if analysis['tech_mentions']:
             tech_topics = list(analysis['tech_mentions'].keys())
             if len(tech_topics) >= 3:
-                content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: 技術面では{tech_topics[0]}、{tech_topics[1]}、{tech_topics[2]}について活発な議論がありましたにゃ\n\n"
-                content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: 開発者のみんなの知識共有が素晴らしいにゃ〜\n\n"
+                script.append(say('eve', f"技術面では{tech_topics[0]}、{tech_topics[1]}、{tech_topics[2]}について活発な議論がありましたにゃ"))
+                script.append(say('miya', "開発者のみんなの知識共有が素晴らしいにゃ〜"))
             elif len(tech_topics) >= 2:
-                content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: {tech_topics[0]}と{tech_topics[1]}の技術トピックで盛り上がりましたにゃ\n\n"
-                content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: 実践的な情報交換ができてるにゃ〜\n\n"
+                script.append(say('eve', f"{tech_topics[0]}と{tech_topics[1]}の技術トピックで盛り上がりましたにゃ"))
+                script.append(say('miya', "実践的な情報交換ができてるにゃ〜"))
             elif len(tech_topics) == 1:
-                content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: {tech_topics[0]}について詳しい議論が展開されましたにゃ\n\n"
-                content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: 専門的で勉強になる内容だったにゃ〜\n\n"
+                script.append(say('eve', f"{tech_topics[0]}について詳しい議論が展開されましたにゃ"))
+                script.append(say('miya', "専門的で勉強になる内容だったにゃ〜"))
         
         # チャンネル活動の紹介（分析的に）
         if analysis['channel_activity']:
             channels = list(analysis['channel_activity'].keys())
             if len(channels) >= 2:
-                content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: {channels[0]}チャンネルと{channels[1]}チャンネルが特に活発でしたにゃ\n\n"
-                content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: それぞれ違った話題で盛り上がってたにゃ〜\n\n"
+                script.append(say('eve', f"{channels[0]}チャンネルと{channels[1]}チャンネルが特に活発でしたにゃ"))
+                script.append(say('miya', "それぞれ違った話題で盛り上がってたにゃ〜"))
             else:
                 most_active_channel = channels[0]
                 activity_count = analysis['channel_activity'][most_active_channel]
-                content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: {most_active_channel}チャンネルで{activity_count}件の投稿がありましたにゃ\n\n"
-                content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: みんなが集まる人気スポットだにゃ〜\n\n"
+                script.append(say('eve', f"{most_active_channel}チャンネルで{activity_count}件の投稿がありましたにゃ"))
+                script.append(say('miya', "みんなが集まる人気スポットだにゃ〜"))
         
         # アクティブユーザーの紹介（感謝を込めて）
         if analysis['user_activity']:
             active_users = list(analysis['user_activity'].keys())[:3]
             if len(active_users) >= 3:
-                content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: {active_users[0]}さん、{active_users[1]}さん、{active_users[2]}さん、今週もありがとうにゃ〜\n\n"
-                content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: 皆さんの積極的な参加に感謝ですにゃ\n\n"
+                script.append(say('miya', f"{active_users[0]}さん、{active_users[1]}さん、{active_users[2]}さん、今週もありがとうにゃ〜"))
+                script.append(say('eve', "皆さんの積極的な参加に感謝ですにゃ"))
             elif len(active_users) >= 2:
-                content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: {active_users[0]}さんと{active_users[1]}さん、いつも盛り上げてくれてありがとうにゃ〜\n\n"
-                content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: コミュニティの中心的存在ですにゃ\n\n"
+                script.append(say('miya', f"{active_users[0]}さんと{active_users[1]}さん、いつも盛り上げてくれてありがとうにゃ〜"))
+                script.append(say('eve', "コミュニティの中心的存在ですにゃ"))
         
         # イベント情報の紹介（期待感を込めて）
         if events:
@@ -283,23 +331,27 @@ class PodcastGenerator:
                 event = upcoming_events[0]
                 event_name = event.get('name', 'イベント')
                 user_count = event.get('userCount', 0)
-                content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: 「{event_name}」の開催が予定されていますにゃ\n\n"
+                script.append(say('eve', f"「{event_name}」の開催が予定されていますにゃ"))
                 if user_count > 0:
-                    content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: すでに{user_count}名の方が参加予定だにゃ〜楽しみだにゃ〜\n\n"
-                content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: 詳細はeventsチャンネルでご確認くださいにゃ\n\n"
+                    script.append(say('miya', f"すでに{user_count}名の方が参加予定だにゃ〜楽しみだにゃ〜"))
+                script.append(say('eve', "詳細はeventsチャンネルでご確認くださいにゃ"))
         
         # 締めの挨拶（温かく）
-        content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: 今週もみんなの活発な交流で素敵なコミュニティでしたにゃ〜\n\n"
-        content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: 来週もどんな話題が生まれるか楽しみですにゃ\n\n"
-        content += f"{self.characters['miya']['emoji']} **{self.characters['miya']['name']}**: それでは、また来週お会いしましょうにゃ〜\n\n"
-        content += f"{self.characters['eve']['emoji']} **{self.characters['eve']['name']}**: さようなら、良い一週間をお過ごしくださいにゃ"
+        script.append(say('miya', "今週もみんなの活発な交流で素敵なコミュニティでしたにゃ〜"))
+        script.append(say('eve', "来週もどんな話題が生まれるか楽しみですにゃ"))
+        script.append(say('miya', "それでは、また来週お会いしましょうにゃ〜"))
+        script.append(say('eve', "さようなら、良い一週間をお過ごしくださいにゃ"))
         
-        return content
+        return script
+    
+    def generate_podcast_content(self, analysis: Dict[str, Any], events: List[Dict]) -> str:
+        """分析結果とイベント情報からポッドキャスト内容を生成"""
+        return render_script_text(self.generate_podcast_script(analysis, events), self.characters)
     
     async def save_podcast_to_firestore(self, content: str, analysis: Dict[str, Any]) -> str:
         """生成したポッドキャストをFirestoreに保存"""
         if not self.db:
-            print("⚠️ Firebase Firestoreが初期化されていません。")
+            logger.warning("⚠️ Firebase Firestoreが初期化されていません。")
             return None
         
         try:
@@ -327,11 +379,11 @@ class PodcastGenerator:
             doc_ref = await asyncio.to_thread(self.db.collection('podcasts').add, podcast_data)
             podcast_id = doc_ref[1].id
             
-            print(f"✅ ポッドキャストをFirestoreに保存: {podcast_id}")
+            logger.info(f"✅ ポッドキャストをFirestoreに保存: {podcast_id}")
             return podcast_id
             
         except Exception as e:
-            print(f"❌ ポッドキャスト保存エラー: {e}")
+            logger.error(f"❌ ポッドキャスト保存エラー: {e}")
             return None
     
     def save_podcast_to_file(self, content: str, filename: Optional[str] = None) -> str:
@@ -346,71 +398,33 @@ class PodcastGenerator:
                 f.write(f"# 生成日時: {datetime.datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}\n\n")
                 f.write(content)
             
-            print(f"📝 ポッドキャストをファイルに保存: {filename}")
+            logger.info(f"📝 ポッドキャストをファイルに保存: {filename}")
             return filename
             
         except Exception as e:
-            print(f"❌ ファイル保存エラー: {e}")
+            logger.error(f"❌ ファイル保存エラー: {e}")
             return None
     
     def clean_text_for_tts(self, content: str, remove_character_names: bool = True) -> str:
         """Text-to-Speech用にテキストをクリーンアップ"""
-        # Markdownの太字記法を削除
-        content = re.sub(r'\*\*(.*?)\*\*', r'\1', content)
-        
-        # キャラクター名と話者表記を削除（音声読み上げには不要）
-        if remove_character_names:
-            content = re.sub(f"{self.characters['miya']['emoji']} {self.characters['miya']['name']}: ", '', content)
-            content = re.sub(f"{self.characters['eve']['emoji']} {self.characters['eve']['name']}: ", '', content)
-            content = re.sub(f"{self.characters['miya']['name']}: ", '', content)
-            content = re.sub(f"{self.characters['eve']['name']}: ", '', content)
-        
-        # 絵文字を削除（音声読み上げには不要）
-        content = re.sub(r'[🐈🐱😺👋👥🗑️📅📊📝🔥🎉❌⚠️✅]', '', content)
-        
-        # チャンネル名の#を削除
-        content = re.sub(r'#(\w+)', r'\1チャンネル', content)
-        
-        # @メンションを読みやすく
-        content = re.sub(r'@(\w+)', r'\1', content)
-        
-        # 改行を適切な間隔に変換
-        content = re.sub(r'\n\n+', '。 ', content)
-        content = re.sub(r'\n', '、', content)
-        
-        # 連続する句読点を整理
-        content = re.sub(r'[。、]+', '。', content)
-        
-        # 音声読み上げ用の調整（落ち着いたトーン）
-        content = re.sub(r'にゃ〜ん', 'にゃーん', content)  # 伸ばし音を自然に
-        content = re.sub(r'だにゃ〜', 'だにゃー', content)
-        content = re.sub(r'ですにゃ〜', 'ですにゃー', content)
-        content = re.sub(r'にゃ〜', 'にゃー', content)
-        
-        # 感嘆符の調整（読み上げ時の自然さのため）
-        content = re.sub(r'！{2,}', '！', content)  # 連続感嘆符を1つに
-        
-        # 読み上げ速度を上げるための調整
-        content = re.sub(r'。\s+', '。', content)  # 句点後の余分な空白を削除
-        content = re.sub(r'、\s+', '、', content)  # 読点後の余分な空白を削除
-        
-        return content.strip()
+        # 正規表現はキャラクター構成ごとに1度だけコンパイルされる
+        return get_text_normalizer(self.characters).clean(content, remove_character_names)
     
     def create_ssml_content(self, text: str, character: str = None, emotion: str = None) -> str:
         """SSML（Speech Synthesis Markup Language）を使用した高品質な音声用テキスト生成"""
         # 基本的なクリーンアップ
         clean_text = self.clean_text_for_tts(text, remove_character_names=True)
         
-        # SSMLの開始タグ
-        ssml = '<speak>'
+        # SSMLの開始タグ（文字列連結ではなくリストに積んで最後に結合）
+        parts = ['<speak>']
         
         # キャラクター別の基本音声設定
         if character == 'miya':
             # みやにゃん：明るく活発な設定
-            ssml += '<prosody rate="1.2" pitch="+0.5st" volume="medium">'
+            parts.append('<prosody rate="1.2" pitch="+0.5st" volume="medium">')
         elif character == 'eve':
             # イヴにゃん：落ち着いて低い設定
-            ssml += '<prosody rate="1.0" pitch="-1.5st" volume="medium">'
+            parts.append('<prosody rate="1.0" pitch="-1.5st" volume="medium">')
         
         # キャラクター別の感情設定を追加適用
         if character and character in self.characters and emotion and emotion in self.characters[character].get('emotions', {}):
@@ -419,21 +433,21 @@ class PodcastGenerator:
             # 感情による追加調整
             if character == 'miya':
                 if emotion == 'excited':
-                    ssml += '<prosody rate="1.3" pitch="+1.5st">'
+                    parts.append('<prosody rate="1.3" pitch="+1.5st">')
                 elif emotion == 'curious':
-                    ssml += '<prosody rate="1.25" pitch="+1.0st">'
+                    parts.append('<prosody rate="1.25" pitch="+1.0st">')
                 elif emotion == 'calm':
-                    ssml += '<prosody rate="1.15" pitch="+0.2st">'
+                    parts.append('<prosody rate="1.15" pitch="+0.2st">')
             elif character == 'eve':
                 if emotion == 'analytical':
-                    ssml += '<prosody rate="0.95" pitch="-2.0st">'
+                    parts.append('<prosody rate="0.95" pitch="-2.0st">')
                 elif emotion == 'thoughtful':
-                    ssml += '<prosody rate="0.9" pitch="-1.8st">'
+                    parts.append('<prosody rate="0.9" pitch="-1.8st">')
                 elif emotion == 'pleased':
-                    ssml += '<prosody rate="1.05" pitch="-1.0st">'
+                    parts.append('<prosody rate="1.05" pitch="-1.0st">')
         
         # テキストを文に分割して、キャラクター別の特徴を強化
-        sentences = re.split(r'([。！？])', clean_text)
+        sentences = _SENTENCE_SPLIT_PATTERN.split(clean_text)
         
         for i, sentence in enumerate(sentences):
             if not sentence.strip():
@@ -443,77 +457,80 @@ class PodcastGenerator:
             if character == 'miya':
                 # みやにゃん：明るく元気な表現を強調
                 if '！' in sentence or 'ありがとう' in sentence or '楽しみ' in sentence or 'すごい' in sentence:
-                    ssml += f'<emphasis level="strong"><prosody rate="1.6" pitch="+7.0st">{sentence}</prosody></emphasis>'
+                    parts.append(f'<emphasis level="strong"><prosody rate="1.6" pitch="+7.0st">{sentence}</prosody></emphasis>')
                 elif 'にゃー' in sentence or 'にゃん' in sentence:
-                    ssml += f'<prosody pitch="+5.5st" rate="1.4">{sentence}</prosody>'
+                    parts.append(f'<prosody pitch="+5.5st" rate="1.4">{sentence}</prosody>')
                 elif '数字' in sentence or '件' in sentence:
-                    ssml += f'<emphasis level="moderate">{sentence}</emphasis>'
+                    parts.append(f'<emphasis level="moderate">{sentence}</emphasis>')
                 else:
-                    ssml += sentence
+                    parts.append(sentence)
             elif character == 'eve':
                 # イヴにゃん：分析的で落ち着いた表現を強調
                 if '数字' in sentence or '統計' in sentence or '分析' in sentence or 'データ' in sentence:
-                    ssml += f'<emphasis level="moderate"><prosody rate="0.75" pitch="-10.5st">{sentence}</prosody></emphasis>'
+                    parts.append(f'<emphasis level="moderate"><prosody rate="0.75" pitch="-10.5st">{sentence}</prosody></emphasis>')
                 elif 'にゃー' in sentence or 'にゃん' in sentence:
-                    ssml += f'<prosody pitch="-7.5st" rate="0.8">{sentence}</prosody>'
+                    parts.append(f'<prosody pitch="-7.5st" rate="0.8">{sentence}</prosody>')
                 elif 'すばらしい' in sentence or '良い' in sentence:
-                    ssml += f'<prosody rate="0.95" pitch="-6.5st">{sentence}</prosody>'
+                    parts.append(f'<prosody rate="0.95" pitch="-6.5st">{sentence}</prosody>')
                 else:
-                    ssml += sentence
+                    parts.append(sentence)
             else:
                 # その他のキャラクター（ナレーション等）
                 if '！' in sentence or 'ありがとう' in sentence or '楽しみ' in sentence:
-                    ssml += f'<emphasis level="moderate">{sentence}</emphasis>'
+                    parts.append(f'<emphasis level="moderate">{sentence}</emphasis>')
                 elif '数字' in sentence or '統計' in sentence or '分析' in sentence:
-                    ssml += f'<prosody rate="0.8">{sentence}</prosody>'
+                    parts.append(f'<prosody rate="0.8">{sentence}</prosody>')
                 else:
-                    ssml += sentence
+                    parts.append(sentence)
             
             # 文の間に適切な休止を追加（キャラクター別調整）
             if sentence.endswith(('。', '！', '？')) and i < len(sentences) - 2:
                 if character == 'miya':
                     # みやにゃん：短めの休止で活発さを表現
                     if '。' in sentence:
-                        ssml += '<break time="600ms"/>'
+                        parts.append('<break time="600ms"/>')
                     elif '！' in sentence:
-                        ssml += '<break time="400ms"/>'
+                        parts.append('<break time="400ms"/>')
                     elif '？' in sentence:
-                        ssml += '<break time="500ms"/>'
+                        parts.append('<break time="500ms"/>')
                 elif character == 'eve':
                     # イヴにゃん：長めの休止で落ち着きを表現
                     if '。' in sentence:
-                        ssml += '<break time="1000ms"/>'
+                        parts.append('<break time="1000ms"/>')
                     elif '！' in sentence:
-                        ssml += '<break time="800ms"/>'
+                        parts.append('<break time="800ms"/>')
                     elif '？' in sentence:
-                        ssml += '<break time="900ms"/>'
+                        parts.append('<break time="900ms"/>')
                 else:
                     # デフォルト
                     if '。' in sentence:
-                        ssml += '<break time="800ms"/>'
+                        parts.append('<break time="800ms"/>')
                     elif '！' in sentence:
-                        ssml += '<break time="600ms"/>'
+                        parts.append('<break time="600ms"/>')
                     elif '？' in sentence:
-                        ssml += '<break time="700ms"/>'
+                        parts.append('<break time="700ms"/>')
+        
+        ssml = ''.join(parts)
         
         # 特別な表現の調整（キャラクター別）
         if character == 'miya':
-            ssml = re.sub(r'にゃー+', '<phoneme alphabet="ipa" ph="ɲaː"><prosody pitch="+3.0st">にゃー</prosody></phoneme>', ssml)
+            ssml = NYA_PATTERN.sub('<phoneme alphabet="ipa" ph="ɲaː"><prosody pitch="+3.0st">にゃー</prosody></phoneme>', ssml)
         elif character == 'eve':
-            ssml = re.sub(r'にゃー+', '<phoneme alphabet="ipa" ph="ɲaː"><prosody pitch="-2.0st">にゃー</prosody></phoneme>', ssml)
+            ssml = NYA_PATTERN.sub('<phoneme alphabet="ipa" ph="ɲaː"><prosody pitch="-2.0st">にゃー</prosody></phoneme>', ssml)
         
         # 感情設定の終了タグ
+        closing = []
         if character and character in self.characters and emotion and emotion in self.characters[character].get('emotions', {}):
-            ssml += '</prosody>'
+            closing.append('</prosody>')
         
         # キャラクター別基本設定の終了タグ
         if character in ['miya', 'eve']:
-            ssml += '</prosody>'
+            closing.append('</prosody>')
         
         # SSMLの終了タグ
-        ssml += '</speak>'
+        closing.append('</speak>')
         
-        return ssml
+        return ssml + ''.join(closing)
     
     def detect_emotion_from_content(self, text: str, character: str) -> str:
         """テキスト内容からキャラクターに適した感情を検出"""
@@ -552,96 +569,171 @@ class PodcastGenerator:
         
         return None
     
-    async def generate_audio(self, content: str, filename: Optional[str] = None, voice_settings: Optional[Dict] = None, character: str = None, use_ssml: bool = True) -> Optional[str]:
-        """ポッドキャスト内容を音声ファイルに変換（SSML対応、高品質版）"""
-        if not filename:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"podcast_{timestamp}.mp3"
-        
-        try:
-            print("🎵 高品質音声ファイル生成中...")
-            
-            # Google Cloud Text-to-Speech クライアントを初期化
+    def get_render_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """発話レンダリングキャッシュの統計を取得"""
+        stats = {}
+        for name in ('detect_emotion_from_content', 'create_ssml_content', '_create_utterance', '_render_utterance_ssml'):
+            info = getattr(self, name).cache_info()
+            stats[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+        return stats
+    
+    def _get_tts_client(self):
+        """Text-to-Speechクライアントを取得（初回のみ生成）"""
+        if self.tts_client is None:
             key_path = os.getenv('FIREBASE_SERVICE_ACCOUNT_KEY_PATH', 
                                './nyanco-bot-firebase-adminsdk-fbsvc-d65403c7ca.json')
             
             if os.path.exists(key_path):
-                client = texttospeech.TextToSpeechClient.from_service_account_json(key_path)
+                self.tts_client = texttospeech.TextToSpeechClient.from_service_account_json(key_path)
             elif os.getenv('FIREBASE_SERVICE_ACCOUNT'):
                 service_account_info = json.loads(os.getenv('FIREBASE_SERVICE_ACCOUNT'))
                 credentials = service_account.Credentials.from_service_account_info(service_account_info)
-                client = texttospeech.TextToSpeechClient(credentials=credentials)
+                self.tts_client = texttospeech.TextToSpeechClient(credentials=credentials)
             else:
-                print("⚠️ サービスアカウントキーが見つかりません。デフォルトクレデンシャルを使用します。")
-                client = texttospeech.TextToSpeechClient()
-            
-            # デフォルトの音声設定（高品質版）
-            default_voice_settings = {
-                'language_code': 'ja-JP',
-                'name': 'ja-JP-Neural2-B',
-                'ssml_gender': texttospeech.SsmlVoiceGender.FEMALE,
-                'speaking_rate': 1.15,
-                'pitch': 0.0,
-                'volume_gain_db': 2.0,
-                'sample_rate_hertz': 24000
-            }
-            
-            # 音声設定をマージ
-            if voice_settings:
-                default_voice_settings.update(voice_settings)
-            
-            # SSML対応のテキスト準備
-            if use_ssml and character:
-                # 感情を検出
-                emotion = self.detect_emotion_from_content(content, character)
-                # SSMLコンテンツ生成
-                synthesis_input = texttospeech.SynthesisInput(
-                    ssml=self.create_ssml_content(content, character, emotion)
-                )
-                print(f"📢 {character}キャラクターの{emotion}感情でSSML音声生成中...")
-            else:
-                # 通常のテキスト処理
-                clean_content = self.clean_text_for_tts(content, remove_character_names=True)
-                synthesis_input = texttospeech.SynthesisInput(text=clean_content)
-                print("📢 通常のテキスト音声生成中...")
-            
-            # 音声設定
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=default_voice_settings['language_code'],
-                name=default_voice_settings['name'],
-                ssml_gender=default_voice_settings['ssml_gender']
-            )
-            
-            # 高品質音声設定
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.MP3,
-                speaking_rate=default_voice_settings['speaking_rate'],
-                pitch=default_voice_settings['pitch'],
-                volume_gain_db=default_voice_settings.get('volume_gain_db', 0.0),
-                sample_rate_hertz=default_voice_settings.get('sample_rate_hertz', 24000),
-                effects_profile_id=['telephony-class-application']  # 音質改善プロファイル
-            )
-            
-            # 音声合成を実行
-            response = await asyncio.to_thread(
-                client.synthesize_speech,
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
+                logger.warning("⚠️ サービスアカウントキーが見つかりません。デフォルトクレデンシャルを使用します。")
+                self.tts_client = texttospeech.TextToSpeechClient()
+        
+        return self.tts_client
+    
+    async def _synthesize_inputs(self, client, synthesis_inputs: List[Any], voice, audio_config) -> bytes:
+        """複数の合成入力を並列に音声化し、順番通りに結合"""
+        semaphore = asyncio.Semaphore(max(1, self.tts_max_concurrency))
+        
+        async def synthesize(synthesis_input):
+            async with semaphore:
+                with track(TTS_REQUESTS, TTS_DURATION, caller='podcast'):
+                    response = await asyncio.to_thread(
+                        client.synthesize_speech,
+                        input=synthesis_input,
+                        voice=voice,
+                        audio_config=audio_config
+                    )
+                TTS_AUDIO_BYTES.inc(len(response.audio_content), caller='podcast')
+                return response.audio_content
+        
+        audio_chunks = await asyncio.gather(*(synthesize(item) for item in synthesis_inputs))
+        # MP3はフレーム単位のため、そのまま連結すれば連続再生できる
+        return b''.join(audio_chunks)
+    
+    async def generate_audio(self, content: str, filename: Optional[str] = None, voice_settings: Optional[Dict] = None, character: str = None, use_ssml: bool = True) -> Optional[str]:
+        """ポッドキャスト内容を音声ファイルに変換（SSML対応、高品質版）"""
+        if not filename:
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"podcast_{timestamp}.mp3"
+        
+        try:
+            logger.info("🎵 高品質音声ファイル生成中...")
+            audio_content = await self.synthesize_audio(content, voice_settings, character, use_ssml)
             
             # 音声ファイルに保存
             with open(filename, 'wb') as out:
-                out.write(response.audio_content)
+                out.write(audio_content)
             
-            print(f"🎵 高品質音声ファイルを生成: {filename}")
+            logger.info(f"🎵 高品質音声ファイルを生成: {filename}")
             return filename
             
         except Exception as e:
-            print(f"❌ 音声ファイル生成エラー: {e}")
+            logger.error(f"❌ 音声ファイル生成エラー: {e}")
             return None
     
-    async def generate_character_audio(self, content: str, base_filename: Optional[str] = None) -> Dict[str, str]:
+    async def synthesize_audio(self, content: str, voice_settings: Optional[Dict] = None, character: str = None, use_ssml: bool = True) -> bytes:
+        """ポッドキャスト内容をMP3のバイト列に変換（ファイルには書き出さない）"""
+        # Google Cloud Text-to-Speech クライアントを取得
+        client = self._get_tts_client()
+        
+        # デフォルトの音声設定（高品質版）
+        default_voice_settings = {
+            'language_code': 'ja-JP',
+            'name': 'ja-JP-Neural2-B',
+            'ssml_gender': texttospeech.SsmlVoiceGender.FEMALE,
+            'speaking_rate': 1.15,
+            'pitch': 0.0,
+            'volume_gain_db': 2.0,
+            'sample_rate_hertz': 24000
+        }
+        
+        # 音声設定をマージ
+        if voice_settings:
+            default_voice_settings.update(voice_settings)
+        
+        # SSML対応のテキスト準備（上限を超える場合は分割）
+        if use_ssml and character:
+            # 感情を検出
+            emotion = self.detect_emotion_from_content(content, character)
+            # SSMLコンテンツ生成
+            synthesis_inputs = [
+                texttospeech.SynthesisInput(ssml=chunk)
+                for chunk in split_ssml(self.create_ssml_content(content, character, emotion))
+            ]
+            logger.info(f"📢 {character}キャラクターの{emotion}感情でSSML音声生成中...")
+        else:
+            # 通常のテキスト処理
+            clean_content = self.clean_text_for_tts(content, remove_character_names=True)
+            synthesis_inputs = [
+                texttospeech.SynthesisInput(text=chunk)
+                for chunk in split_plain_text(clean_content)
+            ]
+            logger.info("📢 通常のテキスト音声生成中...")
+        
+        # 音声設定
+        voice = texttospeech.VoiceSelectionParams(
+            language_code=default_voice_settings['language_code'],
+            name=default_voice_settings['name'],
+            ssml_gender=default_voice_settings['ssml_gender']
+        )
+        
+        # 高品質音声設定
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding.MP3,
+            speaking_rate=default_voice_settings['speaking_rate'],
+            pitch=default_voice_settings['pitch'],
+            volume_gain_db=default_voice_settings.get('volume_gain_db', 0.0),
+            sample_rate_hertz=default_voice_settings.get('sample_rate_hertz', 24000),
+            effects_profile_id=['telephony-class-application']  # 音質改善プロファイル
+        )
+        
+        # 音声合成を実行（チャンクは並列に合成して結合）
+        return await self._synthesize_inputs(client, synthesis_inputs, voice, audio_config)
+    
+    def group_character_lines(self, content: Union[str, List[Utterance]]) -> Dict[str, str]:
+        """キャラクター別に読み上げテキストをまとめる（セリフのない話者は含めない）"""
+        # 台本の発話レコードをそのまま振り分ける
+        character_lines = {'miya': [], 'eve': [], NARRATOR: []}
+        for utterance in self._as_script(content):
+            character_lines.setdefault(utterance.speaker, []).append(utterance.text)
+        
+        grouped = {}
+        for character, lines_list in character_lines.items():
+            character_text = ' '.join(lines_list)
+            if character_text.strip():
+                grouped[character] = character_text
+        return grouped
+    
+    async def synthesize_character_audio(self, character: str, text: str) -> bytes:
+        """キャラクター別の音声設定でMP3のバイト列を生成"""
+        if character in self.characters:
+            # キャラクター別の音声設定を使用し、SSML対応で音声生成
+            return await self.synthesize_audio(
+                text,
+                self.characters[character]['voice_settings'],
+                character=character,
+                use_ssml=True
+            )
+        
+        # ナレーション用の高品質設定（キャラクターとの区別を明確化）
+        default_narrator_settings = {
+            'language_code': 'ja-JP',
+            'name': 'ja-JP-Neural2-D',  # ナレーション用の中性的な声
+            'ssml_gender': texttospeech.SsmlVoiceGender.NEUTRAL,
+            'speaking_rate': 1.15,  # みやにゃんとイヴにゃんの中間
+            'pitch': 0.0,  # 中性的な高さ
+            'volume_gain_db': 2.0,  # 適度な音量
+            'sample_rate_hertz': 24000
+        }
+        # ナレーションはSSMLなしで生成
+        return await self.synthesize_audio(text, default_narrator_settings, character=None, use_ssml=False)
+    
+    async def generate_character_audio(self, content: Union[str, List[Utterance]], base_filename: Optional[str] = None) -> Dict[str, str]:
         """キャラクター別に音声ファイルを生成（SSML対応、高品質版）"""
         if not base_filename:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -650,98 +742,46 @@ class PodcastGenerator:
         audio_files = {}
         
         try:
-            # キャラクター別にセリフを分割
-            lines = content.split('\n')
-            character_lines = {'miya': [], 'eve': [], 'narrator': []}
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                if self.characters['miya']['name'] in line:
-                    # みやにゃんのセリフを抽出
-                    speech = re.sub(f".*{self.characters['miya']['name']}.*?:\s*", '', line)
-                    if speech:
-                        character_lines['miya'].append(speech)
-                elif self.characters['eve']['name'] in line:
-                    # イヴにゃんのセリフを抽出
-                    speech = re.sub(f".*{self.characters['eve']['name']}.*?:\s*", '', line)
-                    if speech:
-                        character_lines['eve'].append(speech)
-                else:
-                    # ナレーション
-                    character_lines['narrator'].append(line)
-            
             # 各キャラクターの音声を生成（高品質版）
-            for character, lines_list in character_lines.items():
-                if lines_list:
-                    character_text = ' '.join(lines_list)
-                    
-                    if character_text.strip():
-                        filename = f"{base_filename}_{character}.mp3"
-                        
-                        print(f"🎵 {character}の高品質音声生成中...")
-                        
-                        # キャラクター別の音声設定を使用
-                        if character in self.characters:
-                            voice_settings = self.characters[character]['voice_settings']
-                            # SSML対応で音声生成
-                            audio_file = await self.generate_audio(
-                                character_text, 
-                                filename, 
-                                voice_settings,
-                                character=character,
-                                use_ssml=True
-                            )
-                            if audio_file:
-                                audio_files[character] = audio_file
-                                print(f"✅ {character}の高品質音声ファイル生成完了: {filename}")
-                        else:
-                            # ナレーション用の高品質設定（キャラクターとの区別を明確化）
-                            default_narrator_settings = {
-                                'language_code': 'ja-JP',
-                                'name': 'ja-JP-Neural2-D',  # ナレーション用の中性的な声
-                                'ssml_gender': texttospeech.SsmlVoiceGender.NEUTRAL,
-                                'speaking_rate': 1.15,  # みやにゃんとイヴにゃんの中間
-                                'pitch': 0.0,  # 中性的な高さ
-                                'volume_gain_db': 2.0,  # 適度な音量
-                                'sample_rate_hertz': 24000
-                            }
-                            # ナレーションはSSMLなしで生成
-                            audio_file = await self.generate_audio(
-                                character_text, 
-                                filename, 
-                                default_narrator_settings,
-                                character=None,
-                                use_ssml=False
-                            )
-                            if audio_file:
-                                audio_files[character] = audio_file
-                                print(f"✅ {character}の高品質音声ファイル生成完了: {filename}")
+            for character, character_text in self.group_character_lines(content).items():
+                filename = f"{base_filename}_{character}.mp3"
+                
+                logger.info(f"🎵 {character}の高品質音声生成中...")
+                
+                try:
+                    audio_content = await self.synthesize_character_audio(character, character_text)
+                except Exception as e:
+                    logger.error(f"❌ 音声ファイル生成エラー: {e}")
+                    continue
+                
+                with open(filename, 'wb') as out:
+                    out.write(audio_content)
+                
+                audio_files[character] = filename
+                logger.info(f"✅ {character}の高品質音声ファイル生成完了: {filename}")
             
             return audio_files
             
         except Exception as e:
-            print(f"❌ キャラクター別音声生成エラー: {e}")
+            logger.error(f"❌ キャラクター別音声生成エラー: {e}")
             return {}
     
-    async def create_conversation_audio(self, content: str, base_filename: Optional[str] = None) -> Optional[str]:
+    async def create_conversation_audio(self, content: Union[str, List[Utterance]], base_filename: Optional[str] = None) -> Optional[str]:
         """会話形式で統合された高品質音声を生成（キャラクター切り替え対応）"""
         if not base_filename:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             base_filename = f"podcast_conversation_{timestamp}"
         
         try:
-            print("🎭 会話形式音声生成中...")
+            logger.info("🎭 会話形式音声生成中...")
             
             # 各キャラクターの個別音声を生成
             character_audios = await self.generate_character_audio(content, base_filename)
             
             if len(character_audios) > 1:
                 # 複数の音声ファイルが生成された場合は、統合処理の準備
-                print("🔄 複数キャラクターの音声統合準備完了")
-                print("💡 音声統合には外部ツール（ffmpeg等）の使用を推奨します")
+                logger.info("🔄 複数キャラクターの音声統合準備完了")
+                logger.info("💡 音声統合には外部ツール（ffmpeg等）の使用を推奨します")
                 
                 # 統合用のメタデータファイルを作成
                 metadata_filename = f"{base_filename}_metadata.json"
@@ -755,133 +795,166 @@ class PodcastGenerator:
                 with open(metadata_filename, 'w', encoding='utf-8') as f:
                     json.dump(metadata, f, ensure_ascii=False, indent=2)
                 
-                print(f"📋 音声統合メタデータを生成: {metadata_filename}")
+                logger.info(f"📋 音声統合メタデータを生成: {metadata_filename}")
                 return metadata_filename
             elif character_audios:
                 # 単一キャラクターの場合はそのまま返す
                 return list(character_audios.values())[0]
             else:
-                print("⚠️ 音声ファイルが生成されませんでした")
+                logger.warning("⚠️ 音声ファイルが生成されませんでした")
                 return None
                 
         except Exception as e:
-            print(f"❌ 会話形式音声生成エラー: {e}")
+            logger.error(f"❌ 会話形式音声生成エラー: {e}")
             return None
     
-    def create_full_conversation_ssml(self, content: str) -> str:
-        """会話全体をキャラクター別音声設定でSSML化"""
-        lines = content.split('\n')
-        ssml = '<speak>'
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                # 空行は短い休止
-                ssml += '<break time="300ms"/>'
-                continue
+    def _render_utterance_ssml(self, utterance: Utterance) -> str:
+        """1発話をキャラクター別音声設定のSSML断片に変換"""
+        speech = self.clean_text_for_tts(utterance.text, remove_character_names=False)
+        if not speech:
+            return ''
+        
+        emotion = utterance.emotion
+        parts = []
+        
+        if utterance.speaker == 'miya':
+            # みやにゃんの基本設定
+            parts.append('<prosody rate="1.2" pitch="+0.5st" volume="medium">')
+            
+            # 感情による調整
+            if emotion == 'excited':
+                parts.append('<prosody rate="1.3" pitch="+1.5st">')
+            elif emotion == 'curious':
+                parts.append('<prosody rate="1.25" pitch="+1.0st">')
+            elif emotion == 'calm':
+                parts.append('<prosody rate="1.15" pitch="+0.2st">')
+            
+            # 特別な表現の調整
+            speech_adjusted = NYA_PATTERN.sub('<prosody pitch="+1.0st">にゃー</prosody>', speech)
+            if '！' in speech or 'ありがとう' in speech or '楽しみ' in speech:
+                parts.append(f'<emphasis level="strong">{speech_adjusted}</emphasis>')
+            else:
+                parts.append(speech_adjusted)
+            
+            # 感情調整の終了
+            if emotion in ['excited', 'curious', 'calm']:
+                parts.append('</prosody>')
+            
+            # 基本設定の終了
+            parts.append('</prosody>')
+            
+            # みやにゃん用の休止（短め）
+            parts.append('<break time="500ms"/>')
+            
+        elif utterance.speaker == 'eve':
+            # イヴにゃんの基本設定
+            parts.append('<prosody rate="1.0" pitch="-1.5st" volume="medium">')
+            
+            # 感情による調整
+            if emotion == 'analytical':
+                parts.append('<prosody rate="0.95" pitch="-2.0st">')
+            elif emotion == 'thoughtful':
+                parts.append('<prosody rate="0.9" pitch="-1.8st">')
+            elif emotion == 'pleased':
+                parts.append('<prosody rate="1.05" pitch="-1.0st">')
+            
+            # 特別な表現の調整
+            speech_adjusted = NYA_PATTERN.sub('<prosody pitch="-0.5st">にゃー</prosody>', speech)
+            if '数字' in speech or '統計' in speech or '分析' in speech:
+                parts.append(f'<emphasis level="moderate">{speech_adjusted}</emphasis>')
+            else:
+                parts.append(speech_adjusted)
             
-            # キャラクター判定とセリフ抽出
-            if self.characters['miya']['name'] in line:
-                # みやにゃんのセリフ
-                speech = re.sub(f".*{self.characters['miya']['name']}.*?:\s*", '', line)
-                speech = self.clean_text_for_tts(speech, remove_character_names=False)
-                if speech:
-                    emotion = self.detect_emotion_from_content(speech, 'miya')
-                    
-                    # みやにゃんの基本設定
-                    ssml += '<prosody rate="1.2" pitch="+0.5st" volume="medium">'
-                    
-                    # 感情による調整
-                    if emotion == 'excited':
-                        ssml += '<prosody rate="1.3" pitch="+1.5st">'
-                    elif emotion == 'curious':
-                        ssml += '<prosody rate="1.25" pitch="+1.0st">'
-                    elif emotion == 'calm':
-                        ssml += '<prosody rate="1.15" pitch="+0.2st">'
-                    
-                    # 特別な表現の調整
-                    speech_adjusted = re.sub(r'にゃー+', '<prosody pitch="+1.0st">にゃー</prosody>', speech)
-                    if '！' in speech or 'ありがとう' in speech or '楽しみ' in speech:
-                        ssml += f'<emphasis level="strong">{speech_adjusted}</emphasis>'
-                    else:
-                        ssml += speech_adjusted
-                    
-                    # 感情調整の終了
-                    if emotion in ['excited', 'curious', 'calm']:
-                        ssml += '</prosody>'
-                    
-                    # 基本設定の終了
-                    ssml += '</prosody>'
-                    
-                    # みやにゃん用の休止（短め）
-                    ssml += '<break time="500ms"/>'
-                    
-            elif self.characters['eve']['name'] in line:
-                # イヴにゃんのセリフ
-                speech = re.sub(f".*{self.characters['eve']['name']}.*?:\s*", '', line)
-                speech = self.clean_text_for_tts(speech, remove_character_names=False)
-                if speech:
-                    emotion = self.detect_emotion_from_content(speech, 'eve')
-                    
-                    # イヴにゃんの基本設定
-                    ssml += '<prosody rate="1.0" pitch="-1.5st" volume="medium">'
-                    
-                    # 感情による調整
-                    if emotion == 'analytical':
-                        ssml += '<prosody rate="0.95" pitch="-2.0st">'
-                    elif emotion == 'thoughtful':
-                        ssml += '<prosody rate="0.9" pitch="-1.8st">'
-                    elif emotion == 'pleased':
-                        ssml += '<prosody rate="1.05" pitch="-1.0st">'
-                    
-                    # 特別な表現の調整
-                    speech_adjusted = re.sub(r'にゃー+', '<prosody pitch="-0.5st">にゃー</prosody>', speech)
-                    if '数字' in speech or '統計' in speech or '分析' in speech:
-                        ssml += f'<emphasis level="moderate">{speech_adjusted}</emphasis>'
-                    else:
-                        ssml += speech_adjusted
-                    
-                    # 感情調整の終了
-                    if emotion in ['analytical', 'thoughtful', 'pleased']:
-                        ssml += '</prosody>'
-                    
-                    # 基本設定の終了
-                    ssml += '</prosody>'
-                    
-                    # イヴにゃん用の休止（長め）
-                    ssml += '<break time="800ms"/>'
+            # 感情調整の終了
+            if emotion in ['analytical', 'thoughtful', 'pleased']:
+                parts.append('</prosody>')
             
-            else:
-                # ナレーション（中間的な設定）
-                speech = self.clean_text_for_tts(line, remove_character_names=False)
-                if speech:
-                    ssml += f'<prosody rate="1.0" pitch="0st" volume="medium">{speech}</prosody>'
-                    ssml += '<break time="800ms"/>'
-        
-        ssml += '</speak>'
-        return ssml
+            # 基本設定の終了
+            parts.append('</prosody>')
+            
+            # イヴにゃん用の休止（長め）
+            parts.append('<break time="800ms"/>')
+        
+        else:
+            # ナレーション（中間的な設定）
+            parts.append(f'<prosody rate="1.0" pitch="0st" volume="medium">{speech}</prosody>')
+            parts.append('<break time="800ms"/>')
+        
+        return ''.join(parts)
+    
+    def create_full_conversation_ssml(self, content: Union[str, List[Utterance]]) -> str:
+        """会話全体をキャラクター別音声設定でSSML化"""
+        parts = ['<speak>']
+        pause = '<break time="300ms"/>'
+        
+        if isinstance(content, str):
+            # Markdown台本は空行ごとに短い休止
+            for utterance in self._as_script(content):
+                parts.append(pause * utterance.pause_before)
+                parts.append(self._render_utterance_ssml(utterance))
+                parts.append(pause * utterance.pause_after)
+        else:
+            # 発話リストは表示用台本（空行区切り）と同じく発話の間に短い休止
+            for i, utterance in enumerate(content):
+                if i > 0:
+                    parts.append(pause)
+                parts.append(self._render_utterance_ssml(utterance))
+        
+        parts.append('</speak>')
+        return ''.join(parts)
     
-    async def generate_podcast(self, days: int = 7, save_to_firestore: bool = True, save_to_file: bool = True, generate_audio: bool = True) -> Dict[str, Any]:
-        """ポッドキャストを生成するメイン関数"""
-        print(f"🎙️ ポッドキャスト生成を開始（過去{days}日間のデータを分析）...")
+    async def get_recent_activity(self, days: int = 7,
+                                  snapshot: Optional[ActivitySnapshot] = None) -> tuple:
+        """ポッドキャスト用のインタラクション（最新100件）とイベント（2倍の期間）を取得
+        
+        週次まとめ・アドバイスと同じスナップショットを共有し、Firestoreの再スキャンを避ける
+        """
+        try:
+            if snapshot is None:
+                if not self.db:
+                    return [], []
+                snapshot = await get_activity_snapshot(self.db, days)
+            interactions = snapshot.recent_messages(100)
+            events = snapshot.events_since(days * 2)  # イベントは少し長めの期間で取得
+            logger.info(f"📊 最近{days}日間のインタラクション: {len(interactions)}件, イベント: {len(events)}件")
+            return interactions, events
+        except Exception as e:
+            logger.error(f"❌ アクティビティ取得エラー: {e}")
+            return [], []
+    
+    async def generate_podcast(self, days: int = 7, save_to_firestore: bool = True, save_to_file: bool = True, generate_audio: bool = True,
+                               progress_callback: Optional[Callable[[str], Awaitable[Any]]] = None,
+                               snapshot: Optional[ActivitySnapshot] = None) -> Dict[str, Any]:
+        """ポッドキャストを生成するメイン関数
+        
+        progress_callback を渡すと各工程の開始時に進捗メッセージを通知する
+        snapshot を渡すとそのアクティビティを使う（未指定時は共有キャッシュから取得）
+        """
+        logger.info(f"🎙️ ポッドキャスト生成を開始（過去{days}日間のデータを分析）...")
+        
+        async def report(text: str):
+            if progress_callback:
+                await progress_callback(text)
         
         try:
             # データ取得
-            print("📊 データ取得中...")
-            interactions = await self.get_recent_interactions(days=days)
-            events = await self.get_recent_events(days=days*2)  # イベントは少し長めの期間で取得
+            logger.info("📊 データ取得中...")
+            await report(f"📊 過去{days}日間のデータ取得中...")
+            interactions, events = await self.get_recent_activity(days, snapshot)
             
             if not interactions:
-                print("⚠️ 分析対象のインタラクションが見つかりませんでした。")
+                logger.warning("⚠️ 分析対象のインタラクションが見つかりませんでした。")
                 return {'success': False, 'error': 'No interactions found'}
             
             # トピック分析
-            print("🔍 トピック分析中...")
+            logger.info("🔍 トピック分析中...")
+            await report("🔍 トピック分析・台本生成中...")
             analysis = self.analyze_topics(interactions)
             
-            # ポッドキャスト内容生成
-            print("✍️ ポッドキャスト内容生成中...")
-            content = self.generate_podcast_content(analysis, events)
+            # ポッドキャスト内容生成（台本は発話リストとして各工程で共有）
+            logger.info("✍️ ポッドキャスト内容生成中...")
+            script = self.generate_podcast_script(analysis, events)
+            content = render_script_text(script, self.characters)
             
             # 結果の保存
             result = {
@@ -904,15 +977,16 @@ class PodcastGenerator:
             
             # 音声ファイル生成
             if generate_audio:
-                print("\n🎵 高品質音声ファイル生成を開始...")
+                logger.info("\n🎵 高品質音声ファイル生成を開始...")
+                await report("🎵 音声ファイル生成中...")
                 
                 timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
                 
                 # 統合音声ファイルを生成（キャラクター別SSML対応版）
-                print("🎭 統合音声ファイル生成中（キャラクター別音声設定適用）...")
+                logger.info("🎭 統合音声ファイル生成中（キャラクター別音声設定適用）...")
                 
                 # キャラクター別SSML生成
-                full_ssml = self.create_full_conversation_ssml(content)
+                full_ssml = self.create_full_conversation_ssml(script)
                 
                 # SSML対応で統合音声生成
                 audio_filename = await self.generate_audio_with_ssml(
@@ -930,40 +1004,45 @@ class PodcastGenerator:
                 )
                 if audio_filename:
                     result['audio_file'] = audio_filename
-                    print(f"✅ キャラクター別音声対応の統合ファイル生成: {audio_filename}")
+                    logger.info(f"✅ キャラクター別音声対応の統合ファイル生成: {audio_filename}")
                 
                 # キャラクター別音声ファイルを生成（SSML対応）
-                character_audio_files = await self.generate_character_audio(content, f"podcast_{timestamp}")
+                character_audio_files = await self.generate_character_audio(script, f"podcast_{timestamp}")
                 if character_audio_files:
                     result['character_audio_files'] = character_audio_files
                 
                 # 会話形式音声を生成（新機能）
-                conversation_audio = await self.create_conversation_audio(content, f"podcast_conversation_{timestamp}")
+                conversation_audio = await self.create_conversation_audio(script, f"podcast_conversation_{timestamp}")
                 if conversation_audio:
                     result['conversation_metadata'] = conversation_audio
-            
-            print("✅ ポッドキャスト生成完了！")
-            print("\n" + "="*50)
-            print("📻 生成されたポッドキャスト内容:")
-            print("="*50)
-            print(content)
-            print("="*50)
+                
+                cache_stats = self.get_render_cache_stats()
+                hits = sum(stat['hits'] for stat in cache_stats.values())
+                misses = sum(stat['misses'] for stat in cache_stats.values())
+                logger.info(f"🧮 発話レンダリングキャッシュ: ヒット{hits}件 / ミス{misses}件")
+            
+            logger.info("✅ ポッドキャスト生成完了！")
+            logger.info("\n" + "="*50)
+            logger.info("📻 生成されたポッドキャスト内容:")
+            logger.info("="*50)
+            logger.info(content)
+            logger.info("="*50)
             
             # 音声ファイル情報の表示
             if 'audio_file' in result:
-                print(f"🎵 統合音声ファイル: {result['audio_file']}")
+                logger.info(f"🎵 統合音声ファイル: {result['audio_file']}")
             if 'character_audio_files' in result:
-                print(f"🎭 キャラクター別音声ファイル:")
+                logger.info(f"🎭 キャラクター別音声ファイル:")
                 for character, filename in result['character_audio_files'].items():
-                    print(f"   - {character}: {filename}")
+                    logger.info(f"   - {character}: {filename}")
             if 'conversation_metadata' in result:
-                print(f"💬 会話形式音声メタデータ: {result['conversation_metadata']}")
-                print("💡 ヒント: 会話形式の音声統合にはffmpegなどの外部ツールをご利用ください")
+                logger.info(f"💬 会話形式音声メタデータ: {result['conversation_metadata']}")
+                logger.info("💡 ヒント: 会話形式の音声統合にはffmpegなどの外部ツールをご利用ください")
             
             return result
             
         except Exception as e:
-            print(f"❌ ポッドキャスト生成エラー: {e}")
+            logger.error(f"❌ ポッドキャスト生成エラー: {e}")
             return {'success': False, 'error': str(e)}
 
     async def generate_audio_with_ssml(self, ssml_content: str, filename: Optional[str] = None, voice_settings: Optional[Dict] = None) -> Optional[str]:
@@ -973,21 +1052,10 @@ class PodcastGenerator:
             filename = f"podcast_ssml_{timestamp}.mp3"
         
         try:
-            print("🎵 SSML対応音声ファイル生成中...")
+            logger.info("🎵 SSML対応音声ファイル生成中...")
             
-            # Google Cloud Text-to-Speech クライアントを初期化
-            key_path = os.getenv('FIREBASE_SERVICE_ACCOUNT_KEY_PATH', 
-                               './nyanco-bot-firebase-adminsdk-fbsvc-d65403c7ca.json')
-            
-            if os.path.exists(key_path):
-                client = texttospeech.TextToSpeechClient.from_service_account_json(key_path)
-            elif os.getenv('FIREBASE_SERVICE_ACCOUNT'):
-                service_account_info = json.loads(os.getenv('FIREBASE_SERVICE_ACCOUNT'))
-                credentials = service_account.Credentials.from_service_account_info(service_account_info)
-                client = texttospeech.TextToSpeechClient(credentials=credentials)
-            else:
-                print("⚠️ サービスアカウントキーが見つかりません。デフォルトクレデンシャルを使用します。")
-                client = texttospeech.TextToSpeechClient()
+            # Google Cloud Text-to-Speech クライアントを取得
+            client = self._get_tts_client()
             
             # デフォルトの音声設定
             default_voice_settings = {
@@ -1004,8 +1072,11 @@ class PodcastGenerator:
             if voice_settings:
                 default_voice_settings.update(voice_settings)
             
-            # SSMLコンテンツで音声合成
-            synthesis_input = texttospeech.SynthesisInput(ssml=ssml_content)
+            # SSMLコンテンツで音声合成（5000バイト上限を超える場合は分割）
+            ssml_chunks = split_ssml(ssml_content)
+            synthesis_inputs = [texttospeech.SynthesisInput(ssml=chunk) for chunk in ssml_chunks]
+            if len(ssml_chunks) > 1:
+                logger.info(f"✂️ SSMLを{len(ssml_chunks)}チャンクに分割して合成します")
             
             # 音声設定
             voice = texttospeech.VoiceSelectionParams(
@@ -1024,23 +1095,18 @@ class PodcastGenerator:
                 effects_profile_id=['telephony-class-application']
             )
             
-            # 音声合成を実行
-            response = await asyncio.to_thread(
-                client.synthesize_speech,
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
+            # 音声合成を実行（チャンクは並列に合成して結合）
+            audio_content = await self._synthesize_inputs(client, synthesis_inputs, voice, audio_config)
             
             # 音声ファイルに保存
             with open(filename, 'wb') as out:
-                out.write(response.audio_content)
+                out.write(audio_content)
             
-            print(f"🎵 SSML対応音声ファイルを生成: {filename}")
+            logger.info(f"🎵 SSML対応音声ファイルを生成: {filename}")
             return filename
             
         except Exception as e:
-            print(f"❌ SSML音声ファイル生成エラー: {e}")
+            logger.error(f"❌ SSML音声ファイル生成エラー: {e}")
             return None
 
 async def main():
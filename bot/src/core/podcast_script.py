@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+podcast_script.py
+Discord にゃんこエージェント - ポッドキャスト台本モデル
+
+ポッドキャストの台本を「誰が・何を・どんな感情で」話すかの
+発話レコードのリストとして扱う
+- テキスト表示用のMarkdown、SSML、キャラクター別音声はこのリストから生成
+- Gemini等が生成した既存のMarkdown台本は parse_script で変換
+"""
+
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Any, Optional
+
+from utils.tts_text import get_text_normalizer
+
+# キャラクター以外の発話（ナレーション）の話者
+NARRATOR = 'narrator'
+
+
+@dataclass(frozen=True)
+class Utterance:
+    """台本の1発話"""
+    speaker: str  # キャラクターキー（'miya' / 'eve'）または NARRATOR
+    text: str  # 話者表記を除いたセリフ
+    emotion: Optional[str] = None
+    # Markdown台本での前後の空行数（SSMLの休止に使う。発話の同一性には含めない）
+    pause_before: int = field(default=0, compare=False)
+    pause_after: int = field(default=0, compare=False)
+
+
+def render_script_text(utterances: List[Utterance], characters: Dict[str, Dict[str, Any]]) -> str:
+    """発話リストを表示用のMarkdown台本に変換"""
+    lines = []
+    for utterance in utterances:
+        settings = characters.get(utterance.speaker)
+        if settings:
+            lines.append(f"{settings['emoji']} **{settings['name']}**: {utterance.text}")
+        else:
+            lines.append(utterance.text)
+    return '\n\n'.join(lines)
+
+
+def parse_script(content: str, characters: Dict[str, Dict[str, Any]]) -> List[Utterance]:
+    """Markdown台本を発話リストに変換（感情は未設定）
+
+    キャラクター名を含む行はそのキャラクターのセリフ、それ以外はナレーションとして扱う。
+    空行の数は直後の発話の pause_before（末尾の空行は最後の発話の pause_after）に記録する。
+    """
+    speaker_patterns = get_text_normalizer(characters).speaker_prefix_patterns
+    utterances = []
+    blank_lines = 0
+
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            blank_lines += 1
+            continue
+
+        for key, settings in characters.items():
+            if settings['name'] in line:
+                speech = speaker_patterns[settings['name']].sub('', line)
+                if speech:
+                    utterances.append(Utterance(key, speech, pause_before=blank_lines))
+                    blank_lines = 0
+                break
+        else:
+            utterances.append(Utterance(NARRATOR, line, pause_before=blank_lines))
+            blank_lines = 0
+
+    if utterances and blank_lines:
+        utterances[-1] = replace(utterances[-1], pause_after=blank_lines)
+
+    return utterances
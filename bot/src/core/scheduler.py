@@ -5,82 +5,122 @@ scheduler.py
 週次コンテンツ制作スケジューラー
 
 毎週決まった時間に自動でエンタメコンテンツを生成・投稿するスケジューラー
+Botと同じイベントループ上で実行するため、Discordへの投稿やFirestore接続を共有できる
+週次コンテンツ以外にも日次アナリティクス・週次アドバイス・集計データのコンパクションを
+それぞれのスケジュールで実行する（Firestoreを大きくスキャンするジョブは同時実行数を制限）
 """
 
+import logging
 import asyncio
 import datetime
 import os
-from typing import Optional, Dict, Any, List
-import schedule
-import time
-import threading
+from typing import Optional, Dict, Any, List, Callable, Awaitable
 from firebase_admin import firestore
 from .content_creator import ContentCreator
+from .cron import CronExpression, CronScheduler
+from .maintenance import RollupCompactor
+from .lease import LeaseManager, FirestoreLeaseBackend, InMemoryLeaseBackend, LeaseBusyError, LeaseLostError
+
+logger = logging.getLogger(__name__)
+
+WEEKLY_JOB_NAME = 'weekly_content'
+
+# interactions などを期間指定で大きくスキャンするジョブのリソースグループ
+FIRESTORE_SCAN_GROUP = 'firestore_scan'
+
+
+def _load_timezone() -> Optional[datetime.tzinfo]:
+    """SCHEDULER_TIMEZONE からタイムゾーンを取得（未設定時はサーバーのローカル時刻）"""
+    tz_name = os.getenv('SCHEDULER_TIMEZONE')
+    if not tz_name:
+        return None
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(tz_name)
+    except Exception as e:
+        logger.warning(f"⚠️ タイムゾーン設定エラー ({tz_name}): {e} - ローカル時刻を使用します")
+        return None
+
+
+def _require_success(func: Callable[[], Awaitable[Dict[str, Any]]]) -> Callable[[], Awaitable[Dict[str, Any]]]:
+    """結果が success=False の場合に例外にする（ジョブ状態にエラーを残すため）"""
+    async def run() -> Dict[str, Any]:
+        result = await func()
+        if isinstance(result, dict) and not result.get('success', True):
+            raise RuntimeError(result.get('error') or 'ジョブが失敗しました')
+        return result
+    return run
+
+
+def _create_lease_manager(firestore_client) -> Optional[LeaseManager]:
+    """SCHEDULER_LEASE_BACKEND に応じたリース（firestore / memory / none）"""
+    backend_name = os.getenv('SCHEDULER_LEASE_BACKEND', 'firestore').lower()
+    if backend_name == 'none':
+        return None
+    if backend_name == 'memory':
+        return LeaseManager(InMemoryLeaseBackend())
+    
+    # FirestoreManager が渡された場合は中のクライアントを使う
+    db = firestore_client if hasattr(firestore_client, 'collection') else getattr(firestore_client, 'db', None)
+    if db is None:
+        logger.warning("⚠️ Firestoreクライアントがないためリースなしでスケジューラーを実行します")
+        return None
+    return LeaseManager(FirestoreLeaseBackend(db))
+
 
 class WeeklyContentScheduler:
     """週次コンテンツ制作スケジューラー"""
     
-    def __init__(self, firestore_client, discord_bot=None):
+    def __init__(self, firestore_client, discord_bot=None, cron_scheduler: Optional[CronScheduler] = None,
+                 content_creator: Optional[ContentCreator] = None):
         self.db = firestore_client
         self.bot = discord_bot
-        self.content_creator = ContentCreator(firestore_client, discord_bot)
+        # Botと共有の ContentCreator が渡された場合はそれを使う
+        self.content_creator = content_creator or ContentCreator(firestore_client, discord_bot)
         
         # スケジュール設定
         self.schedule_day = os.getenv('WEEKLY_SCHEDULE_DAY', 'monday')  # デフォルト: 月曜日
         self.schedule_time = os.getenv('WEEKLY_SCHEDULE_TIME', '09:00')  # デフォルト: 9:00
+        # cron式が指定されている場合は曜日・時刻より優先
+        self.schedule_cron = os.getenv('WEEKLY_SCHEDULE_CRON') or None
+        self.jitter_seconds = float(os.getenv('SCHEDULER_JITTER_SECONDS', '0'))
+        self.misfire_grace_seconds = float(os.getenv('SCHEDULER_MISFIRE_GRACE_SECONDS', '600'))
         
-        # スケジューラーの状態
-        self.is_running = False
-        self.scheduler_thread = None
+        # スケジューラーの状態（他の定期ジョブと共有）
+        self.cron_scheduler = cron_scheduler or CronScheduler(tz=_load_timezone())
         
-        print(f"📅 スケジューラー設定: 毎週{self.schedule_day} {self.schedule_time}")
+        logger.info(f"📅 スケジューラー設定: {self._describe_schedule()}")
+    
+    @property
+    def is_running(self) -> bool:
+        return self.cron_scheduler.is_running
+    
+    def _describe_schedule(self) -> str:
+        if self.schedule_cron:
+            return f"cron '{self.schedule_cron}'"
+        return f"毎週{self.schedule_day} {self.schedule_time}"
+    
+    def _build_cron(self) -> CronExpression:
+        if self.schedule_cron:
+            return CronExpression(self.schedule_cron)
+        return CronExpression.weekly(self.schedule_day, self.schedule_time)
     
     def setup_schedule(self):
         """スケジュールを設定"""
         try:
-            # 既存のスケジュールをクリア
-            schedule.clear()
-            
-            # 曜日に応じてスケジュール設定
-            day_methods = {
-                'monday': schedule.every().monday,
-                'tuesday': schedule.every().tuesday,
-                'wednesday': schedule.every().wednesday,
-                'thursday': schedule.every().thursday,
-                'friday': schedule.every().friday,
-                'saturday': schedule.every().saturday,
-                'sunday': schedule.every().sunday
-            }
-            
-            if self.schedule_day.lower() in day_methods:
-                day_schedule = day_methods[self.schedule_day.lower()]
-                day_schedule.at(self.schedule_time).do(self._run_weekly_task)
-                print(f"✅ スケジュール設定完了: 毎週{self.schedule_day} {self.schedule_time}")
-            else:
-                print(f"❌ 無効な曜日設定: {self.schedule_day}")
-                return False
-            
+            cron = self._build_cron()
+            self.cron_scheduler.add_job(
+                WEEKLY_JOB_NAME, cron, _require_success(self._async_weekly_task),
+                jitter_seconds=self.jitter_seconds,
+                misfire_grace_seconds=self.misfire_grace_seconds,
+                resource_group=FIRESTORE_SCAN_GROUP,
+                description='週次コンテンツ制作'
+            )
+            logger.info(f"✅ スケジュール設定完了: {self._describe_schedule()} (cron: {cron})")
             return True
             
         except Exception as e:
-            print(f"❌ スケジュール設定エラー: {e}")
-            return False
-    
-    def _run_weekly_task(self):
-        """週次タスクの実行（同期ラッパー）"""
-        print("📅 定期実行: 週次コンテンツ制作を開始...")
-        
-        try:
-            # 非同期タスクを同期実行
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(self._async_weekly_task())
-            loop.close()
-            
-            return result
-            
-        except Exception as e:
-            print(f"❌ 週次タスク実行エラー: {e}")
+            logger.error(f"❌ スケジュール設定エラー: {e}")
             return False
     
     async def _async_weekly_task(self) -> Dict[str, Any]:
@@ -95,17 +135,22 @@ class WeeklyContentScheduler:
             # 実行結果記録
             await self._log_execution_result(result)
             
-            if result['success']:
-                print("✅ 定期実行完了: 週次コンテンツ制作成功")
+            if result.get('already_completed'):
+                logger.info("⏭️ 定期実行: 今週の週次コンテンツは作成済みのためスキップ")
+            elif result['success']:
+                logger.info("✅ 定期実行完了: 週次コンテンツ制作成功")
             else:
-                print(f"❌ 定期実行完了: コンテンツ制作失敗 - {result.get('error', 'Unknown error')}")
+                logger.error(f"❌ 定期実行完了: コンテンツ制作失敗 - {result.get('error', 'Unknown error')}")
             
             return result
             
+        except LeaseLostError:
+            # リースを失った後は実行ログも書き込まない
+            raise
         except Exception as e:
             error_result = {'success': False, 'error': str(e)}
             await self._log_execution_result(error_result)
-            print(f"❌ 週次タスクエラー: {e}")
+            logger.error(f"❌ 週次タスクエラー: {e}")
             return error_result
     
     async def _log_execution_start(self):
@@ -121,7 +166,7 @@ class WeeklyContentScheduler:
             await asyncio.to_thread(self.db.collection('scheduler_logs').add, log_data)
             
         except Exception as e:
-            print(f"⚠️ 実行開始ログエラー: {e}")
+            logger.warning(f"⚠️ 実行開始ログエラー: {e}")
     
     async def _log_execution_result(self, result: Dict[str, Any]):
         """実行結果ログ"""
@@ -133,83 +178,63 @@ class WeeklyContentScheduler:
                 'error': result.get('error'),
                 'summary_id': result.get('summary_id'),
                 'discord_posted': result.get('discord_posted', False),
+                'already_completed': result.get('already_completed', False),
                 'stats': result.get('stats', {})
             }
             
             await asyncio.to_thread(self.db.collection('scheduler_logs').add, log_data)
             
         except Exception as e:
-            print(f"⚠️ 実行結果ログエラー: {e}")
+            logger.warning(f"⚠️ 実行結果ログエラー: {e}")
     
     def start_scheduler(self):
-        """スケジューラーを開始"""
+        """スケジューラーを開始（Botのイベントループ上から呼び出す）"""
         if self.is_running:
-            print("⚠️ スケジューラーは既に実行中です")
+            logger.warning("⚠️ スケジューラーは既に実行中です")
             return False
         
         if not self.setup_schedule():
-            print("❌ スケジュール設定に失敗しました")
+            logger.error("❌ スケジュール設定に失敗しました")
             return False
         
-        self.is_running = True
-        
-        def run_scheduler():
-            """スケジューラー実行ループ"""
-            print("🚀 スケジューラー開始...")
-            while self.is_running:
-                try:
-                    schedule.run_pending()
-                    time.sleep(60)  # 1分間隔でチェック
-                except Exception as e:
-                    print(f"❌ スケジューラーループエラー: {e}")
-                    time.sleep(60)
-            
-            print("⏹️ スケジューラー停止")
-        
-        # 別スレッドでスケジューラーを実行
-        self.scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-        self.scheduler_thread.start()
+        self.cron_scheduler.start()
         
-        print("✅ スケジューラー開始完了")
+        logger.info("✅ スケジューラー開始完了")
         return True
     
-    def stop_scheduler(self):
+    async def stop_scheduler(self):
         """スケジューラーを停止"""
         if not self.is_running:
-            print("⚠️ スケジューラーは実行されていません")
+            logger.warning("⚠️ スケジューラーは実行されていません")
             return False
         
-        self.is_running = False
-        
-        # スケジュールをクリア
-        schedule.clear()
-        
-        # スレッドの終了を待機（最大10秒）
-        if self.scheduler_thread and self.scheduler_thread.is_alive():
-            self.scheduler_thread.join(timeout=10)
+        await self.cron_scheduler.stop()
         
-        print("✅ スケジューラー停止完了")
+        logger.info("✅ スケジューラー停止完了")
         return True
     
     def get_status(self) -> Dict[str, Any]:
         """スケジューラーの状態を取得"""
+        job = self.cron_scheduler.jobs.get(WEEKLY_JOB_NAME)
         next_run = None
-        if self.is_running and schedule.jobs:
-            next_run = schedule.next_run()
-            if next_run:
-                next_run = next_run.isoformat()
+        if self.is_running and job and job.next_run:
+            next_run = job.next_run.isoformat()
         
         return {
             'is_running': self.is_running,
             'schedule_day': self.schedule_day,
             'schedule_time': self.schedule_time,
+            'schedule_cron': self.schedule_cron,
+            'schedule_text': self._describe_schedule(),
             'next_run': next_run,
-            'jobs_count': len(schedule.jobs)
+            'jobs_count': len(self.cron_scheduler.jobs) if self.is_running else 0,
+            'misfire_count': job.misfire_count if job else 0,
+            'jobs': self.cron_scheduler.get_jobs()
         }
     
     async def run_manual_task(self) -> Dict[str, Any]:
         """手動でコンテンツ制作タスクを実行"""
-        print("🔧 手動実行: 週次コンテンツ制作を開始...")
+        logger.info("🔧 手動実行: 週次コンテンツ制作を開始...")
         
         try:
             # 手動実行ログ
@@ -225,17 +250,21 @@ class WeeklyContentScheduler:
             # 結果ログ
             await self._log_execution_result(result)
             
-            if result['success']:
-                print("✅ 手動実行完了: 週次コンテンツ制作成功")
+            if result.get('already_completed'):
+                logger.info("⏭️ 手動実行: 今週の週次コンテンツは作成済みです")
+            elif result['success']:
+                logger.info("✅ 手動実行完了: 週次コンテンツ制作成功")
             else:
-                print(f"❌ 手動実行失敗: {result.get('error', 'Unknown error')}")
+                logger.error(f"❌ 手動実行失敗: {result.get('error', 'Unknown error')}")
             
             return result
             
+        except LeaseLostError:
+            raise
         except Exception as e:
             error_result = {'success': False, 'error': str(e)}
             await self._log_execution_result(error_result)
-            print(f"❌ 手動実行エラー: {e}")
+            logger.error(f"❌ 手動実行エラー: {e}")
             return error_result
     
     async def get_recent_logs(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -256,18 +285,23 @@ class WeeklyContentScheduler:
             return logs
             
         except Exception as e:
-            print(f"❌ ログ取得エラー: {e}")
+            logger.error(f"❌ ログ取得エラー: {e}")
             return []
     
-    def update_schedule(self, day: Optional[str] = None, time: Optional[str] = None) -> bool:
+    def update_schedule(self, day: Optional[str] = None, time: Optional[str] = None,
+                        cron: Optional[str] = None) -> bool:
         """スケジュール設定を更新"""
         try:
-            if day:
-                self.schedule_day = day
-            if time:
-                self.schedule_time = time
+            if cron:
+                CronExpression(cron)  # 書式チェック
+                self.schedule_cron = cron
+            elif day or time:
+                CronExpression.weekly(day or self.schedule_day, time or self.schedule_time)  # 書式チェック
+                self.schedule_day = day or self.schedule_day
+                self.schedule_time = time or self.schedule_time
+                self.schedule_cron = None
             
-            print(f"📅 スケジュール更新: 毎週{self.schedule_day} {self.schedule_time}")
+            logger.info(f"📅 スケジュール更新: {self._describe_schedule()}")
             
             # 実行中の場合は再設定
             if self.is_running:
@@ -276,16 +310,76 @@ class WeeklyContentScheduler:
             return True
             
         except Exception as e:
-            print(f"❌ スケジュール更新エラー: {e}")
+            logger.error(f"❌ スケジュール更新エラー: {e}")
             return False
 
 
 class SchedulerManager:
     """スケジューラー管理クラス（Bot統合用）"""
     
-    def __init__(self, firestore_client, discord_bot=None):
-        self.scheduler = WeeklyContentScheduler(firestore_client, discord_bot)
+    # 週次コンテンツ以外の定期ジョブ: (ジョブ名, cron式の環境変数, デフォルトのcron式, 説明)
+    # 利用の少ない時間帯に実行する。環境変数に off を指定すると無効
+    JOB_DEFINITIONS = [
+        ('daily_analytics', 'DAILY_ANALYTICS_SCHEDULE_CRON', '30 3 * * *', '前日の日次アナリティクス'),
+        ('weekly_advice', 'WEEKLY_ADVICE_SCHEDULE_CRON', '0 4 * * 1', '週次運営アドバイス'),
+        ('rollup_compaction', 'ROLLUP_COMPACTION_SCHEDULE_CRON', '30 4 * * *', '集計データのコンパクション'),
+    ]
+    
+    def __init__(self, firestore_client, discord_bot=None, content_creator: Optional[ContentCreator] = None):
+        self.bot = discord_bot
+        # 複数インスタンスで起動しても各ジョブはリースを取得した1インスタンスだけが実行
+        self.lease_manager = _create_lease_manager(firestore_client)
+        self.cron_scheduler = CronScheduler(tz=_load_timezone(), lease_manager=self.lease_manager)
+        self.cron_scheduler.set_group_limit(
+            FIRESTORE_SCAN_GROUP, int(os.getenv('SCHEDULER_SCAN_CONCURRENCY', '1'))
+        )
+        self.scheduler = WeeklyContentScheduler(firestore_client, discord_bot, self.cron_scheduler, content_creator)
+        self.compactor = RollupCompactor(firestore_client)
         self.commands_enabled = True
+        self._register_jobs()
+    
+    async def run_weekly_exclusive(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """定期実行と同じリースを保持して週次コンテンツ制作を実行（手動実行用）
+
+        定期実行・他のインスタンス・別の手動実行が保持中なら LeaseBusyError
+        """
+        if not self.lease_manager:
+            return await func()
+        return await self.lease_manager.run_exclusive(f"{self.cron_scheduler.lease_prefix}{WEEKLY_JOB_NAME}", func)
+    
+    def _job_functions(self) -> Dict[str, Callable[[], Awaitable[Dict[str, Any]]]]:
+        functions = {'rollup_compaction': self.compactor.run}
+        if self.bot is not None:
+            functions['daily_analytics'] = self._run_daily_analytics
+            functions['weekly_advice'] = self._run_weekly_advice
+        return functions
+    
+    def _register_jobs(self):
+        """定期ジョブを登録（スケジュール開始は start_scheduler で週次ジョブと一緒に行う）"""
+        functions = self._job_functions()
+        for name, env_name, default_cron, description in self.JOB_DEFINITIONS:
+            expression = os.getenv(env_name, default_cron)
+            if name not in functions or expression.lower() == 'off':
+                continue
+            try:
+                self.cron_scheduler.add_job(
+                    name, CronExpression(expression), _require_success(functions[name]),
+                    jitter_seconds=self.scheduler.jitter_seconds,
+                    misfire_grace_seconds=self.scheduler.misfire_grace_seconds,
+                    resource_group=FIRESTORE_SCAN_GROUP,
+                    description=description
+                )
+                logger.info(f"📅 定期ジョブ登録: {name} (cron: {expression})")
+            except ValueError as e:
+                logger.error(f"❌ 定期ジョブ登録エラー ({name}): {e}")
+    
+    async def _run_daily_analytics(self) -> Dict[str, Any]:
+        # 深夜に前日（UTC）の1日分を集計する
+        yesterday = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=1)).date()
+        return await self.bot.daily_analytics.run_daily_analytics(yesterday)
+    
+    async def _run_weekly_advice(self) -> Dict[str, Any]:
+        return await self.bot.generate_weekly_advice()
     
     async def handle_scheduler_command(self, message, command_parts: List[str]) -> str:
         """スケジューラー関連のコマンドを処理"""
@@ -303,21 +397,39 @@ class SchedulerManager:
                 return "✅ スケジューラーを開始しました" if success else "❌ スケジューラー開始に失敗しました"
             
             elif action == 'stop':
-                success = self.scheduler.stop_scheduler()
+                success = await self.scheduler.stop_scheduler()
                 return "✅ スケジューラーを停止しました" if success else "❌ スケジューラー停止に失敗しました"
             
             elif action == 'status':
                 status = self.scheduler.get_status()
+                status['lease_holder'] = self.lease_manager.holder_id if self.lease_manager else None
                 return self._format_status(status)
             
+            elif action == 'run' and len(command_parts) >= 3 and command_parts[2] != WEEKLY_JOB_NAME:
+                job_name = command_parts[2]
+                if job_name not in self.cron_scheduler.jobs:
+                    return f"❌ 未登録のジョブ: {job_name}"
+                await self.cron_scheduler.run_now(job_name)
+                return f"✅ 手動実行完了: {job_name}"
+            
             elif action == 'run':
-                result = await self.scheduler.run_manual_task()
+                try:
+                    result = await self.run_weekly_exclusive(self.scheduler.run_manual_task)
+                except LeaseBusyError:
+                    return "⏳ 週次コンテンツ制作は別の実行（定期実行・他のインスタンス・!summary）が実行中です"
+                if result.get('already_completed'):
+                    return "⏭️ 今週の週次コンテンツは作成済みです（作り直す場合は `!summary force`）"
                 return "✅ 手動実行完了" if result['success'] else f"❌ 手動実行失敗: {result.get('error', 'Unknown error')}"
             
             elif action == 'logs':
                 logs = await self.scheduler.get_recent_logs(5)
                 return self._format_logs(logs)
             
+            elif action == 'set' and len(command_parts) >= 3 and command_parts[2].lower() == 'cron':
+                expression = ' '.join(command_parts[3:]).strip('"\'`')
+                success = self.scheduler.update_schedule(cron=expression)
+                return f"✅ スケジュール更新: cron '{expression}'" if success else "❌ スケジュール更新に失敗しました（cron式を確認してください）"
+            
             elif action == 'set' and len(command_parts) >= 4:
                 day = command_parts[2]
                 time = command_parts[3]
@@ -336,21 +448,44 @@ class SchedulerManager:
 `!scheduler start` - スケジューラー開始
 `!scheduler stop` - スケジューラー停止  
 `!scheduler status` - 状態確認
-`!scheduler run` - 手動実行
+`!scheduler run [ジョブ名]` - 手動実行（省略時は週次コンテンツ）
 `!scheduler logs` - 実行ログ表示
 `!scheduler set <曜日> <時刻>` - スケジュール設定
-例: `!scheduler set monday 09:00`"""
+`!scheduler set cron <分 時 日 月 曜日>` - cron式でスケジュール設定
+例: `!scheduler set monday 09:00` / `!scheduler set cron 0 9 * * 1`"""
     
     def _format_status(self, status: Dict[str, Any]) -> str:
         """状態情報をフォーマット"""
         running_text = "✅ 実行中" if status['is_running'] else "⏹️ 停止中"
         next_run_text = status['next_run'] if status['next_run'] else "未設定"
         
-        return f"""📅 スケジューラー状態:
+        lines = [f"""📅 スケジューラー状態:
 状態: {running_text}
-設定: 毎週{status['schedule_day']} {status['schedule_time']}
+設定: {status['schedule_text']}
 次回実行: {next_run_text}
-登録ジョブ数: {status['jobs_count']}"""
+登録ジョブ数: {status['jobs_count']}
+スキップ（実行遅延）: {status['misfire_count']}回
+リース: {status.get('lease_holder') or '未使用'}""", "", "🗂️ ジョブ一覧:"]
+        
+        for job in status.get('jobs', []):
+            if job['running']:
+                state_icon = "🔄"
+            elif job['waiting']:
+                state_icon = "⏳"
+            elif job['last_error']:
+                state_icon = "❌"
+            else:
+                state_icon = "✅" if job['last_run'] else "💤"
+            line = f"{state_icon} `{job['name']}` ({job['cron']}) 次回: {job['next_run'] or '未設定'}"
+            if job['lease_skip_count']:
+                line += f" / 他インスタンス実行 {job['lease_skip_count']}回"
+            if job['last_duration_seconds'] is not None:
+                line += f" / 前回 {job['last_duration_seconds']:.1f}秒"
+            if job['last_error']:
+                line += f" / エラー: {job['last_error'][:80]}"
+            lines.append(line)
+        
+        return "\n".join(lines)
     
     def _format_logs(self, logs: List[Dict[str, Any]]) -> str:
         """ログ情報をフォーマット"""
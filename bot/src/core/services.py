@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+services.py
+Discordエンタメコンテンツ制作アプリ - サービスコンテナ
+
+Bot・コンテンツ制作・スケジューラーがそれぞれ DiscordAnalytics や PodcastGenerator、
+Drive / TTS クライアントを作っていたため、各サービスを1つだけ作って共有する
+- 各サービスは初回利用時に生成（起動時には作らない）
+- Firestoreクライアントを正規化して全サービスに同じものを渡す
+- 生成にかかった時間を記録（コールドスタートの内訳確認用）
+- 各サービスのモジュール（Vertex AI・TTS・Google Drive・Firebase のSDKを含む）は
+  初回アクセス時にimportする（起動時のimport時間を減らすため）
+"""
+
+import logging
+import time
+from typing import Optional, Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """サービスを遅延生成して共有するコンテナ"""
+
+    def __init__(self, firestore_client, discord_bot=None):
+        self._raw_firestore = firestore_client
+        self.bot = discord_bot
+        self._services: Dict[str, Any] = {}
+        # サービス名 -> 生成にかかった秒数
+        self.init_seconds: Dict[str, float] = {}
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        """サービスを取得（未生成なら生成して保持）"""
+        if name not in self._services:
+            started = time.perf_counter()
+            self._services[name] = factory()
+            self.init_seconds[name] = round(time.perf_counter() - started, 3)
+            logger.info(f"🧩 サービス初期化: {name} ({self.init_seconds[name]:.2f}秒)")
+        return self._services[name]
+
+    def get_if_created(self, name: str) -> Optional[Any]:
+        """生成済みの場合のみサービスを取得（終了処理などで新たに生成しないため）"""
+        return self._services.get(name)
+
+    @property
+    def firestore(self):
+        """Firestoreクライアント（FirestoreManager が渡された場合は中のクライアント）"""
+        db = self._raw_firestore
+        if db is None or hasattr(db, 'collection'):
+            return db
+        return getattr(db, 'db', None)
+
+    @property
+    def analytics(self):
+        from .discord_analytics import DiscordAnalytics
+        return self._get('analytics', lambda: DiscordAnalytics(self.firestore))
+
+    @property
+    def daily_analytics(self):
+        from .daily_analytics import DailyAnalytics
+        return self._get('daily_analytics', lambda: DailyAnalytics(self.bot, self.firestore))
+
+    @property
+    def podcast_generator(self):
+        from .podcast import PodcastGenerator
+        return self._get('podcast_generator', lambda: PodcastGenerator(self.firestore))
+
+    @property
+    def content_creator(self):
+        from .content_creator import ContentCreator
+        return self._get('content_creator', lambda: ContentCreator(
+            self.firestore, self.bot,
+            analytics=self.analytics,
+            podcast_generator=self.podcast_generator
+        ))
+
+    @property
+    def scheduler_manager(self):
+        from .scheduler import SchedulerManager
+        return self._get('scheduler_manager', lambda: SchedulerManager(
+            self.firestore, self.bot, content_creator=self.content_creator
+        ))
+
+    def get_status(self) -> Dict[str, Any]:
+        """生成済みサービスと生成時間"""
+        return {
+            'initialized': list(self.init_seconds),
+            'init_seconds': dict(self.init_seconds)
+        }
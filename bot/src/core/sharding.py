@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+sharding.py
+Discordエンタメコンテンツ制作アプリ - シャード設定と状態管理
+
+ギルド数が増えると1つのゲートウェイ接続（シャード）のイベント処理が追いつかなくなるため、
+AutoShardedClient で複数シャードに分けて接続する
+- DISCORD_SHARD_COUNT 未設定: シャード数は Discord の推奨値に任せて1プロセスで全シャードを担当
+- DISCORD_SHARD_IDS（例: 0-3 / 0,2,4）: このプロセスが担当するシャード（複数プロセスで分担する場合）
+- シャードごとの接続状態・切断回数・メッセージ数・担当ギルド数を記録し、ヘルスチェックとメトリクスに出す
+"""
+
+import os
+import math
+import time
+from typing import Optional, Dict, Any, List, Callable
+
+from utils.metrics import registry
+
+SHARD_UP = registry.gauge(
+    'nyanco_shard_up', 'シャードがゲートウェイに接続済みか（1/0）', ['shard'])
+SHARD_GUILDS = registry.gauge(
+    'nyanco_shard_guilds', 'シャードが担当するギルド数', ['shard'])
+SHARD_LATENCY = registry.gauge(
+    'nyanco_shard_latency_seconds', 'シャードのハートビート遅延（秒）', ['shard'])
+SHARD_DISCONNECTS = registry.counter(
+    'nyanco_shard_disconnects_total', 'シャードの切断回数', ['shard'])
+SHARD_MESSAGES = registry.counter(
+    'nyanco_shard_messages_total', 'シャードが受信したメッセージ数', ['shard'])
+
+# シャードの状態
+SHARD_CONNECTING = 'connecting'
+SHARD_CONNECTED = 'connected'
+SHARD_READY = 'ready'
+SHARD_DISCONNECTED = 'disconnected'
+
+
+def parse_shard_ids(spec: str) -> Optional[List[int]]:
+    """シャードIDの指定（例: "0-3", "0,2,4", "0-1,4"）をリストに変換（空ならNone）"""
+    spec = (spec or '').strip()
+    if not spec:
+        return None
+    shard_ids = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (int(value) for value in part.split('-', 1))
+            if start > end:
+                raise ValueError(f"シャードIDの範囲が不正です: {part}")
+            shard_ids.update(range(start, end + 1))
+        else:
+            shard_ids.add(int(part))
+    return sorted(shard_ids)
+
+
+def shard_options(shard_count: Optional[str] = None, shard_ids: Optional[str] = None) -> Dict[str, Any]:
+    """AutoShardedClient に渡すシャード設定（環境変数から）"""
+    shard_count = os.getenv('DISCORD_SHARD_COUNT', '') if shard_count is None else shard_count
+    shard_ids = os.getenv('DISCORD_SHARD_IDS', '') if shard_ids is None else shard_ids
+
+    options: Dict[str, Any] = {}
+    if shard_count.strip():
+        options['shard_count'] = int(shard_count)
+        if options['shard_count'] < 1:
+            raise ValueError("DISCORD_SHARD_COUNT は1以上を指定してください")
+    ids = parse_shard_ids(shard_ids)
+    if ids is not None:
+        if 'shard_count' not in options:
+            raise ValueError("DISCORD_SHARD_IDS を指定する場合は DISCORD_SHARD_COUNT も必要です")
+        out_of_range = [shard_id for shard_id in ids if shard_id < 0 or shard_id >= options['shard_count']]
+        if out_of_range:
+            raise ValueError(f"シャード数 {options['shard_count']} の範囲外のシャードID: {out_of_range}")
+        options['shard_ids'] = ids
+    return options
+
+
+class ShardTracker:
+    """シャードごとの接続状態の記録"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._shards: Dict[int, Dict[str, Any]] = {}
+
+    def _state(self, shard_id: int) -> Dict[str, Any]:
+        state = self._shards.get(shard_id)
+        if state is None:
+            state = self._shards[shard_id] = {
+                'status': SHARD_CONNECTING,
+                'connected_at': None,
+                'ready_at': None,
+                'last_disconnect_at': None,
+                'disconnects': 0,
+                'resumes': 0,
+                'messages': 0
+            }
+        return state
+
+    def _set_up(self, shard_id: int, up: bool):
+        SHARD_UP.set(1 if up else 0, shard=str(shard_id))
+
+    def connected(self, shard_id: int):
+        state = self._state(shard_id)
+        state['status'] = SHARD_CONNECTED
+        state['connected_at'] = self.clock()
+        self._set_up(shard_id, True)
+
+    def ready(self, shard_id: int):
+        state = self._state(shard_id)
+        state['status'] = SHARD_READY
+        state['ready_at'] = self.clock()
+        self._set_up(shard_id, True)
+
+    def resumed(self, shard_id: int):
+        state = self._state(shard_id)
+        state['status'] = SHARD_READY
+        state['resumes'] += 1
+        self._set_up(shard_id, True)
+
+    def disconnected(self, shard_id: int):
+        state = self._state(shard_id)
+        state['status'] = SHARD_DISCONNECTED
+        state['last_disconnect_at'] = self.clock()
+        state['disconnects'] += 1
+        SHARD_DISCONNECTS.inc(shard=str(shard_id))
+        self._set_up(shard_id, False)
+
+    def message(self, shard_id: int):
+        self._state(shard_id)['messages'] += 1
+        SHARD_MESSAGES.inc(shard=str(shard_id))
+
+    def snapshot(self, latencies: Optional[Dict[int, float]] = None,
+                 guild_counts: Optional[Dict[int, int]] = None) -> List[Dict[str, Any]]:
+        """シャードごとの状態（ゲージも最新の遅延・ギルド数に更新）"""
+        latencies = latencies or {}
+        guild_counts = guild_counts or {}
+        result = []
+        for shard_id in sorted(set(self._shards) | set(latencies)):
+            state = self._state(shard_id)
+            latency = latencies.get(shard_id)
+            if latency is not None and (math.isnan(latency) or math.isinf(latency)):
+                latency = None
+            guilds = guild_counts.get(shard_id, 0)
+            SHARD_GUILDS.set(guilds, shard=str(shard_id))
+            if latency is not None:
+                SHARD_LATENCY.set(latency, shard=str(shard_id))
+            result.append({
+                'shard_id': shard_id,
+                'status': state['status'],
+                'up': state['status'] in (SHARD_CONNECTED, SHARD_READY),
+                'latency_seconds': round(latency, 4) if latency is not None else None,
+                'guilds': guilds,
+                'messages': state['messages'],
+                'disconnects': state['disconnects'],
+                'resumes': state['resumes'],
+                'last_disconnect_at': state['last_disconnect_at']
+            })
+        return result
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+読み上げ用テキスト正規化・SSML生成のベンチマークスクリプト
+事前コンパイル版の実装と、従来の逐次 re.sub / 文字列連結版の実装を比較します
+
+使い方:
+    python src/scripts/benchmark_tts_text.py [--iterations 200]
+"""
+
+import os
+import re
+import sys
+import timeit
+import argparse
+
+# プロジェクトのsrcディレクトリをPythonパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.podcast import PodcastGenerator
+
+
+def legacy_clean_text_for_tts(characters, content, remove_character_names=True):
+    """従来の clean_text_for_tts（呼び出しごとに正規表現を組み立てる版）"""
+    content = re.sub(r'\*\*(.*?)\*\*', r'\1', content)
+    if remove_character_names:
+        content = re.sub(f"{characters['miya']['emoji']} {characters['miya']['name']}: ", '', content)
+        content = re.sub(f"{characters['eve']['emoji']} {characters['eve']['name']}: ", '', content)
+        content = re.sub(f"{characters['miya']['name']}: ", '', content)
+        content = re.sub(f"{characters['eve']['name']}: ", '', content)
+    content = re.sub(r'[🐈🐱😺👋👥🗑️📅📊📝🔥🎉❌⚠️✅]', '', content)
+    content = re.sub(r'#(\w+)', r'\1チャンネル', content)
+    content = re.sub(r'@(\w+)', r'\1', content)
+    content = re.sub(r'\n\n+', '。 ', content)
+    content = re.sub(r'\n', '、', content)
+    content = re.sub(r'[。、]+', '。', content)
+    content = re.sub(r'にゃ〜ん', 'にゃーん', content)
+    content = re.sub(r'だにゃ〜', 'だにゃー', content)
+    content = re.sub(r'ですにゃ〜', 'ですにゃー', content)
+    content = re.sub(r'にゃ〜', 'にゃー', content)
+    content = re.sub(r'！{2,}', '！', content)
+    content = re.sub(r'。\s+', '。', content)
+    content = re.sub(r'、\s+', '、', content)
+    return content.strip()
+
+
+def legacy_create_full_conversation_ssml(generator, content):
+    """従来の create_full_conversation_ssml（行ごとに正規表現を組み立て、+= で連結する版）"""
+    characters = generator.characters
+    ssml = '<speak>'
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            ssml += '<break time="300ms"/>'
+            continue
+        if characters['miya']['name'] in line:
+            speech = re.sub(f".*{characters['miya']['name']}.*?:\\s*", '', line)
+            speech = legacy_clean_text_for_tts(characters, speech, remove_character_names=False)
+            if speech:
+                emotion = generator.detect_emotion_from_content(speech, 'miya')
+                ssml += '<prosody rate="1.2" pitch="+0.5st" volume="medium">'
+                if emotion == 'excited':
+                    ssml += '<prosody rate="1.3" pitch="+1.5st">'
+                elif emotion == 'curious':
+                    ssml += '<prosody rate="1.25" pitch="+1.0st">'
+                elif emotion == 'calm':
+                    ssml += '<prosody rate="1.15" pitch="+0.2st">'
+                speech_adjusted = re.sub(r'にゃー+', '<prosody pitch="+1.0st">にゃー</prosody>', speech)
+                if '！' in speech or 'ありがとう' in speech or '楽しみ' in speech:
+                    ssml += f'<emphasis level="strong">{speech_adjusted}</emphasis>'
+                else:
+                    ssml += speech_adjusted
+                if emotion in ['excited', 'curious', 'calm']:
+                    ssml += '</prosody>'
+                ssml += '</prosody>'
+                ssml += '<break time="500ms"/>'
+        elif characters['eve']['name'] in line:
+            speech = re.sub(f".*{characters['eve']['name']}.*?:\\s*", '', line)
+            speech = legacy_clean_text_for_tts(characters, speech, remove_character_names=False)
+            if speech:
+                emotion = generator.detect_emotion_from_content(speech, 'eve')
+                ssml += '<prosody rate="1.0" pitch="-1.5st" volume="medium">'
+                if emotion == 'analytical':
+                    ssml += '<prosody rate="0.95" pitch="-2.0st">'
+                elif emotion == 'thoughtful':
+                    ssml += '<prosody rate="0.9" pitch="-1.8st">'
+                elif emotion == 'pleased':
+                    ssml += '<prosody rate="1.05" pitch="-1.0st">'
+                speech_adjusted = re.sub(r'にゃー+', '<prosody pitch="-0.5st">にゃー</prosody>', speech)
+                if '数字' in speech or '統計' in speech or '分析' in speech:
+                    ssml += f'<emphasis level="moderate">{speech_adjusted}</emphasis>'
+                else:
+                    ssml += speech_adjusted
+                if emotion in ['analytical', 'thoughtful', 'pleased']:
+                    ssml += '</prosody>'
+                ssml += '</prosody>'
+                ssml += '<break time="800ms"/>'
+        else:
+            speech = legacy_clean_text_for_tts(characters, line, remove_character_names=False)
+            if speech:
+                ssml += f'<prosody rate="1.0" pitch="0st" volume="medium">{speech}</prosody>'
+                ssml += '<break time="800ms"/>'
+    ssml += '</speak>'
+    return ssml
+
+
+def build_sample_script(generator) -> str:
+    """ベンチマーク用の台本を生成"""
+    analysis = {
+        'total_interactions': 150,
+        'popular_keywords': [('python', 42), ('react', 30), ('firebase', 12)],
+        'tech_mentions': {'python': 42, 'react': 30, 'firebase': 12},
+        'channel_activity': {'general': 80, 'dev': 50},
+        'user_activity': {'alice': 20, 'bob': 15, 'carol': 9},
+    }
+    events = [{'status': 'scheduled', 'name': 'もくもく会', 'userCount': 12}]
+    return generator.generate_podcast_content(analysis, events)
+
+
+def report(label: str, legacy_seconds: float, compiled_seconds: float, iterations: int):
+    """結果を表示"""
+    speedup = legacy_seconds / compiled_seconds if compiled_seconds else float('inf')
+    print(f"{label}:")
+    print(f"   従来版      : {legacy_seconds / iterations * 1000:.3f} ms/回")
+    print(f"   コンパイル版: {compiled_seconds / iterations * 1000:.3f} ms/回")
+    print(f"   高速化      : {speedup:.2f}倍")
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description='読み上げ用テキスト処理のベンチマーク')
+    parser.add_argument('--iterations', type=int, default=200, help='各計測の繰り返し回数')
+    args = parser.parse_args()
+
+    generator = PodcastGenerator()
+    script = build_sample_script(generator)
+    lines = [line for line in script.split('\n') if line.strip()]
+
+    # 出力が従来版と一致することを確認
+    assert generator.clean_text_for_tts(script) == legacy_clean_text_for_tts(generator.characters, script)
+    assert generator.create_full_conversation_ssml(script) == legacy_create_full_conversation_ssml(generator, script)
+    print("✅ 出力が従来版と一致しました")
+
+    report(
+        "clean_text_for_tts（台本全体）",
+        timeit.timeit(lambda: legacy_clean_text_for_tts(generator.characters, script), number=args.iterations),
+        timeit.timeit(lambda: generator.clean_text_for_tts(script), number=args.iterations),
+        args.iterations
+    )
+    report(
+        "clean_text_for_tts（1行ずつ）",
+        timeit.timeit(lambda: [legacy_clean_text_for_tts(generator.characters, line) for line in lines], number=args.iterations),
+        timeit.timeit(lambda: [generator.clean_text_for_tts(line) for line in lines], number=args.iterations),
+        args.iterations
+    )
+    report(
+        "create_full_conversation_ssml",
+        timeit.timeit(lambda: legacy_create_full_conversation_ssml(generator, script), number=args.iterations),
+        timeit.timeit(lambda: generator.create_full_conversation_ssml(script), number=args.iterations),
+        args.iterations
+    )
+
+
+if __name__ == "__main__":
+    main()
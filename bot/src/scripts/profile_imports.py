@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bot起動時のimport時間を計測するスクリプト
+新しいインタプリタで `python -X importtime` を実行し、時間のかかっているモジュールを表示します
+
+使い方:
+    python src/scripts/profile_imports.py [--top 15] [--with-services]
+
+--with-services を付けると、初回利用時にimportされるサービス
+（Vertex AI・TTS・Google Drive を使うモジュール）も含めて計測します
+"""
+
+import os
+import sys
+import argparse
+
+# プロジェクトのsrcディレクトリをPythonパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.importtime import profile_imports, format_summary
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# run_entertainment_bot.py が起動時にimportするモジュール
+STARTUP_MODULES = ['core.entertainment_bot', 'utils.firestore', 'utils.health']
+
+# ServiceContainer が初回利用時にimportするモジュール
+SERVICE_MODULES = [
+    'core.discord_analytics', 'core.daily_analytics', 'core.podcast',
+    'core.content_creator', 'core.scheduler'
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bot起動時のimport時間を計測')
+    parser.add_argument('--top', type=int, default=15, help='表示する件数')
+    parser.add_argument('--with-services', action='store_true', help='遅延importされるサービスも計測')
+    args = parser.parse_args(argv)
+
+    summary = profile_imports(STARTUP_MODULES, SRC_DIR, args.top)
+    if summary is None:
+        print("❌ import時間を取得できませんでした")
+        return 1
+    print(format_summary(summary, "起動時のimport"))
+
+    if args.with_services:
+        summary = profile_imports(STARTUP_MODULES + SERVICE_MODULES, SRC_DIR, args.top)
+        if summary:
+            print()
+            print(format_summary(summary, "サービス初期化後までのimport"))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
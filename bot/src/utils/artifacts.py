@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+artifacts.py
+Discord にゃんこエージェント - 生成物（音声・テキスト）のメモリ上バッファ
+
+週次コンテンツの音声やテキストをカレントディレクトリに書き出さず、
+そのままアップロード処理に渡すためのバッファ
+- 一定サイズまではメモリ上、超えた分は一時ファイルに退避（SpooledTemporaryFile）
+- 実行ごとに一意な名前を付け、同時実行時のファイル名衝突を防ぐ
+"""
+
+import os
+import uuid
+import datetime
+import tempfile
+from typing import Optional, BinaryIO
+
+# メモリ上に保持する最大サイズ（超えると一時ファイルに退避）
+ARTIFACT_SPOOL_MAX_BYTES = int(os.getenv('ARTIFACT_SPOOL_MAX_MB', '32')) * 1024 * 1024
+
+
+def new_run_id() -> str:
+    """実行ごとに一意なID（タイムスタンプ + ランダム文字列）"""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{timestamp}_{uuid.uuid4().hex[:8]}"
+
+
+class Artifact:
+    """アップロード対象の生成物"""
+
+    def __init__(self, name: str, mimetype: str, data: Optional[bytes] = None,
+                 max_memory_bytes: int = ARTIFACT_SPOOL_MAX_BYTES):
+        self.name = name
+        self.mimetype = mimetype
+        self._buffer = tempfile.SpooledTemporaryFile(max_size=max_memory_bytes)
+        self.size = 0
+        # チェックポイントに保存した場合の内容ハッシュ
+        self.sha256: Optional[str] = None
+        if data:
+            self.write(data)
+
+    @classmethod
+    def from_text(cls, name: str, text: str, mimetype: str = 'text/plain') -> 'Artifact':
+        """テキストから生成物を作成（UTF-8）"""
+        return cls(name, mimetype, text.encode('utf-8'))
+
+    def write(self, data: bytes):
+        """末尾にデータを追記"""
+        self._buffer.seek(0, os.SEEK_END)
+        self._buffer.write(data)
+        self.size += len(data)
+
+    def stream(self) -> BinaryIO:
+        """先頭に巻き戻したストリームを取得（アップロード用）"""
+        self._buffer.seek(0)
+        return self._buffer
+
+    def close(self):
+        """バッファを解放"""
+        self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -10,6 +10,7 @@ Firestoreデータベースの操作を統合
 - テストデータの管理
 """
 
+import logging
 import os
 import json
 import asyncio
@@ -19,6 +20,8 @@ import firebase_admin
 from firebase_admin import credentials, firestore
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # エンターテイメントボット用の独立した初期化関数
 async def initialize_firebase():
     """
@@ -30,13 +33,13 @@ async def initialize_firebase():
     try:
         manager = FirestoreManager()
         if manager.db:
-            print("✅ Firebase Firestore初期化完了（エンターテイメントボット用）")
+            logger.info("✅ Firebase Firestore初期化完了（エンターテイメントボット用）")
             return manager
         else:
-            print("❌ Firebase Firestore初期化失敗")
+            logger.error("❌ Firebase Firestore初期化失敗")
             return None
     except Exception as e:
-        print(f"❌ Firebase初期化エラー: {e}")
+        logger.error(f"❌ Firebase初期化エラー: {e}")
         return None
 
 class FirestoreManager:
@@ -56,10 +59,10 @@ class FirestoreManager:
                                    './nyanco-bot-firebase-adminsdk-fbsvc-d65403c7ca.json')
                 
                 if os.path.exists(key_path):
-                    print(f"🔑 Firebaseサービスアカウントキーファイルを読み込み中: {key_path}")
+                    logger.info(f"🔑 Firebaseサービスアカウントキーファイルを読み込み中: {key_path}")
                     cred = credentials.Certificate(key_path)
                 elif os.getenv('FIREBASE_SERVICE_ACCOUNT'):
-                    print("🔑 環境変数からFirebaseサービスアカウント情報を読み込み中...")
+                    logger.info("🔑 環境変数からFirebaseサービスアカウント情報を読み込み中...")
                     service_account_info = json.loads(os.getenv('FIREBASE_SERVICE_ACCOUNT'))
                     cred = credentials.Certificate(service_account_info)
                 else:
@@ -68,11 +71,11 @@ class FirestoreManager:
                 firebase_admin.initialize_app(cred)
             
             self.db = firestore.client()
-            print("✅ Firebase Firestoreへの接続準備ができました。")
+            logger.info("✅ Firebase Firestoreへの接続準備ができました。")
             return True
             
         except Exception as e:
-            print(f"❌ Firebase Firestoreの初期化に失敗しました: {e}")
+            logger.error(f"❌ Firebase Firestoreの初期化に失敗しました: {e}")
             return False
     
     async def get_user_data(self, user_id: str) -> Optional[Dict[str, Any]]:
@@ -84,7 +87,7 @@ class FirestoreManager:
             doc = await asyncio.to_thread(self.db.collection('users').doc(user_id).get)
             return doc.to_dict() if doc.exists else None
         except Exception as e:
-            print(f"❌ ユーザーデータ取得エラー: {e}")
+            logger.error(f"❌ ユーザーデータ取得エラー: {e}")
             return None
     
     async def update_user_data(self, user_id: str, data: Dict[str, Any]) -> bool:
@@ -99,7 +102,7 @@ class FirestoreManager:
             )
             return True
         except Exception as e:
-            print(f"❌ ユーザーデータ更新エラー: {e}")
+            logger.error(f"❌ ユーザーデータ更新エラー: {e}")
             return False
     
     async def record_interaction(self, user_id: str, interaction_type: str, content: str) -> bool:
@@ -121,7 +124,7 @@ class FirestoreManager:
             )
             return True
         except Exception as e:
-            print(f"❌ インタラクション記録エラー: {e}")
+            logger.error(f"❌ インタラクション記録エラー: {e}")
             return False
     
     async def get_user_interactions(self, user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
@@ -138,7 +141,7 @@ class FirestoreManager:
             docs = await asyncio.to_thread(interactions_ref.get)
             return [doc.to_dict() for doc in docs]
         except Exception as e:
-            print(f"❌ インタラクション取得エラー: {e}")
+            logger.error(f"❌ インタラクション取得エラー: {e}")
             return []
     
     async def add_test_data(self, data: Dict[str, Any]) -> bool:
@@ -156,7 +159,7 @@ class FirestoreManager:
             await asyncio.to_thread(batch.commit)
             return True
         except Exception as e:
-            print(f"❌ テストデータ追加エラー: {e}")
+            logger.error(f"❌ テストデータ追加エラー: {e}")
             return False
     
     async def delete_test_data(self, user_id: str) -> bool:
@@ -181,7 +184,7 @@ class FirestoreManager:
             await asyncio.to_thread(batch.commit)
             return True
         except Exception as e:
-            print(f"❌ テストデータ削除エラー: {e}")
+            logger.error(f"❌ テストデータ削除エラー: {e}")
             return False
     
     async def export_data(self, output_file: str) -> bool:
@@ -210,10 +213,10 @@ class FirestoreManager:
             with open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(export_data, f, ensure_ascii=False, indent=2)
             
-            print(f"✅ データをエクスポート: {output_file}")
+            logger.info(f"✅ データをエクスポート: {output_file}")
             return True
         except Exception as e:
-            print(f"❌ データエクスポートエラー: {e}")
+            logger.error(f"❌ データエクスポートエラー: {e}")
             return False
     
     async def import_data(self, input_file: str) -> bool:
@@ -239,10 +242,10 @@ class FirestoreManager:
                 batch.set(doc_ref, interaction)
             
             await asyncio.to_thread(batch.commit)
-            print(f"✅ データをインポート: {input_file}")
+            logger.info(f"✅ データをインポート: {input_file}")
             return True
         except Exception as e:
-            print(f"❌ データインポートエラー: {e}")
+            logger.error(f"❌ データインポートエラー: {e}")
             return False
 
 async def main():
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+firestore_metrics.py
+Discord にゃんこエージェント - Firestore操作の計測
+
+Firestoreクライアントをラップし、get / stream / add / set / update / delete の
+回数と所要時間をコレクション・操作ごとに記録する
+- トレースの実行中は各操作を子スパンとしても記録する
+- collection() / document() / where() などで得たオブジェクトもラップして
+  コレクション名を引き継ぐ
+- それ以外の属性（transaction, batch など）は元のオブジェクトをそのまま返す
+"""
+
+from typing import Any, Iterator
+
+from utils.metrics import FIRESTORE_OPERATIONS, FIRESTORE_DURATION, track
+from utils.tracing import tracer
+
+# 結果を返す（=RPCを行う）操作
+_OPERATIONS = frozenset(['get', 'add', 'set', 'update', 'delete', 'create'])
+
+# 結果をストリームで返す操作（読み切るまでを計測）
+_STREAM_OPERATIONS = frozenset(['stream'])
+
+# 参照・クエリを組み立てる操作（結果もラップする）
+_BUILDERS = frozenset([
+    'collection', 'document', 'where', 'order_by', 'limit', 'limit_to_last', 'offset',
+    'select', 'start_at', 'start_after', 'end_at', 'end_before', 'collection_group'
+])
+
+
+def _collection_label(target: Any, fallback: str) -> str:
+    """ドキュメントIDを除いたコレクションのパス（例: guilds/members）"""
+    path = getattr(target, '_path', None)
+    if isinstance(path, tuple) and path:
+        # コレクション・ドキュメントが交互に並ぶため偶数番目がコレクション
+        return '/'.join(str(part) for part in path[::2])
+    return fallback
+
+
+class InstrumentedFirestore:
+    """操作を計測するFirestoreオブジェクトのラッパー"""
+
+    def __init__(self, target: Any, collection: str = '-'):
+        self._target = target
+        self._collection = collection
+
+    @property
+    def wrapped(self) -> Any:
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        if name in _BUILDERS:
+            return self._builder(name, attr)
+        if name in _OPERATIONS:
+            return self._operation(name, attr)
+        if name in _STREAM_OPERATIONS:
+            return self._stream(name, attr)
+        return attr
+
+    def _builder(self, name: str, method):
+        def build(*args, **kwargs):
+            result = method(*args, **kwargs)
+            collection = self._collection
+            if name in ('collection', 'collection_group') and args:
+                collection = _collection_label(result, str(args[0]))
+            return InstrumentedFirestore(result, collection)
+        return build
+
+    def _operation(self, name: str, method):
+        def run(*args, **kwargs):
+            with tracer.child_span(f"firestore.{name}", collection=self._collection), \
+                    track(FIRESTORE_OPERATIONS, FIRESTORE_DURATION, collection=self._collection, op=name):
+                return method(*args, **kwargs)
+        return run
+
+    def _stream(self, name: str, method):
+        def run(*args, **kwargs) -> Iterator[Any]:
+            with tracer.child_span(f"firestore.{name}", activate=False, collection=self._collection), \
+                    track(FIRESTORE_OPERATIONS, FIRESTORE_DURATION, collection=self._collection, op=name):
+                yield from method(*args, **kwargs)
+        return run
+
+    def __repr__(self) -> str:
+        return f"InstrumentedFirestore({self._target!r})"
+
+
+def instrument_firestore(client: Any) -> Any:
+    """Firestoreクライアントを計測用にラップ（ラップ済み・None はそのまま返す）"""
+    if client is None or isinstance(client, InstrumentedFirestore):
+        return client
+    return InstrumentedFirestore(client)
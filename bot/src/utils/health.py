@@ -5,50 +5,142 @@ health.py
 Discord にゃんこエージェント - ヘルスチェックユーティリティ
 
 ヘルスチェックと監視を統合
-- ヘルスチェックサーバー
-- システム状態の監視
+- ヘルスチェック・メトリクスサーバー（Botのイベントループ上で動作）
+- システム状態の監視（/proc・cgroup を直接読む）
 - ログ管理
 """
 
 import os
 import json
+import math
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+import secrets
+import threading
+from typing import Dict, Any, Optional, List
 from datetime import datetime
 import aiohttp
 from aiohttp import web
 from dotenv import load_dotenv
 
-# ロギングの設定
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from utils.metrics import registry
+from utils.loop_watchdog import LoopLagMonitor
+from utils.resource_sampler import ResourceSampler
+from utils.health_events import HealthEventLog, SEVERITY_WEIGHTS
+from utils.sampling_profiler import SamplingProfiler, ProfilerBusyError
+from utils.structured_logging import setup_logging
+
 logger = logging.getLogger('health')
 
+RESOURCE_GAUGES = {
+    'cpu_percent': registry.gauge('nyanco_process_cpu_percent', 'プロセスのCPU使用率（%）'),
+    'rss_bytes': registry.gauge('nyanco_process_resident_memory_bytes', 'プロセスの常駐メモリ（バイト）'),
+    'threads': registry.gauge('nyanco_process_threads', 'プロセスのスレッド数'),
+    'open_fds': registry.gauge('nyanco_process_open_fds', 'プロセスが開いているファイル数'),
+    'memory_percent': registry.gauge('nyanco_memory_usage_percent', 'メモリ使用率（コンテナの上限があればそれに対する割合）'),
+    'disk_percent': registry.gauge('nyanco_disk_usage_percent', 'ディスク使用率（%）')
+}
+
+# /ready が失敗とみなすイベントループ遅延（秒）
+HEALTH_MAX_LOOP_LAG_SECONDS = float(os.getenv('HEALTH_MAX_LOOP_LAG_SECONDS', '5'))
+
+# /ready が失敗とみなすゲートウェイのハートビート遅延（秒）
+HEALTH_MAX_GATEWAY_LATENCY_SECONDS = float(os.getenv('HEALTH_MAX_GATEWAY_LATENCY_SECONDS', '10'))
+
+# /profile に必要なトークン（未設定なら /profile は無効）
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+
+
 class HealthServer:
-    """ヘルスチェックサーバークラス"""
+    """ヘルスチェック・メトリクスサーバークラス
+
+    Botと同じイベントループ上で動作する（別スレッドは使わない）
+    - /health: 生存確認（プロセスとイベントループが応答しているか）
+    - /ready: Discordゲートウェイに全シャードが接続済みで、イベントループが詰まっていないか
+    - /metrics: Prometheus形式のメトリクス
+    - /profile: 指定秒数のサンプリングプロファイル（collapsed 形式、PROFILE_TOKEN が必要）
+    """
     
-    def __init__(self, host: str = '0.0.0.0', port: int = 8080):
+    def __init__(self, host: str = '0.0.0.0', port: Optional[int] = None,
+                 service: str = 'discord-nyanco-agent'):
         """初期化"""
         self.host = host
-        self.port = port
+        self.port = port or int(os.getenv('PORT', '8080'))
+        self.service = service
         self.app = web.Application()
         self.setup_routes()
         self.start_time = datetime.now()
         self.system_status = {
             'status': 'healthy',
             'uptime': 0,
-            'last_check': None,
-            'errors': []
+            'last_check': None
         }
+        # 直近のヘルスイベント（件数上限・時間枠付き、状態は時間とともに回復する）
+        self.events = HealthEventLog()
+        self.bot = None
+        self.loop_lag = LoopLagMonitor()
+        self.max_loop_lag_seconds = HEALTH_MAX_LOOP_LAG_SECONDS
+        self.max_gateway_latency_seconds = HEALTH_MAX_GATEWAY_LATENCY_SECONDS
+        self._runner: Optional[web.AppRunner] = None
     
     def setup_routes(self):
         """ルートの設定"""
+        self.app.router.add_get('/', self.index)
         self.app.router.add_get('/health', self.health_check)
+        self.app.router.add_get('/ready', self.ready)
+        self.app.router.add_get('/metrics', self.metrics)
         self.app.router.add_get('/status', self.get_status)
         self.app.router.add_post('/status', self.update_status)
+        self.app.router.add_get('/profile', self.profile)
+    
+    def attach_bot(self, bot):
+        """状態を報告するBot（discord.Client）を設定"""
+        self.bot = bot
+    
+    def _gateway_latency(self) -> Optional[float]:
+        """ゲートウェイのハートビート遅延（シャードごとの最大値、未接続のシャードがあればNone）"""
+        latencies = getattr(self.bot, 'latencies', None)
+        values = [latency for _, latency in latencies] if latencies else [getattr(self.bot, 'latency', None)]
+        if any(latency is None or math.isnan(latency) or math.isinf(latency) for latency in values):
+            return None
+        return max(values)
+    
+    def _shards(self) -> List[Dict[str, Any]]:
+        """シャードごとの状態（シャード対応のBotのみ）"""
+        shard_status = getattr(self.bot, 'shard_status', None)
+        return shard_status() if callable(shard_status) else []
+    
+    def readiness(self) -> Dict[str, Any]:
+        """レディネスの判定結果"""
+        loop_lag = self.loop_lag.current_lag()
+        connected = bool(self.bot) and self.bot.is_ready() and not self.bot.is_closed()
+        latency = self._gateway_latency()
+        shards = self._shards() if connected else []
+        checks = {
+            'bot_attached': self.bot is not None,
+            'gateway_connected': connected,
+            'shards_connected': connected and all(shard['up'] for shard in shards),
+            'gateway_latency_ok': latency is not None and latency <= self.max_gateway_latency_seconds,
+            'event_loop_ok': loop_lag <= self.max_loop_lag_seconds
+        }
+        return {
+            'ready': all(checks.values()),
+            'checks': checks,
+            'gateway_latency_seconds': latency,
+            'event_loop_lag_seconds': round(loop_lag, 4),
+            'shards': shards
+        }
+    
+    async def index(self, request: web.Request) -> web.Response:
+        """サービス概要"""
+        self.update_system_status()
+        return web.json_response({
+            'status': self.system_status['status'],
+            'service': self.service,
+            'uptime': self.system_status['uptime'],
+            **self.readiness(),
+            'event_loop_blocks': self.loop_lag.recent_blocks()
+        })
     
     async def health_check(self, request: web.Request) -> web.Response:
         """ヘルスチェックエンドポイント"""
@@ -60,7 +152,9 @@ class HealthServer:
             response = {
                 'status': self.system_status['status'],
                 'uptime': self.system_status['uptime'],
-                'last_check': self.system_status['last_check'].isoformat() if self.system_status['last_check'] else None
+                'last_check': self.system_status['last_check'].isoformat() if self.system_status['last_check'] else None,
+                'event_loop_lag_seconds': round(self.loop_lag.current_lag(), 4),
+                'health_score': round(self.events.score(), 3)
             }
             
             return web.json_response(response)
@@ -71,10 +165,74 @@ class HealthServer:
                 status=500
             )
     
+    async def ready(self, request: web.Request) -> web.Response:
+        """レディネスプローブ用（ゲートウェイ接続とイベントループ遅延を確認）"""
+        result = self.readiness()
+        return web.json_response(
+            {'status': 'ready' if result['ready'] else 'not ready', **result},
+            status=200 if result['ready'] else 503
+        )
+    
+    def metric_lines(self) -> List[str]:
+        """Prometheus形式のメトリクス行"""
+        result = self.readiness()
+        latency = result['gateway_latency_seconds']
+        lines = [
+            '# TYPE nyanco_uptime_seconds gauge',
+            f"nyanco_uptime_seconds {(datetime.now() - self.start_time).total_seconds():.3f}",
+            '# TYPE nyanco_bot_ready gauge',
+            f"nyanco_bot_ready {1 if result['ready'] else 0}",
+            '# TYPE nyanco_event_loop_lag_seconds gauge',
+            f"nyanco_event_loop_lag_seconds {result['event_loop_lag_seconds']}",
+            '# TYPE nyanco_event_loop_lag_max_seconds gauge',
+            f"nyanco_event_loop_lag_max_seconds {round(self.loop_lag.max_lag_seconds, 4)}",
+            '# TYPE nyanco_health_score gauge',
+            f"nyanco_health_score {round(self.events.score(), 3)}",
+            '# TYPE nyanco_gateway_latency_seconds gauge',
+            f"nyanco_gateway_latency_seconds {latency if latency is not None else 'NaN'}"
+        ]
+        if self.bot is not None and self.bot.is_ready():
+            lines += ['# TYPE nyanco_guilds gauge', f"nyanco_guilds {len(self.bot.guilds)}"]
+        return lines
+    
+    async def metrics(self, request: web.Request) -> web.Response:
+        """メトリクスエンドポイント（サーバー自身の値 + Firestore・Gemini・TTS・Drive・イベント処理）"""
+        return web.Response(
+            text='\n'.join(self.metric_lines()) + '\n' + registry.render(),
+            content_type='text/plain', charset='utf-8'
+        )
+    
+    async def profile(self, request: web.Request) -> web.Response:
+        """サンプリングプロファイル（?seconds=N&idle=1、トークンは ?token= か X-Profile-Token ヘッダー）"""
+        token = request.headers.get('X-Profile-Token') or request.query.get('token', '')
+        if not PROFILE_TOKEN or not secrets.compare_digest(token, PROFILE_TOKEN):
+            return web.json_response({'error': 'Forbidden'}, status=403)
+        try:
+            seconds = float(request.query.get('seconds', '10'))
+        except ValueError:
+            return web.json_response({'error': 'seconds must be a number'}, status=400)
+        
+        profiler = SamplingProfiler(
+            loop_thread_id=threading.get_ident(),
+            include_idle=request.query.get('idle') == '1'
+        )
+        try:
+            # 採取はワーカースレッドで行い、その間もループ（Bot）は動き続ける
+            result = await asyncio.to_thread(profiler.run, seconds)
+        except ProfilerBusyError as e:
+            return web.json_response({'error': str(e)}, status=409)
+        logger.info(f"🔬 プロファイル完了: {result.summary()}")
+        return web.Response(text=result.to_collapsed(), content_type='text/plain', charset='utf-8')
+    
     async def get_status(self, request: web.Request) -> web.Response:
         """システム状態の取得"""
         try:
-            return web.json_response(self.system_status)
+            last_check = self.system_status['last_check']
+            return web.json_response({
+                **self.system_status,
+                'last_check': last_check.isoformat() if last_check else None,
+                'events': self.events.to_dict()
+            })
         except Exception as e:
             logger.error(f"状態取得エラー: {e}")
             return web.json_response(
@@ -82,21 +240,57 @@ class HealthServer:
                 status=500
             )
     
+    @staticmethod
+    def _validate_status_payload(data: Any) -> Optional[str]:
+        """POST /status の内容を確認（不正ならエラーメッセージ）"""
+        if not isinstance(data, dict):
+            return 'body must be a JSON object'
+        if 'status' in data and not isinstance(data['status'], str):
+            return 'status must be a string'
+        errors = data.get('errors', [])
+        if not isinstance(errors, list):
+            return 'errors must be a list'
+        for index, error in enumerate(errors):
+            if not isinstance(error, dict):
+                return f'errors[{index}] must be an object'
+            for field in ('type', 'message'):
+                if field in error and not isinstance(error[field], str):
+                    return f'errors[{index}].{field} must be a string'
+            severity = error.get('severity', 'error')
+            if severity not in SEVERITY_WEIGHTS:
+                return f"errors[{index}].severity must be one of {', '.join(SEVERITY_WEIGHTS)}"
+        return None
+    
     async def update_status(self, request: web.Request) -> web.Response:
         """システム状態の更新"""
         try:
             data = await request.json()
-            
+        except ValueError:
+            return web.json_response({'error': 'body must be valid JSON'}, status=400)
+        # 途中まで反映されないよう、更新する前に全体を確認
+        invalid = self._validate_status_payload(data)
+        if invalid:
+            return web.json_response({'error': invalid}, status=400)
+        
+        try:
             # 状態の更新
             if 'status' in data:
                 self.system_status['status'] = data['status']
             
-            if 'errors' in data:
-                self.system_status['errors'] = data['errors']
+            if data.get('clear_events'):
+                self.events.clear()
+            
+            # 外部から報告されたエラーはイベントとして記録
+            for error in data.get('errors', []):
+                self.events.record(
+                    error.get('type', 'external'),
+                    error.get('message', ''),
+                    severity=error.get('severity', 'error')
+                )
             
             self.system_status['last_check'] = datetime.now()
             
-            return web.json_response(self.system_status)
+            return await self.get_status(request)
         except Exception as e:
             logger.error(f"状態更新エラー: {e}")
             return web.json_response(
@@ -113,105 +307,114 @@ class HealthServer:
         # 最終チェック時間の更新
         self.system_status['last_check'] = datetime.now()
         
-        # エラーの確認
-        if self.system_status['errors']:
-            self.system_status['status'] = 'unhealthy'
-        else:
-            self.system_status['status'] = 'healthy'
+        # 直近のイベントから状態を判定（時間が経ったイベントの影響は減衰する）
+        self.system_status['status'] = self.events.status()
     
     async def start(self):
-        """サーバーの起動"""
+        """サーバーの起動（現在のイベントループ上で待ち受けを開始して戻る）"""
+        if self._runner is not None:
+            return
         try:
-            runner = web.AppRunner(self.app)
+            runner = web.AppRunner(self.app, access_log=None)
             await runner.setup()
             site = web.TCPSite(runner, self.host, self.port)
             await site.start()
+            self._runner = runner
+            self.loop_lag.start()
             
             logger.info(f"ヘルスチェックサーバーを起動: http://{self.host}:{self.port}")
-            
-            # サーバーを実行し続ける
-            while True:
-                await asyncio.sleep(1)
         except Exception as e:
             logger.error(f"サーバー起動エラー: {e}")
             raise
+    
+    async def stop(self):
+        """サーバーの停止"""
+        await self.loop_lag.stop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def serve_forever(self):
+        """サーバーを起動して実行し続ける（単体起動用）"""
+        await self.start()
+        try:
+            while True:
+                await asyncio.sleep(3600)
+        finally:
+            await self.stop()
 
 class SystemMonitor:
-    """システム監視クラス"""
+    """システム監視クラス
+
+    /proc・cgroup・statvfs を直接読んで計測する（外部コマンドは起動しない）
+    """
     
-    def __init__(self, health_server: HealthServer):
+    def __init__(self, health_server: HealthServer, sampler: Optional[ResourceSampler] = None):
         """初期化"""
         self.health_server = health_server
-        self.check_interval = 60  # 秒
+        self.sampler = sampler or ResourceSampler()
+        self.check_interval = int(os.getenv('SYSTEM_MONITOR_INTERVAL_SECONDS', '60'))  # 秒
+        # 高負荷とみなす使用率（%）
+        self.usage_threshold = 90
+        self.last_sample: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def _export(self, sample: Dict[str, Any]):
+        """計測結果をゲージに反映"""
+        for key, gauge in RESOURCE_GAUGES.items():
+            if sample.get(key) is not None:
+                gauge.set(sample[key])
     
-    async def check_system_resources(self):
+    async def check_system_resources(self) -> Dict[str, Any]:
         """システムリソースの確認"""
         try:
-            # CPU使用率の確認
-            cpu_percent = await self.get_cpu_usage()
+            sample = self.sampler.sample()
+            self.last_sample = sample
+            self._export(sample)
+            self.health_server.system_status['resources'] = sample
+            self.health_server.system_status['sampler_errors'] = self.sampler.recent_errors()
             
-            # メモリ使用率の確認
-            memory_percent = await self.get_memory_usage()
-            
-            # ディスク使用率の確認
-            disk_percent = await self.get_disk_usage()
+            cpu_percent = sample['cpu_percent']
+            memory_percent = sample['memory_percent']
+            disk_percent = sample['disk_percent']
             
             # 結果の記録
-            if any(percent > 90 for percent in [cpu_percent, memory_percent, disk_percent]):
-                self.health_server.system_status['errors'].append({
-                    'type': 'resource_usage',
-                    'message': f'リソース使用率が高い: CPU {cpu_percent}%, メモリ {memory_percent}%, ディスク {disk_percent}%',
-                    'timestamp': datetime.now().isoformat()
-                })
+            if any(percent is not None and percent > self.usage_threshold
+                   for percent in [cpu_percent, memory_percent, disk_percent]):
+                peak = max(percent for percent in [cpu_percent, memory_percent, disk_percent] if percent is not None)
+                self.health_server.events.record(
+                    'resource_usage',
+                    f'リソース使用率が高い: CPU {cpu_percent}%, メモリ {memory_percent}%, ディスク {disk_percent}%',
+                    severity='error' if peak >= 98 else 'warning'
+                )
             
-            logger.info(f"システムリソース: CPU {cpu_percent}%, メモリ {memory_percent}%, ディスク {disk_percent}%")
+            logger.info(
+                f"システムリソース: CPU {cpu_percent}%, メモリ {memory_percent}%, ディスク {disk_percent}%, "
+                f"RSS {(sample['rss_bytes'] or 0) / 1024 / 1024:.1f}MB, スレッド {sample['threads']}, FD {sample['open_fds']}"
+            )
+            return sample
         except Exception as e:
             logger.error(f"リソース確認エラー: {e}")
+            return {}
     
     async def get_cpu_usage(self) -> float:
-        """CPU使用率の取得"""
-        try:
-            cmd = "top -l 1 | grep 'CPU usage' | awk '{print $3}' | sed 's/%//'"
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            return float(stdout.decode().strip())
-        except Exception as e:
-            logger.error(f"CPU使用率取得エラー: {e}")
-            return 0.0
+        """CPU使用率の取得（直近の check_system_resources() の計測値）
+
+        cpu_percent() は前回の計測を基準に更新するため、ここで呼ぶと定期計測の値がずれる
+        """
+        return self.last_sample.get('cpu_percent') or 0.0
     
     async def get_memory_usage(self) -> float:
         """メモリ使用率の取得"""
-        try:
-            cmd = "top -l 1 | grep 'PhysMem' | awk '{print $2}' | sed 's/%//'"
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            return float(stdout.decode().strip())
-        except Exception as e:
-            logger.error(f"メモリ使用率取得エラー: {e}")
-            return 0.0
+        return self.sampler.memory_stats()['memory_percent'] or 0.0
     
     async def get_disk_usage(self) -> float:
         """ディスク使用率の取得"""
-        try:
-            cmd = "df -h / | tail -n 1 | awk '{print $5}' | sed 's/%//'"
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            return float(stdout.decode().strip())
-        except Exception as e:
-            logger.error(f"ディスク使用率取得エラー: {e}")
-            return 0.0
+        return self.sampler.disk_stats()['disk_percent'] or 0.0
+    
+    def get_status(self) -> Dict[str, Any]:
+        """直近の計測結果と読み取りエラー"""
+        return {'last_sample': self.last_sample, 'sampler_errors': self.sampler.recent_errors()}
     
     async def start_monitoring(self):
         """監視の開始"""
@@ -222,11 +425,24 @@ class SystemMonitor:
         except Exception as e:
             logger.error(f"監視エラー: {e}")
             raise
+    
+    def start(self):
+        """監視をバックグラウンドタスクとして開始"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.start_monitoring())
+    
+    async def stop(self):
+        """監視の停止"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
 
 async def main():
     """メイン実行関数"""
     # 環境変数の読み込み
     load_dotenv()
+    setup_logging()
     
     # ヘルスチェックサーバーの起動
     server = HealthServer()
@@ -234,7 +450,7 @@ async def main():
     
     # サーバーとモニタリングを並行実行
     await asyncio.gather(
-        server.start(),
+        server.serve_forever(),
         monitor.start_monitoring()
     )
 
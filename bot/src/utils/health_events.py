@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+health_events.py
+Discord にゃんこエージェント - ヘルスイベントの記録
+
+リソース逼迫などのイベントを件数上限付きのリングバッファに記録し、
+直近のイベントから健康状態を判定する
+- 古いイベントは件数上限と時間枠で自動的に消える（メモリが増え続けない）
+- 重要度ごとの重みを時間とともに減衰させた合計で状態を判定する
+  （一時的なスパイクの後は時間が経てば healthy に戻る）
+"""
+
+import os
+import math
+import time
+import datetime
+from collections import deque
+from typing import Optional, Dict, Any, List, Callable
+
+# 保持するイベントの件数
+HEALTH_EVENT_CAPACITY = int(os.getenv('HEALTH_EVENT_CAPACITY', '100'))
+
+# 状態判定に使う時間枠（秒）。これより古いイベントは無視する
+HEALTH_EVENT_WINDOW_SECONDS = float(os.getenv('HEALTH_EVENT_WINDOW_SECONDS', '900'))
+
+# イベントの影響が半分になるまでの時間（秒）
+HEALTH_EVENT_HALF_LIFE_SECONDS = float(os.getenv('HEALTH_EVENT_HALF_LIFE_SECONDS', '300'))
+
+# 重要度ごとの重み
+SEVERITY_WEIGHTS = {
+    'info': 0.0,
+    'warning': 1.0,
+    'error': 3.0,
+    'critical': 10.0
+}
+
+# 減衰後の合計がこの値以上なら degraded / unhealthy
+DEGRADED_SCORE = 1.0
+UNHEALTHY_SCORE = 8.0
+
+
+class HealthEventLog:
+    """件数上限・時間枠付きのヘルスイベント記録"""
+
+    def __init__(self, capacity: int = HEALTH_EVENT_CAPACITY,
+                 window_seconds: float = HEALTH_EVENT_WINDOW_SECONDS,
+                 half_life_seconds: float = HEALTH_EVENT_HALF_LIFE_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.window_seconds = window_seconds
+        self.half_life_seconds = half_life_seconds
+        self.clock = clock
+        self._events: deque = deque(maxlen=capacity)
+        # 記録した総数（上限で捨てたものを含む）
+        self.total_recorded = 0
+
+    def record(self, event_type: str, message: str, severity: str = 'warning',
+               details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """イベントを記録"""
+        if severity not in SEVERITY_WEIGHTS:
+            raise ValueError(f"不明な重要度です: {severity}")
+        event = {
+            'type': event_type,
+            'severity': severity,
+            'message': message,
+            'time': self.clock()
+        }
+        if details:
+            event['details'] = details
+        self._events.append(event)
+        self.total_recorded += 1
+        return event
+
+    def recent(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """時間枠内のイベント（新しい順）"""
+        now = self.clock() if now is None else now
+        return [event for event in reversed(self._events) if now - event['time'] <= self.window_seconds]
+
+    def score(self, now: Optional[float] = None) -> float:
+        """重要度の重みを経過時間で減衰させた合計"""
+        now = self.clock() if now is None else now
+        decay = math.log(2) / self.half_life_seconds
+        return sum(
+            SEVERITY_WEIGHTS[event['severity']] * math.exp(-decay * max(0.0, now - event['time']))
+            for event in self.recent(now)
+        )
+
+    def status(self, now: Optional[float] = None) -> str:
+        """healthy / degraded / unhealthy"""
+        score = self.score(now)
+        if score >= UNHEALTHY_SCORE:
+            return 'unhealthy'
+        if score >= DEGRADED_SCORE:
+            return 'degraded'
+        return 'healthy'
+
+    def clear(self):
+        self._events.clear()
+
+    def to_dict(self, limit: int = 20) -> Dict[str, Any]:
+        """JSONとして返せる形式"""
+        now = self.clock()
+        events = self.recent(now)
+        return {
+            'status': self.status(now),
+            'score': round(self.score(now), 3),
+            'window_seconds': self.window_seconds,
+            'recent_count': len(events),
+            'total_recorded': self.total_recorded,
+            'events': [
+                {**event, 'time': datetime.datetime.fromtimestamp(event['time']).isoformat()}
+                for event in events[:limit]
+            ]
+        }
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+importtime.py
+Discord にゃんこエージェント - import時間の集計
+
+`python -X importtime` の出力（標準エラー）を解析し、
+コールドスタートに時間がかかっているモジュールを集計する
+"""
+
+import os
+import re
+import sys
+import subprocess
+from typing import List, Dict, Any, Iterable, Optional
+
+_LINE_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$')
+
+
+class ImportRecord:
+    """1モジュール分のimport時間（マイクロ秒）"""
+
+    def __init__(self, module: str, self_us: int, cumulative_us: int, depth: int):
+        self.module = module
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        # 0 が直接importされたモジュール（インデント2文字ごとに1段深い）
+        self.depth = depth
+
+    @property
+    def package(self) -> str:
+        return self.module.split('.')[0]
+
+
+def parse_importtime(lines: Iterable[str]) -> List[ImportRecord]:
+    """-X importtime の出力行を解析"""
+    records = []
+    for line in lines:
+        match = _LINE_PATTERN.match(line.rstrip('\n'))
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        records.append(ImportRecord(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+def summarize(records: List[ImportRecord], top: int = 15) -> Dict[str, Any]:
+    """トップレベルの累積時間・パッケージ別の合計時間を集計"""
+    top_level = [record for record in records if record.depth == 0]
+    by_package: Dict[str, int] = {}
+    for record in records:
+        by_package[record.package] = by_package.get(record.package, 0) + record.self_us
+
+    return {
+        'total_ms': round(sum(record.cumulative_us for record in top_level) / 1000, 1),
+        'modules': len(records),
+        'top_imports': [
+            (record.module, round(record.cumulative_us / 1000, 1))
+            for record in sorted(top_level, key=lambda r: r.cumulative_us, reverse=True)[:top]
+        ],
+        'top_packages': [
+            (package, round(total / 1000, 1))
+            for package, total in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        ]
+    }
+
+
+def profile_imports(modules: List[str], src_dir: str, top: int = 15) -> Optional[Dict[str, Any]]:
+    """新しいインタプリタで modules をimportし、import時間を集計"""
+    code = f"import sys; sys.path.insert(0, {src_dir!r}); " + '; '.join(f"import {module}" for module in modules)
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=os.path.dirname(src_dir) or None
+    )
+    records = parse_importtime(completed.stderr.splitlines())
+    if completed.returncode != 0:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith('import time:')]
+        print("⚠️ import中にエラーが発生しました:")
+        print('\n'.join(errors[-5:]))
+    if not records:
+        return None
+    return summarize(records, top)
+
+
+def format_summary(summary: Dict[str, Any], title: str) -> str:
+    """集計結果を表示用の文字列に整形"""
+    lines = [f"⏱️ {title}: 合計 {summary['total_ms']:.1f}ms（{summary['modules']}モジュール）", "", "📦 直接importしたモジュール（累積）:"]
+    lines += [f"   {ms:8.1f}ms  {module}" for module, ms in summary['top_imports']]
+    lines += ["", "🧱 パッケージ別（自身の時間の合計）:"]
+    lines += [f"   {ms:8.1f}ms  {package}" for package, ms in summary['top_packages']]
+    return '\n'.join(lines)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+loop_watchdog.py
+Discord にゃんこエージェント - イベントループの遅延計測とブロッキング検出
+
+同期SDKの呼び出しなどでイベントループが止まると、Discordゲートウェイの
+ハートビートが遅れて切断される。ループの遅延を計測し、止まっている処理を特定する
+- ループ上のタスクが一定間隔で時刻を記録し、予定より遅れた分を遅延とする
+- 監視スレッドが記録の途絶を検出し、しきい値を超えたらブロッキングとして記録
+- デバッグモードでは、止まっている間のループスレッドのスタックを取得してログに出す
+"""
+
+import logging
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# ブロッキングとみなすループ停止時間（秒）
+LOOP_BLOCK_THRESHOLD_SECONDS = float(os.getenv('LOOP_BLOCK_THRESHOLD_SECONDS', '0.5'))
+
+# ブロッキング中のスタックを取得する（デバッグ用）
+LOOP_WATCHDOG_DEBUG = os.getenv('LOOP_WATCHDOG_DEBUG', 'false').lower() == 'true'
+
+# 保持するブロッキング記録の件数
+LOOP_BLOCK_HISTORY_SIZE = 20
+
+LOOP_BLOCKS = registry.counter(
+    'nyanco_event_loop_blocks_total', 'イベントループがしきい値以上止まった回数', ['location'])
+LOOP_BLOCK_DURATION = registry.histogram(
+    'nyanco_event_loop_block_duration_seconds', 'イベントループが止まっていた時間',
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+
+
+def _location(frames: List[traceback.FrameSummary]) -> str:
+    """スタックのうちプロジェクトのコードで最も内側の位置（なければ最も内側）"""
+    for frame in reversed(frames):
+        if os.sep + 'src' + os.sep in frame.filename and 'loop_watchdog' not in frame.filename:
+            return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+    if frames:
+        return f"{os.path.basename(frames[-1].filename)}:{frames[-1].lineno} {frames[-1].name}"
+    return 'unknown'
+
+
+class LoopLagMonitor:
+    """イベントループの遅延を計測し、ブロッキングを検出
+
+    一定間隔でスリープし、予定より遅れて再開した時間を遅延とする
+    （ブロッキング処理でループが止まると遅延が大きくなる）
+    """
+
+    def __init__(self, interval: float = 0.5, block_threshold: float = LOOP_BLOCK_THRESHOLD_SECONDS,
+                 capture_stacks: bool = LOOP_WATCHDOG_DEBUG):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.capture_stacks = capture_stacks
+        # 直近の遅延（秒）
+        self.lag_seconds = 0.0
+        # 起動後の最大遅延（秒）
+        self.max_lag_seconds = 0.0
+        self.last_tick: Optional[float] = None
+        # 直近のブロッキング記録（新しいものが後ろ）
+        self.blocks: deque = deque(maxlen=LOOP_BLOCK_HISTORY_SIZE)
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        # 検出中のブロッキング（ループ再開時に所要時間を確定する）
+        self._current_block: Optional[Dict[str, Any]] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag_seconds = max(0.0, loop.time() - expected)
+            self.max_lag_seconds = max(self.max_lag_seconds, self.lag_seconds)
+            with self._lock:
+                self.last_tick = time.monotonic()
+                if self._current_block is not None:
+                    self._finish_block()
+
+    def _finish_block(self):
+        """ループが再開したのでブロッキングの記録を確定"""
+        block = self._current_block
+        self._current_block = None
+        block['duration_seconds'] = round(max(self.lag_seconds, time.monotonic() - block['_started']), 3)
+        LOOP_BLOCK_DURATION.observe(block['duration_seconds'])
+        logger.warning(f"⚠️ イベントループが {block['duration_seconds']:.2f}秒 停止していました: {block['location']}")
+
+    def _watch(self):
+        """監視スレッド: ループの記録が途絶えたらブロッキングとして記録"""
+        while not self._stop_event.wait(self.interval / 2):
+            last_tick = self.last_tick
+            if last_tick is None or self._current_block is not None:
+                continue
+            stalled = time.monotonic() - last_tick - self.interval
+            if stalled < self.block_threshold:
+                continue
+
+            frames: List[traceback.FrameSummary] = []
+            if self.capture_stacks and self._loop_thread_id is not None:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    frames = traceback.extract_stack(frame)
+            location = _location(frames) if frames else 'unknown'
+            block = {
+                '_started': last_tick + self.interval,
+                'detected_at': time.time(),
+                'location': location,
+                'stack': traceback.format_list(frames[-15:]) if frames else [],
+                'duration_seconds': None
+            }
+            with self._lock:
+                # スタック取得中にループが再開していたら記録しない
+                if self.last_tick != last_tick:
+                    continue
+                self._current_block = block
+                self.blocks.append(block)
+            LOOP_BLOCKS.inc(location=location)
+            if frames:
+                logger.info(f"🐢 イベントループがブロックされています（{stalled:.2f}秒経過）:\n" + ''.join(block['stack']))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._loop_thread_id = threading.get_ident()
+            # asyncio のデバッグモード（PYTHONASYNCIODEBUG=1）でもスタックを取得する
+            self.capture_stacks = self.capture_stacks or asyncio.get_running_loop().get_debug()
+            self._task = asyncio.create_task(self._run())
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+            self._thread.start()
+
+    async def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def current_lag(self) -> float:
+        """現在の遅延（最後の計測から時間が空いている場合はその分も含める）"""
+        if self.last_tick is None:
+            return self.lag_seconds
+        overdue = time.monotonic() - self.last_tick - self.interval
+        return max(self.lag_seconds, overdue)
+
+    def recent_blocks(self) -> List[Dict[str, Any]]:
+        """直近のブロッキング記録（新しい順）"""
+        return [
+            {key: value for key, value in block.items() if not key.startswith('_')}
+            for block in reversed(self.blocks)
+        ]
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+metrics.py
+Discord にゃんこエージェント - メトリクス（Prometheus形式）
+
+Firestore・Gemini・TTS・Google Drive・Discordイベント処理の回数と所要時間を集計し、
+ヘルスチェックサーバーの /metrics で公開する
+- カウンター（回数・バイト数）・ゲージ（現在値）・ヒストグラム（所要時間）のみの軽量な実装
+- to_thread のワーカースレッドからも記録されるため、更新はロックで保護する
+"""
+
+import time
+import functools
+import threading
+import contextlib
+from typing import Dict, List, Tuple, Optional, Iterator, Sequence
+
+# 所要時間ヒストグラムの既定のバケット（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """ラベル付きメトリクスの共通部分"""
+
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], lock: threading.Lock):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = lock
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    """単調増加するカウンター"""
+
+    kind = 'counter'
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}' for key, value in items]
+        return lines
+
+
+class Gauge(_Metric):
+    """増減する現在値"""
+
+    kind = 'gauge'
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}' for key, value in items]
+        return lines
+
+
+class Histogram(_Metric):
+    """所要時間などの分布（累積バケット・合計・件数）"""
+
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets))
+        # ラベル -> [バケットごとの件数..., 合計, 件数]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return int(state[-1]) if state else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, ("le", repr(bound)))} {int(count)}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, ("le", "+Inf"))} {int(state[-1])}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, key)} {round(state[-2], 6)}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, key)} {int(state[-1])}')
+        return lines
+
+
+class MetricsRegistry:
+    """メトリクスの登録と出力"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names, self._lock))
+
+    def gauge(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, label_names, self._lock))
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, self._lock, buckets=buckets))
+
+    def render(self) -> str:
+        """Prometheusのテキスト形式で出力"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines += metric.render()
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+# プロセス全体で共有するレジストリ
+registry = MetricsRegistry()
+
+FIRESTORE_OPERATIONS = registry.counter(
+    'nyanco_firestore_operations_total', 'Firestore操作の回数', ['collection', 'op', 'status'])
+FIRESTORE_DURATION = registry.histogram(
+    'nyanco_firestore_operation_duration_seconds', 'Firestore操作の所要時間', ['collection', 'op'])
+
+LLM_REQUESTS = registry.counter(
+    'nyanco_llm_requests_total', 'Gemini呼び出しの回数', ['purpose', 'status'])
+LLM_DURATION = registry.histogram(
+    'nyanco_llm_request_duration_seconds', 'Gemini呼び出しの所要時間', ['purpose'])
+
+TTS_REQUESTS = registry.counter(
+    'nyanco_tts_requests_total', 'Text-to-Speech合成の回数', ['caller', 'status'])
+TTS_DURATION = registry.histogram(
+    'nyanco_tts_request_duration_seconds', 'Text-to-Speech合成の所要時間', ['caller'])
+TTS_AUDIO_BYTES = registry.counter(
+    'nyanco_tts_audio_bytes_total', 'Text-to-Speechで生成した音声のバイト数', ['caller'])
+
+DRIVE_UPLOADS = registry.counter(
+    'nyanco_drive_uploads_total', 'Google Driveアップロードの回数', ['status'])
+DRIVE_DURATION = registry.histogram(
+    'nyanco_drive_upload_duration_seconds', 'Google Driveアップロードの所要時間')
+
+DISCORD_EVENTS = registry.counter(
+    'nyanco_discord_events_total', 'Discordイベント処理の回数', ['event', 'status'])
+DISCORD_EVENT_DURATION = registry.histogram(
+    'nyanco_discord_event_duration_seconds', 'Discordイベント処理の所要時間', ['event'])
+
+
+@contextlib.contextmanager
+def track(counter: Counter, histogram: Histogram, **labels) -> Iterator[None]:
+    """ブロック内の処理を1回として回数（status=ok/error）と所要時間を記録"""
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels)
+        counter.inc(status=status, **labels)
+
+
+def timed_event(handler):
+    """Discordイベントハンドラー（on_xxx）の回数と所要時間を記録するデコレーター"""
+    event = handler.__name__[3:] if handler.__name__.startswith('on_') else handler.__name__
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        with track(DISCORD_EVENTS, DISCORD_EVENT_DURATION, event=event):
+            return await handler(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+resource_sampler.py
+Discord にゃんこエージェント - プロセス・コンテナのリソース計測
+
+/proc と cgroup のファイルを直接読み、外部コマンドを起動せずにリソース使用量を取得する
+- プロセス: CPU使用率（前回の計測からの差分）・RSS・スレッド数・開いているファイル数
+- メモリ: cgroup（v2 / v1）の上限があればコンテナの使用率、なければ /proc/meminfo
+- ディスク: os.statvfs
+- 読み取りに失敗した項目は None とし、エラーは件数上限付きの履歴に残す
+"""
+
+import os
+import time
+import datetime
+from collections import deque
+from typing import Optional, Dict, Any, List, Callable
+
+# 保持する読み取りエラーの件数
+SAMPLER_ERROR_HISTORY_SIZE = 20
+
+# cgroup v1 で「上限なし」を表す値（これ以上は上限なしとみなす）
+_CGROUP_V1_UNLIMITED = 1 << 60
+
+
+def _clock_ticks() -> int:
+    try:
+        return os.sysconf('SC_CLK_TCK')
+    except (ValueError, OSError, AttributeError):
+        return 100
+
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class ResourceSampler:
+    """リソース使用量の計測（1回あたり数百マイクロ秒以下、プロセスの起動なし）"""
+
+    def __init__(self, proc_root: str = '/proc', cgroup_root: str = '/sys/fs/cgroup', disk_path: str = '/',
+                 clock: Callable[[], float] = time.monotonic):
+        self.proc_root = proc_root
+        self.cgroup_root = cgroup_root
+        self.disk_path = disk_path
+        self.clock = clock
+        self.clock_ticks = _clock_ticks()
+        self.page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+        self.cpus = _available_cpus()
+        self.errors: deque = deque(maxlen=SAMPLER_ERROR_HISTORY_SIZE)
+        # 前回の (時刻, CPU時間秒)
+        self._last_cpu: Optional[tuple] = None
+
+    def _read(self, *parts: str) -> str:
+        with open(os.path.join(*parts), 'r') as f:
+            return f.read()
+
+    def _record_error(self, source: str, error: Exception):
+        self.errors.append({
+            'source': source,
+            'message': str(error),
+            'timestamp': datetime.datetime.now().isoformat()
+        })
+
+    def process_stats(self) -> Dict[str, Any]:
+        """/proc/self/stat からCPU時間・スレッド数・RSS"""
+        stat = self._read(self.proc_root, 'self', 'stat')
+        # 2番目の項目（コマンド名）は空白を含みうるため、閉じ括弧の後ろから数える
+        fields = stat[stat.rindex(')') + 2:].split()
+        # fields[0] が3番目の項目（state）
+        utime, stime = int(fields[11]), int(fields[12])
+        return {
+            'cpu_seconds': (utime + stime) / self.clock_ticks,
+            'threads': int(fields[17]),
+            'rss_bytes': int(fields[21]) * self.page_size
+        }
+
+    def cpu_percent(self, cpu_seconds: float) -> Optional[float]:
+        """前回の計測からのCPU使用率（利用可能なCPU数で割った 0-100%）"""
+        now = self.clock()
+        last = self._last_cpu
+        self._last_cpu = (now, cpu_seconds)
+        if last is None or now <= last[0]:
+            return None
+        return round(100.0 * (cpu_seconds - last[1]) / (now - last[0]) / self.cpus, 2)
+
+    def open_fds(self) -> int:
+        return len(os.listdir(os.path.join(self.proc_root, 'self', 'fd')))
+
+    def _cgroup_memory(self) -> Optional[Dict[str, int]]:
+        """cgroup のメモリ使用量と上限（上限がなければNone）"""
+        candidates = [
+            ('memory.current', 'memory.max'),
+            (os.path.join('memory', 'memory.usage_in_bytes'), os.path.join('memory', 'memory.limit_in_bytes'))
+        ]
+        for current_name, limit_name in candidates:
+            try:
+                limit = self._read(self.cgroup_root, limit_name).strip()
+                current = int(self._read(self.cgroup_root, current_name).strip())
+            except (OSError, ValueError):
+                continue
+            if limit == 'max' or int(limit) >= _CGROUP_V1_UNLIMITED:
+                return None
+            return {'used_bytes': current, 'limit_bytes': int(limit)}
+        return None
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """メモリ使用率（コンテナの上限があればそれに対する割合）"""
+        cgroup = self._cgroup_memory()
+        if cgroup:
+            used, limit, source = cgroup['used_bytes'], cgroup['limit_bytes'], 'cgroup'
+        else:
+            meminfo = {}
+            # 先頭付近の MemTotal / MemFree / MemAvailable だけを読む
+            for line in self._read(self.proc_root, 'meminfo').splitlines()[:5]:
+                name, _, value = line.partition(':')
+                meminfo[name] = int(value.split()[0]) * 1024
+            limit = meminfo['MemTotal']
+            used = limit - meminfo.get('MemAvailable', meminfo.get('MemFree', 0))
+            source = 'meminfo'
+        return {
+            'memory_used_bytes': used,
+            'memory_limit_bytes': limit,
+            'memory_percent': round(100.0 * used / limit, 2) if limit else None,
+            'memory_source': source
+        }
+
+    def disk_stats(self) -> Dict[str, Any]:
+        """ディスク使用率（df と同じく一般ユーザーが使える容量に対する割合）"""
+        st = os.statvfs(self.disk_path)
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        available = st.f_bavail * st.f_frsize
+        total = used + available
+        return {
+            'disk_used_bytes': used,
+            'disk_percent': round(100.0 * used / total, 2) if total else None
+        }
+
+    def sample(self) -> Dict[str, Any]:
+        """全項目を計測（読めなかった項目は None）"""
+        result: Dict[str, Any] = {
+            'cpu_percent': None, 'rss_bytes': None, 'threads': None, 'open_fds': None,
+            'memory_percent': None, 'memory_used_bytes': None, 'memory_limit_bytes': None,
+            'disk_percent': None, 'disk_used_bytes': None
+        }
+        steps = [
+            ('process', self._process_sample),
+            ('fds', lambda: {'open_fds': self.open_fds()}),
+            ('memory', self.memory_stats),
+            ('disk', self.disk_stats)
+        ]
+        for source, step in steps:
+            try:
+                result.update(step())
+            except Exception as e:
+                self._record_error(source, e)
+        return result
+
+    def _process_sample(self) -> Dict[str, Any]:
+        stats = self.process_stats()
+        return {
+            'cpu_percent': self.cpu_percent(stats['cpu_seconds']),
+            'rss_bytes': stats['rss_bytes'],
+            'threads': stats['threads']
+        }
+
+    def recent_errors(self) -> List[Dict[str, Any]]:
+        return list(self.errors)
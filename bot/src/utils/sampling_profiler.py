@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+sampling_profiler.py
+Discord にゃんこエージェント - サンプリングプロファイラー
+
+本番のBotを再起動せずに、指定した秒数だけ全スレッドのスタックを一定間隔で採取する
+- sys._current_frames() で読むだけなので、計測対象のスレッドを止めない
+- イベントループのスレッドと to_thread のワーカー（Firestore・Gemini・TTS など）を両方記録
+- 結果は flamegraph.pl / speedscope で読める collapsed 形式（「スレッド;関数;関数 件数」）
+- 待機中（select・Event.wait・ワーカーの待ち受け）のサンプルは既定で除外して件数だけ数える
+- 同時に実行できるのは1つだけ
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Optional, Dict, Any, List, Tuple
+
+# 採取間隔（秒）
+PROFILE_INTERVAL_SECONDS = float(os.getenv('PROFILE_INTERVAL_SECONDS', '0.01'))
+
+# 1回の最長時間（秒）
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '120'))
+
+# 待機中とみなす最も内側のフレーム（ファイル名, 関数名）
+IDLE_FRAMES = frozenset([
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker')
+])
+
+_running = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """別のプロファイルを実行中"""
+
+
+class ProfileResult:
+    """プロファイル結果"""
+
+    def __init__(self, stacks: Counter, samples: int, idle_samples: int, duration_seconds: float, interval: float):
+        self.stacks = stacks
+        self.samples = samples
+        self.idle_samples = idle_samples
+        self.duration_seconds = duration_seconds
+        self.interval = interval
+
+    def to_collapsed(self) -> str:
+        """collapsed 形式のテキスト（件数の多い順）"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """最も内側のフレームごとの件数（自己時間の多い関数）"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def summary(self, limit: int = 10) -> Dict[str, Any]:
+        threads: Counter = Counter()
+        for stack, count in self.stacks.items():
+            threads[stack.split(';', 1)[0]] += count
+        return {
+            'duration_seconds': round(self.duration_seconds, 2),
+            'interval_seconds': self.interval,
+            'samples': self.samples,
+            'idle_samples': self.idle_samples,
+            'threads': dict(threads.most_common()),
+            'top_functions': self.top_functions(limit)
+        }
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+
+def _thread_label(ident: int, names: Dict[int, str], loop_thread_id: Optional[int]) -> str:
+    if ident == loop_thread_id:
+        return 'event-loop'
+    name = names.get(ident, f'thread-{ident}')
+    # to_thread のワーカー（asyncio_0, asyncio_1, ...）は1つにまとめる
+    return name.rstrip('0123456789').rstrip('_-') or name
+
+
+class SamplingProfiler:
+    """全スレッドのスタックを一定間隔で採取"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS, loop_thread_id: Optional[int] = None,
+                 include_idle: bool = False, max_depth: int = 64):
+        self.interval = max(0.001, interval)
+        self.loop_thread_id = loop_thread_id
+        self.include_idle = include_idle
+        self.max_depth = max_depth
+
+    def sample_once(self, stacks: Counter, exclude: Tuple[int, ...] = ()) -> Tuple[int, int]:
+        """全スレッドのスタックを1回採取し、(採取数, 待機中で除外した数) を返す"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        sampled = idle = 0
+        for ident, frame in sys._current_frames().items():
+            if ident in exclude:
+                continue
+            if not self.include_idle and _is_idle(frame):
+                idle += 1
+                continue
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(_thread_label(ident, names, self.loop_thread_id))
+            stacks[';'.join(reversed(labels))] += 1
+            sampled += 1
+        return sampled, idle
+
+    def run(self, seconds: float) -> ProfileResult:
+        """seconds 秒間採取（呼び出したスレッドはブロックする。to_thread から呼ぶ）"""
+        seconds = min(max(0.1, seconds), PROFILE_MAX_SECONDS)
+        if not _running.acquire(blocking=False):
+            raise ProfilerBusyError("プロファイルを実行中です")
+        try:
+            stacks: Counter = Counter()
+            samples = idle_samples = 0
+            exclude = (threading.get_ident(),)
+            started = time.monotonic()
+            deadline = started + seconds
+            next_tick = started
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                sampled, idle = self.sample_once(stacks, exclude)
+                samples += sampled
+                idle_samples += idle
+                # 採取に時間がかかっても間隔がずれていかないよう次の予定時刻まで待つ
+                next_tick += self.interval
+                time.sleep(max(0.0, min(next_tick, deadline) - time.monotonic()))
+            return ProfileResult(stacks, samples, idle_samples, time.monotonic() - started, self.interval)
+        finally:
+            _running.release()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ssml.py
+Discord にゃんこエージェント - SSML分割ユーティリティ
+
+Text-to-Speech APIのリクエストサイズ上限（5000バイト）に収まるように
+SSMLを分割する
+- 文末（。！？）や<break>タグの位置で分割
+- 開いている<prosody>等のタグは分割先で閉じ、次のチャンクで開き直す
+"""
+
+import re
+from typing import List, Tuple
+
+# Text-to-Speech APIの1リクエストあたりの入力上限（バイト）
+TTS_MAX_REQUEST_BYTES = 5000
+
+# タグとテキストのトークン化
+_TOKEN_PATTERN = re.compile(r'<[^>]+>|[^<]+')
+_TAG_NAME_PATTERN = re.compile(r'</?\s*([a-zA-Z:_-]+)')
+# 文末での分割（区切り文字は前の文に残す）
+_SENTENCE_END_PATTERN = re.compile(r'(?<=[。！？!?])')
+_SENTENCE_END_CHARS = ('。', '！', '？', '!', '?')
+
+_SPEAK_OPEN = '<speak>'
+_SPEAK_CLOSE = '</speak>'
+
+
+def _byte_len(text: str) -> int:
+    """UTF-8でのバイト数"""
+    return len(text.encode('utf-8'))
+
+
+def _tag_name(tag: str) -> str:
+    """タグ名を取得"""
+    match = _TAG_NAME_PATTERN.match(tag)
+    return match.group(1).lower() if match else ''
+
+
+def _split_long_text(text: str, max_bytes: int) -> List[str]:
+    """区切りのない長いテキストを文字単位でバイト上限以下に分割"""
+    pieces = []
+    current = []
+    current_bytes = 0
+    for char in text:
+        char_bytes = _byte_len(char)
+        if current and current_bytes + char_bytes > max_bytes:
+            pieces.append(''.join(current))
+            current = []
+            current_bytes = 0
+        current.append(char)
+        current_bytes += char_bytes
+    if current:
+        pieces.append(''.join(current))
+    return pieces
+
+
+def _tokenize(ssml: str, piece_bytes: int) -> List[Tuple[str, str, bool]]:
+    """SSMLを (種別, トークン, 直後で分割可能か) のリストに変換
+
+    種別は 'open' / 'close' / 'empty' / 'text'。
+    <speak> タグはチャンクごとに付け直すためここで取り除く。
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(ssml):
+        if token.startswith('<'):
+            name = _tag_name(token)
+            if name == 'speak' or token.startswith('<?') or token.startswith('<!'):
+                continue
+            if token.startswith('</'):
+                tokens.append(('close', token, False))
+            elif token.endswith('/>'):
+                # <break/> の直後は自然な分割位置
+                tokens.append(('empty', token, name == 'break'))
+            else:
+                tokens.append(('open', token, False))
+            continue
+
+        for sentence in _SENTENCE_END_PATTERN.split(token):
+            if not sentence:
+                continue
+            if _byte_len(sentence) > piece_bytes:
+                # 句読点のない長文は強制的に分割
+                for piece in _split_long_text(sentence, piece_bytes):
+                    tokens.append(('text', piece, True))
+            else:
+                tokens.append(('text', sentence, sentence.endswith(_SENTENCE_END_CHARS)))
+    return tokens
+
+
+def _closing_tags(stack: List[Tuple[str, str]]) -> str:
+    """開いているタグを内側から閉じる"""
+    return ''.join(f'</{name}>' for name, _ in reversed(stack))
+
+
+def _opening_tags(stack: List[Tuple[str, str]]) -> str:
+    """開いているタグを外側から開き直す"""
+    return ''.join(tag for _, tag in stack)
+
+
+def split_ssml(ssml: str, max_bytes: int = TTS_MAX_REQUEST_BYTES) -> List[str]:
+    """SSMLをバイト上限以下のチャンクに分割
+
+    各チャンクは <speak> で囲まれた独立したSSMLになり、
+    分割位置で開いていたタグ（<prosody>の入れ子など）は
+    そのチャンク内で閉じて次のチャンクの先頭で開き直す。
+    上限に収まる場合は元のSSMLをそのまま1要素で返す。
+    """
+    if _byte_len(ssml) <= max_bytes:
+        return [ssml]
+
+    overhead = _byte_len(_SPEAK_OPEN) + _byte_len(_SPEAK_CLOSE)
+    tokens = _tokenize(ssml, max(1, (max_bytes - overhead) // 4))
+
+    # 分割可能な位置ごとにセグメントへまとめる
+    segments = []
+    current = []
+    for kind, token, breakable in tokens:
+        current.append((kind, token))
+        if breakable:
+            segments.append(current)
+            current = []
+    if current:
+        segments.append(current)
+
+    chunks = []
+    stack = []  # (タグ名, 開始タグ) のリスト
+    chunk_prefix = _opening_tags(stack)
+    chunk_body = []
+    chunk_body_bytes = 0
+
+    def flush(current_stack):
+        body = ''.join(chunk_body)
+        if body.strip():
+            chunks.append(f'{_SPEAK_OPEN}{chunk_prefix}{body}{_closing_tags(current_stack)}{_SPEAK_CLOSE}')
+
+    for segment in segments:
+        segment_text = ''.join(token for _, token in segment)
+        segment_stack = list(stack)
+        for kind, token in segment:
+            if kind == 'open':
+                segment_stack.append((_tag_name(token), token))
+            elif kind == 'close' and segment_stack:
+                segment_stack.pop()
+
+        segment_bytes = _byte_len(segment_text)
+        projected = (overhead + _byte_len(chunk_prefix) + chunk_body_bytes
+                     + segment_bytes + _byte_len(_closing_tags(segment_stack)))
+
+        if chunk_body and projected > max_bytes:
+            # 現在のチャンクを確定し、開いているタグを引き継いで次を開始
+            flush(stack)
+            chunk_prefix = _opening_tags(stack)
+            chunk_body = []
+            chunk_body_bytes = 0
+            projected = (overhead + _byte_len(chunk_prefix)
+                         + segment_bytes + _byte_len(_closing_tags(segment_stack)))
+
+        if projected > max_bytes:
+            raise ValueError(f"SSMLセグメントが上限({max_bytes}バイト)を超えています: {segment_text[:50]}...")
+
+        chunk_body.append(segment_text)
+        chunk_body_bytes += segment_bytes
+        stack = segment_stack
+
+    flush(stack)
+    return chunks
+
+
+def split_plain_text(text: str, max_bytes: int = TTS_MAX_REQUEST_BYTES) -> List[str]:
+    """プレーンテキストを文末位置でバイト上限以下に分割"""
+    if _byte_len(text) <= max_bytes:
+        return [text]
+
+    chunks = []
+    current = ''
+    for sentence in _SENTENCE_END_PATTERN.split(text):
+        if not sentence:
+            continue
+        pieces = _split_long_text(sentence, max_bytes) if _byte_len(sentence) > max_bytes else [sentence]
+        for piece in pieces:
+            if current and _byte_len(current) + _byte_len(piece) > max_bytes:
+                chunks.append(current)
+                current = ''
+            current += piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+structured_logging.py
+Discord にゃんこエージェント - 構造化ログ
+
+print() はイベントループ上で標準出力に同期的に書き込むため、メッセージ量が多いと
+ループの遅延になり Cloud Logging も埋まる。ログをキュー経由で別スレッドから出力する
+- JSON形式（Cloud Logging の severity / message を含む1行1レコード）、LOG_FORMAT=text で従来形式
+- ロガーへの書き込みはキューに積むだけ（出力は QueueListener のスレッド）
+- メッセージごとのログ（extra={'sample': 'キー'}）はキーごとに N 件に1件だけ出力
+- コマンド・ジョブ単位の相関ID（contextvars のため to_thread やタスクにも引き継がれる）
+"""
+
+import os
+import sys
+import json
+import uuid
+import queue
+import logging
+import datetime
+import threading
+import contextlib
+import contextvars
+import logging.handlers
+from typing import Optional, Dict, Iterator
+
+# 出力形式（json / text）
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+
+# ログレベル
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+# メッセージごとのログを何件に1件出力するか
+LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', '20'))
+
+_correlation_id: contextvars.ContextVar = contextvars.ContextVar('correlation_id', default=None)
+
+# LogRecord が標準で持つ属性（これ以外は extra として出力する）
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def new_correlation_id(prefix: str = '') -> str:
+    return f"{prefix}{uuid.uuid4().hex[:12]}"
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+@contextlib.contextmanager
+def correlation_scope(correlation_id: Optional[str] = None, prefix: str = '') -> Iterator[str]:
+    """ブロック内のログに相関IDを付ける（未指定なら新しく発行）"""
+    correlation_id = correlation_id or new_correlation_id(prefix)
+    token = _correlation_id.set(correlation_id)
+    try:
+        yield correlation_id
+    finally:
+        _correlation_id.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """相関IDをレコードに付与（キューに積む前に、ログを出したスレッドで実行する）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'correlation_id'):
+            record.correlation_id = _correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """extra={'sample': キー} 付きのレコードをキーごとに every 件に1件だけ通す
+
+    WARNING 以上は間引かない
+    """
+
+    def __init__(self, every: int = LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = max(1, every)
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, 'sample', None)
+        if key is None or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % self.every:
+            return False
+        record.sampled_every = self.every
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """1行1レコードのJSON（Cloud Logging の構造化ログ形式）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'severity': record.levelname,
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'correlation_id', None):
+            entry['correlation_id'] = record.correlation_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key not in entry and key != 'sample' and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """従来の print に近い1行形式（ローカル開発用）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        correlation_id = getattr(record, 'correlation_id', None)
+        if correlation_id:
+            message = f"{message} [{correlation_id}]"
+        if record.exc_info:
+            message = f"{message}\n{self.formatException(record.exc_info)}"
+        return message
+
+
+def setup_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT,
+                  sample_every: int = LOG_SAMPLE_EVERY, stream=None) -> logging.handlers.QueueListener:
+    """ルートロガーをキュー経由の出力に切り替える（複数回呼んでも1度だけ設定）"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JsonFormatter() if log_format == 'json' else TextFormatter())
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        queue_handler.addFilter(SamplingFilter(sample_every))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+        _listener.start()
+        return _listener
+
+
+def shutdown_logging():
+    """キューに残ったログを出力して終了"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+tracing.py
+Discord にゃんこエージェント - 処理のトレース（スパン）
+
+!summary などの処理が遅いときに、分析・Gemini・TTS・Drive・Discord投稿・Firestore の
+どこで時間がかかっているかを1回の実行単位で記録する
+- スパンは OpenTelemetry と同じ形式の ID（trace 32桁 / span 16桁）と親子関係を持つ
+- 現在のスパンは contextvars で引き継ぐ（create_task や to_thread の中でも子スパンになる）
+- ルートスパンの終了時にトレースをまとめてエクスポート
+  （メモリ上に直近の数件、TRACE_EXPORT_FILE 指定時は OTLP/JSON 形式で1行1トレース追記）
+- timing_report() でクリティカルパスとスタックごとの自己時間（フレームグラフ形式）を集計
+"""
+
+import os
+import json
+import time
+import uuid
+import functools
+import threading
+import contextlib
+import contextvars
+from collections import deque
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+
+# トレースを記録する
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+
+# トレースを追記するファイル（未設定なら書き出さない）
+TRACE_EXPORT_FILE = os.getenv('TRACE_EXPORT_FILE', '')
+
+# メモリ上に保持するトレースの件数
+TRACE_MEMORY_TRACES = int(os.getenv('TRACE_MEMORY_TRACES', '20'))
+
+# 1トレースあたりの最大スパン数（超えた分は記録しない）
+TRACE_MAX_SPANS = int(os.getenv('TRACE_MAX_SPANS', '1000'))
+
+SERVICE_NAME = 'nyanco-bot'
+
+STATUS_UNSET = 'UNSET'
+STATUS_OK = 'OK'
+STATUS_ERROR = 'ERROR'
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """処理1つ分の開始・終了時刻と属性"""
+
+    def __init__(self, name: str, trace_id: str, parent: Optional['Span'] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = {k: v for k, v in (attributes or {}).items() if v is not None}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_UNSET
+        self.status_message: Optional[str] = None
+        # ルートスパンのみ: 終了時に集まったトレース全体のスパン
+        self.trace_spans: Optional[List['Span']] = None
+        self.dropped_spans = 0
+
+    @property
+    def is_root(self) -> bool:
+        return self.parent_span_id is None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON のスパン形式"""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': {STATUS_UNSET: 0, STATUS_OK: 1, STATUS_ERROR: 2}[self.status]}
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+class InMemorySpanExporter:
+    """直近のトレースをメモリに保持"""
+
+    def __init__(self, capacity: int = TRACE_MEMORY_TRACES):
+        self._traces: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            self._traces.append(spans)
+
+    def traces(self) -> List[List[Span]]:
+        """保持しているトレース（新しい順）"""
+        with self._lock:
+            return list(reversed(self._traces))
+
+    def get(self, trace_id: str) -> Optional[List[Span]]:
+        for spans in self.traces():
+            if spans and spans[0].trace_id == trace_id:
+                return spans
+        return None
+
+
+class FileSpanExporter:
+    """トレースを OTLP/JSON 形式で1行ずつファイルに追記
+
+    OpenTelemetry Collector の otlpjsonfile レシーバーなどでそのまま読み込める
+    """
+
+    def __init__(self, path: str, service_name: str = SERVICE_NAME):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        line = json.dumps({
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', self.service_name)]},
+                'scopeSpans': [{
+                    'scope': {'name': __name__},
+                    'spans': [span.to_otlp() for span in spans]
+                }]
+            }]
+        }, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+class Tracer:
+    """スパンの作成とトレース単位のエクスポート"""
+
+    def __init__(self, enabled: bool = TRACING_ENABLED, exporters: Optional[List[Any]] = None,
+                 max_spans: int = TRACE_MAX_SPANS):
+        self.enabled = enabled
+        self.exporters: List[Any] = list(exporters or [])
+        self.max_spans = max_spans
+        # 実行中のトレース: trace_id -> (ルートスパン, 終了したスパン)
+        self._active: Dict[str, Tuple[Span, List[Span]]] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str, activate: bool = True, **attributes) -> Iterator[Optional[Span]]:
+        """スパンを開始（実行中のスパンがあればその子、なければ新しいトレースのルート）
+
+        activate=False ではブロック内の処理の親スパンにしない
+        （ジェネレーターのように途中で呼び出し元に戻る処理で使う）
+        """
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent, attributes)
+        else:
+            span = Span(name, uuid.uuid4().hex, None, attributes)
+            with self._lock:
+                self._active[span.trace_id] = (span, [])
+        token = _current_span.set(span) if activate else None
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            if token is not None:
+                _current_span.reset(token)
+            self._finish(span)
+
+    @contextlib.contextmanager
+    def child_span(self, name: str, activate: bool = True, **attributes) -> Iterator[Optional[Span]]:
+        """実行中のトレースがある場合だけ子スパンを作る（頻繁な処理で余計なトレースを作らない）"""
+        if _current_span.get() is None:
+            yield None
+            return
+        with self.span(name, activate, **attributes) as span:
+            yield span
+
+    def _finish(self, span: Span):
+        span.end_ns = time.time_ns()
+        if span.status == STATUS_UNSET:
+            span.status = STATUS_OK
+        with self._lock:
+            active = self._active.get(span.trace_id)
+            if active is None:
+                # ルートの終了後に終わったスパン（切り離されたタスクなど）は記録しない
+                return
+            root, spans = active
+            if span is not root:
+                if len(spans) < self.max_spans:
+                    spans.append(span)
+                else:
+                    root.dropped_spans += 1
+                return
+            del self._active[span.trace_id]
+        span.trace_spans = [span] + spans
+        for exporter in self.exporters:
+            try:
+                exporter.export(span.trace_spans)
+            except Exception:
+                # トレースの書き出し失敗で本処理を止めない
+                pass
+
+    def traced(self, name: Optional[str] = None):
+        """非同期関数の実行をスパンとして記録するデコレーター"""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _merged_length(intervals: List[Tuple[int, int]]) -> int:
+    """重なりを除いた区間の合計（並行に動いた子スパンを二重に数えない）"""
+    total = 0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def timing_report(root: Optional[Span], top: int = 30) -> Optional[Dict[str, Any]]:
+    """ルートスパンのトレースからタイミングレポートを作成
+
+    - critical_path: ルートから最後に終わった子スパンをたどった経路（全体の所要時間を決めた処理）
+    - stacks: 「親;子;孫」のスタックごとの自己時間（フレームグラフの collapsed 形式）
+    """
+    if root is None or not root.trace_spans:
+        return None
+    spans = root.trace_spans
+    children: Dict[str, List[Span]] = {}
+    for span in spans:
+        if span.parent_span_id:
+            children.setdefault(span.parent_span_id, []).append(span)
+
+    def offset_ms(span: Span) -> float:
+        return round((span.start_ns - root.start_ns) / 1e6, 1)
+
+    critical_path = []
+    node: Optional[Span] = root
+    while node is not None:
+        critical_path.append({
+            'name': node.name,
+            'start_offset_ms': offset_ms(node),
+            'duration_ms': round(node.duration_ms, 1)
+        })
+        node = max(children.get(node.span_id, []), key=lambda child: child.end_ns, default=None)
+
+    stacks: Dict[str, Dict[str, float]] = {}
+    pending: List[Tuple[Span, str]] = [(root, root.name)]
+    while pending:
+        span, path = pending.pop()
+        kids = children.get(span.span_id, [])
+        covered = _merged_length([(kid.start_ns, kid.end_ns) for kid in kids])
+        self_ms = max(0.0, (span.end_ns - span.start_ns - covered) / 1e6)
+        entry = stacks.setdefault(path, {'self_ms': 0.0, 'count': 0})
+        entry['self_ms'] += self_ms
+        entry['count'] += 1
+        pending.extend((kid, f"{path};{kid.name}") for kid in kids)
+
+    ranked = sorted(stacks.items(), key=lambda item: item[1]['self_ms'], reverse=True)[:top]
+    return {
+        'trace_id': root.trace_id,
+        'total_ms': round(root.duration_ms, 1),
+        'span_count': len(spans),
+        'dropped_spans': root.dropped_spans,
+        'errors': [span.name for span in spans if span.status == STATUS_ERROR],
+        'critical_path': critical_path,
+        'stacks': [
+            {'stack': path, 'self_ms': round(entry['self_ms'], 1), 'count': entry['count']}
+            for path, entry in ranked
+        ]
+    }
+
+
+def format_collapsed(report: Dict[str, Any]) -> str:
+    """flamegraph.pl / speedscope で読める collapsed 形式（値はマイクロ秒）"""
+    return ''.join(f"{entry['stack']} {int(entry['self_ms'] * 1000)}\n" for entry in report['stacks'])
+
+
+# プロセス全体で共有するトレーサー
+memory_exporter = InMemorySpanExporter()
+tracer = Tracer(exporters=[memory_exporter] + ([FileSpanExporter(TRACE_EXPORT_FILE)] if TRACE_EXPORT_FILE else []))
+traced = tracer.traced
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+tts_text.py
+Discord にゃんこエージェント - 読み上げ用テキスト正規化ユーティリティ
+
+clean_text_for_tts の処理を事前コンパイル済みのパイプラインとして提供
+- 正規表現はキャラクター構成ごとに1度だけコンパイル
+- 絵文字の削除は文字クラス1つによる1パス処理
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Any, Tuple
+
+# 読み上げ時に削除する絵文字（異体字セレクタ U+FE0F も含む）
+# str.translate は非ASCII文字の多い文章では文字クラスの正規表現より遅いため使わない
+TTS_STRIP_EMOJI = '🐈🐱😺👋👥🗑️📅📊📝🔥🎉❌⚠️✅'
+_EMOJI_PATTERN = re.compile(f'[{TTS_STRIP_EMOJI}]')
+
+# キャラクター構成に依存しない変換（適用順序が結果に影響するため順番に並べる）
+_BOLD_PATTERN = re.compile(r'\*\*(.*?)\*\*')
+_CHANNEL_PATTERN = re.compile(r'#(\w+)')
+_MENTION_PATTERN = re.compile(r'@(\w+)')
+_PARAGRAPH_PATTERN = re.compile(r'\n\n+')
+_PUNCTUATION_RUN_PATTERN = re.compile(r'[。、]+')
+_EXCLAMATION_RUN_PATTERN = re.compile(r'！{2,}')
+_PERIOD_SPACE_PATTERN = re.compile(r'。\s+')
+_COMMA_SPACE_PATTERN = re.compile(r'、\s+')
+
+# SSML内の「にゃー」強調用
+NYA_PATTERN = re.compile(r'にゃー+')
+
+
+class TTSTextNormalizer:
+    """キャラクター構成ごとにコンパイルされた読み上げ用テキスト正規化"""
+
+    def __init__(self, speaker_labels: Tuple[Tuple[str, str], ...]):
+        """初期化
+
+        speaker_labels は (絵文字, キャラクター名) のタプル
+        """
+        self.speaker_labels = speaker_labels
+
+        # 「絵文字 名前: 」→「名前: 」の順に削除（元の処理順序と同じ）
+        # 固定文字列なので正規表現ではなく str.replace で置換する
+        self._speaker_labels = tuple(f"{emoji} {name}: " for emoji, name in speaker_labels)
+        self._speaker_labels += tuple(f"{name}: " for _, name in speaker_labels)
+
+        # 台本の1行から話者表記を取り除くパターン（例: 「🐈 **みやにゃん**: 」）
+        self.speaker_prefix_patterns = {
+            name: re.compile(rf".*{re.escape(name)}.*?:\s*") for _, name in speaker_labels
+        }
+
+    def clean(self, content: str, remove_character_names: bool = True) -> str:
+        """Text-to-Speech用にテキストをクリーンアップ"""
+        # Markdownの太字記法を削除
+        content = _BOLD_PATTERN.sub(r'\1', content)
+
+        # キャラクター名と話者表記を削除（音声読み上げには不要）
+        if remove_character_names:
+            for label in self._speaker_labels:
+                content = content.replace(label, '')
+
+        # 絵文字を削除（音声読み上げには不要）
+        content = _EMOJI_PATTERN.sub('', content)
+
+        # チャンネル名の#を削除、@メンションを読みやすく
+        content = _CHANNEL_PATTERN.sub(r'\1チャンネル', content)
+        content = _MENTION_PATTERN.sub(r'\1', content)
+
+        # 改行を適切な間隔に変換し、連続する句読点を整理
+        content = _PARAGRAPH_PATTERN.sub('。 ', content)
+        content = content.replace('\n', '、')
+        content = _PUNCTUATION_RUN_PATTERN.sub('。', content)
+
+        # 伸ばし音を自然に（にゃ〜ん / だにゃ〜 / ですにゃ〜 を含む）
+        content = content.replace('にゃ〜', 'にゃー')
+
+        # 連続感嘆符を1つに
+        content = _EXCLAMATION_RUN_PATTERN.sub('！', content)
+
+        # 句読点後の余分な空白を削除
+        content = _PERIOD_SPACE_PATTERN.sub('。', content)
+        content = _COMMA_SPACE_PATTERN.sub('、', content)
+
+        return content.strip()
+
+
+@lru_cache(maxsize=16)
+def _get_normalizer(speaker_labels: Tuple[Tuple[str, str], ...]) -> TTSTextNormalizer:
+    """キャラクター構成ごとの正規化パイプラインを取得（キャッシュ付き）"""
+    return TTSTextNormalizer(speaker_labels)
+
+
+def get_text_normalizer(characters: Dict[str, Dict[str, Any]]) -> TTSTextNormalizer:
+    """キャラクター設定から正規化パイプラインを取得"""
+    speaker_labels = tuple(
+        (settings.get('emoji', ''), settings['name']) for settings in characters.values()
+    )
+    return _get_normalizer(speaker_labels)
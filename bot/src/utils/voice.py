@@ -10,6 +10,7 @@ Discord にゃんこエージェント - 音声生成ユーティリティ
 - 音声ファイルの処理
 """
 
+import logging
 import os
 import json
 import asyncio
@@ -19,6 +20,8 @@ import aiohttp
 from google.cloud import texttospeech
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 class VoiceGenerator:
     """音声生成クラス"""
     
@@ -38,10 +41,10 @@ class VoiceGenerator:
         """Google Cloud Text-to-Speechクライアントを初期化"""
         try:
             self.client = texttospeech.TextToSpeechClient()
-            print("✅ Google Cloud Text-to-Speechクライアントを初期化")
+            logger.info("✅ Google Cloud Text-to-Speechクライアントを初期化")
             return True
         except Exception as e:
-            print(f"❌ Text-to-Speechクライアントの初期化に失敗: {e}")
+            logger.error(f"❌ Text-to-Speechクライアントの初期化に失敗: {e}")
             return False
     
     def generate_ssml(self, text: str, settings: Optional[Dict[str, Any]] = None) -> str:
@@ -94,10 +97,10 @@ class VoiceGenerator:
             with open(output_file, 'wb') as out:
                 out.write(response.audio_content)
             
-            print(f"✅ 音声を生成: {output_file}")
+            logger.info(f"✅ 音声を生成: {output_file}")
             return True
         except Exception as e:
-            print(f"❌ 音声合成エラー: {e}")
+            logger.error(f"❌ 音声合成エラー: {e}")
             return False
     
     async def generate_podcast(self, script: str, output_dir: str, settings: Optional[Dict[str, Any]] = None) -> bool:
@@ -127,10 +130,10 @@ class VoiceGenerator:
             for file in audio_files:
                 os.remove(file)
             
-            print(f"✅ ポッドキャストを生成: {final_output}")
+            logger.info(f"✅ ポッドキャストを生成: {final_output}")
             return True
         except Exception as e:
-            print(f"❌ ポッドキャスト生成エラー: {e}")
+            logger.error(f"❌ ポッドキャスト生成エラー: {e}")
             return False
     
     async def merge_audio_files(self, input_files: list, output_file: str) -> bool:
@@ -156,13 +159,13 @@ class VoiceGenerator:
             os.remove(list_file)
             
             if process.returncode == 0:
-                print(f"✅ 音声ファイルを結合: {output_file}")
+                logger.info(f"✅ 音声ファイルを結合: {output_file}")
                 return True
             else:
-                print(f"❌ 音声ファイル結合エラー: {stderr.decode()}")
+                logger.error(f"❌ 音声ファイル結合エラー: {stderr.decode()}")
                 return False
         except Exception as e:
-            print(f"❌ 音声ファイル結合エラー: {e}")
+            logger.error(f"❌ 音声ファイル結合エラー: {e}")
             return False
 
 async def main():
@@ -130,4 +130,60 @@ def setup_test_environment(mock_env_vars):
     yield
     
     # クリーンアップ（必要に応じて）
-    pass
\ No newline at end of file
+    pass
+
+
+class FakeDocument:
+    """Firestoreドキュメントの簡易フェイク（get / set(merge) / delete）"""
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+        self.id = key
+
+    def get(self):
+        data = self.store.get(self.key)
+        return Mock(exists=data is not None, to_dict=Mock(return_value=data))
+
+    def set(self, data, merge=False):
+        if merge and self.key in self.store:
+            current = self.store[self.key]
+            for field, value in data.items():
+                if isinstance(value, dict) and isinstance(current.get(field), dict):
+                    current[field] = {**current[field], **value}
+                else:
+                    current[field] = value
+        else:
+            self.store[self.key] = dict(data)
+
+    def delete(self):
+        self.store.pop(self.key, None)
+
+
+class FakeCollection:
+    def __init__(self, store):
+        self.store = store
+
+    def document(self, key):
+        return FakeDocument(self.store, key)
+
+    def add(self, data):
+        key = f"doc{len(self.store) + 1}"
+        self.store[key] = dict(data)
+        return None, FakeDocument(self.store, key)
+
+
+class FakeFirestore:
+    """コレクションごとの辞書にドキュメントを保持するFirestoreクライアントのフェイク"""
+
+    def __init__(self):
+        self.collections = {}
+
+    def collection(self, name):
+        return FakeCollection(self.collections.setdefault(name, {}))
+
+
+@pytest.fixture
+def fake_firestore():
+    """メモリ上のFirestoreクライアント"""
+    return FakeFirestore()
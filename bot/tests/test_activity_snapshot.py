@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+アクティビティスナップショットのキャッシュのテスト
+"""
+
+import asyncio
+import datetime
+
+from core.activity_snapshot import ActivitySnapshot, ActivitySnapshotCache
+
+
+def make_snapshot(key):
+    window_end = datetime.datetime(2025, 6, 9, tzinfo=datetime.timezone.utc)
+    events = [
+        {'id': 'recent', 'updatedAt': window_end - datetime.timedelta(days=3)},
+        {'id': 'older', 'updatedAt': window_end - datetime.timedelta(days=10)},
+    ]
+    return ActivitySnapshot(key, 7, window_end, [{'id': 'm1'}, {'id': 'm2'}], events, 14)
+
+
+class TestActivitySnapshotCache:
+    """ActivitySnapshotCache のテスト"""
+
+    def test_concurrent_consumers_share_one_scan(self):
+        async def scenario():
+            cache = ActivitySnapshotCache(ttl_seconds=60)
+            scans = []
+
+            async def loader():
+                scans.append(True)
+                await asyncio.sleep(0.01)
+                return make_snapshot('weekly')
+
+            # 週次まとめ・アドバイス・ポッドキャストが同時に要求
+            results = await asyncio.gather(*(cache.get('weekly', loader) for _ in range(3)))
+            again = await cache.get('weekly', loader)
+            return scans, results, again, cache.stats()
+
+        scans, results, again, stats = asyncio.run(scenario())
+
+        assert len(scans) == 1
+        assert all(result is again for result in results)
+        assert stats['misses'] == 1 and stats['hits'] == 3
+
+    def test_views_for_consumers(self):
+        snapshot = make_snapshot('weekly')
+
+        assert [event['id'] for event in snapshot.events_since(7)] == ['recent']
+        assert len(snapshot.events_since(14)) == 2
+        assert snapshot.recent_messages(1) == [{'id': 'm1'}]
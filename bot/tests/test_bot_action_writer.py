@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Botアクション記録のバッチ書き込みのテスト
+"""
+
+import asyncio
+
+from core.bot_action_writer import BotActionWriter
+
+
+class FakeDocument:
+    def __init__(self, doc_id):
+        self.doc_id = doc_id
+
+
+class FakeCollection:
+    def document(self, doc_id):
+        return FakeDocument(doc_id)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, doc_ref, fields, merge=False):
+        self.writes.append((doc_ref.doc_id, dict(fields)))
+
+    def commit(self):
+        if self.db.fail:
+            raise RuntimeError('unavailable')
+        self.db.commits.append(self.writes)
+        for doc_id, fields in self.writes:
+            self.db.docs.setdefault(doc_id, {}).update(fields)
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+        self.commits = []
+        self.fail = False
+
+    def collection(self, name):
+        return FakeCollection()
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+class TestBotActionWriter:
+    """BotActionWriter のテスト"""
+
+    def test_updates_are_merged_before_flush(self):
+        async def scenario():
+            db = FakeFirestore()
+            writer = BotActionWriter(db, flush_interval=60)
+            action_id = writer.record({'actionType': 'conversation', 'status': 'pending'})
+            writer.record({'status': 'completed', 'result': {'ok': True}}, action_id)
+            other_id = writer.record({'actionType': 'admin_command', 'status': 'completed'})
+            assert writer.pending == 2
+            await writer.close()
+            return db, action_id, other_id
+
+        db, action_id, other_id = asyncio.run(scenario())
+        assert len(db.commits) == 1
+        assert db.docs[action_id] == {'actionType': 'conversation', 'status': 'completed', 'result': {'ok': True}}
+        assert db.docs[other_id]['actionType'] == 'admin_command'
+
+    def test_failed_batch_is_retried_with_newer_updates(self):
+        async def scenario():
+            db = FakeFirestore()
+            writer = BotActionWriter(db, flush_interval=60)
+            action_id = writer.record({'status': 'pending'})
+            db.fail = True
+            assert await writer.flush() == 0
+            writer.record({'status': 'completed'}, action_id)
+            db.fail = False
+            assert await writer.flush() == 1
+            await writer.close()
+            return db, action_id
+
+        db, action_id = asyncio.run(scenario())
+        assert db.docs[action_id] == {'status': 'completed'}
+
+    def test_buffer_is_bounded(self):
+        async def scenario():
+            writer = BotActionWriter(FakeFirestore(), flush_interval=60, batch_size=2, max_buffer=3)
+            ids = [writer.record({'n': i}) for i in range(5)]
+            return writer, ids
+
+        writer, ids = asyncio.run(scenario())
+        assert list(writer._buffer) == ids[2:]
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cronスケジューラーのテスト
+"""
+
+import asyncio
+import datetime
+import pytest
+
+from core.cron import CronExpression, CronScheduler
+from core.lease import InMemoryLeaseBackend, LeaseManager, LeaseLostError
+
+
+class TestCronExpression:
+    """CronExpression のテスト"""
+
+    def test_weekly_matches_schedule_day_and_time(self):
+        cron = CronExpression.weekly('monday', '09:00')
+        # 2025-06-04 は水曜日
+        after = datetime.datetime(2025, 6, 4, 12, 30)
+
+        assert cron.next_after(after) == datetime.datetime(2025, 6, 9, 9, 0)
+
+    def test_next_after_is_strictly_later(self):
+        cron = CronExpression('*/15 * * * *')
+
+        assert cron.next_after(datetime.datetime(2025, 6, 4, 12, 15)) == datetime.datetime(2025, 6, 4, 12, 30)
+        assert cron.next_after(datetime.datetime(2025, 6, 4, 23, 50)) == datetime.datetime(2025, 6, 5, 0, 0)
+
+    def test_day_or_weekday(self):
+        # 毎月1日または金曜日
+        cron = CronExpression('0 0 1 * fri')
+
+        assert cron.next_after(datetime.datetime(2025, 6, 1, 0, 0)) == datetime.datetime(2025, 6, 6, 0, 0)
+
+    def test_invalid_expression(self):
+        with pytest.raises(ValueError):
+            CronExpression('0 25 * * *')
+        with pytest.raises(ValueError):
+            CronExpression.weekly('someday', '09:00')
+
+
+class TestCronScheduler:
+    """CronScheduler のテスト"""
+
+    def test_misfired_run_is_skipped(self):
+        async def scenario():
+            # 実行時刻から1時間遅れて目覚めた状況を再現
+            times = [
+                datetime.datetime(2025, 6, 9, 8, 59),
+                datetime.datetime(2025, 6, 9, 10, 0),
+                datetime.datetime(2025, 6, 9, 10, 0),
+            ]
+
+            def clock():
+                if len(times) == 1:
+                    scheduler.is_running = False
+                return times.pop(0)
+
+            scheduler = CronScheduler(clock=clock)
+            runs = []
+
+            async def job():
+                runs.append(True)
+
+            added = scheduler.add_job('weekly', CronExpression.weekly('monday', '09:00'), job,
+                                      misfire_grace_seconds=60)
+            scheduler.is_running = True
+            await scheduler._job_loop(added)
+            return added, runs
+
+        job, runs = asyncio.run(scenario())
+
+        assert runs == []
+        assert job.misfire_count == 1
+
+    def test_resource_group_limits_concurrency(self):
+        async def scenario():
+            scheduler = CronScheduler()
+            scheduler.set_group_limit('firestore_scan', 1)
+            running = 0
+            peak = 0
+
+            async def scan():
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+            for name in ('daily_analytics', 'weekly_advice', 'rollup_compaction'):
+                scheduler.add_job(name, CronExpression('@daily'), scan, resource_group='firestore_scan')
+            await asyncio.gather(*(scheduler.run_now(name) for name in list(scheduler.jobs)))
+            return peak, scheduler.get_jobs()
+
+        peak, jobs = asyncio.run(scenario())
+
+        assert peak == 1
+        assert all(job['run_count'] == 1 and not job['waiting'] for job in jobs)
+
+    def test_job_is_cancelled_when_lease_is_lost(self):
+        async def scenario():
+            manager = LeaseManager(InMemoryLeaseBackend(), holder_id='miya', ttl_seconds=0.06)
+            scheduler = CronScheduler(lease_manager=manager)
+            finished = False
+
+            async def job():
+                nonlocal finished
+                # 実行中に他のインスタンスがリースを引き継ぐ
+                record = manager.backend.records['scheduler_weekly_content']
+                record['holder'] = 'eve'
+                record['token'] += 1
+                await asyncio.sleep(1)
+                finished = True
+
+            added = scheduler.add_job('weekly_content', CronExpression('@weekly'), job)
+            with pytest.raises(LeaseLostError):
+                await scheduler.run_now('weekly_content')
+            return added, finished, manager.backend.records['scheduler_weekly_content']
+
+        job, finished, record = asyncio.run(scenario())
+
+        assert not finished
+        assert 'リースを失った' in job.last_error
+        assert not job.running
+        assert record['holder'] == 'eve'
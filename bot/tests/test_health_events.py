@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ヘルスイベント記録のテスト
+"""
+
+import pytest
+
+from utils.health_events import HealthEventLog
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_750_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHealthEventLog:
+    """HealthEventLog のテスト"""
+
+    def test_status_recovers_as_events_decay(self):
+        clock = FakeClock()
+        events = HealthEventLog(capacity=10, window_seconds=900, half_life_seconds=300, clock=clock)
+
+        events.record('resource_usage', 'メモリ 99%', severity='critical')
+        assert events.status() == 'unhealthy'
+
+        clock.now += 300
+        assert events.status() == 'degraded'
+
+        clock.now += 1000
+        assert events.status() == 'healthy'
+        assert events.to_dict()['recent_count'] == 0
+
+    def test_capacity_is_bounded(self):
+        events = HealthEventLog(capacity=5, clock=FakeClock())
+
+        for i in range(50):
+            events.record('resource_usage', f'#{i}', severity='info')
+        exported = events.to_dict(limit=3)
+
+        assert exported['recent_count'] == 5
+        assert exported['total_recorded'] == 50
+        assert [event['message'] for event in exported['events']] == ['#49', '#48', '#47']
+        with pytest.raises(ValueError):
+            events.record('resource_usage', '?', severity='fatal')
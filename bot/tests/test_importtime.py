@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+import時間集計のテスト
+"""
+
+from utils.importtime import parse_importtime, summarize
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 | _io
+import time:       300 |        300 |     vertexai._model_garden
+import time:      5000 |       5300 |   vertexai
+import time:       700 |       6000 | core.podcast
+import time:        50 |         50 | json
+Traceback (most recent call last):
+"""
+
+
+class TestImportTime:
+    """parse_importtime / summarize のテスト"""
+
+    def test_parse_and_summarize(self):
+        records = parse_importtime(SAMPLE.splitlines())
+
+        assert [record.depth for record in records] == [0, 2, 1, 0, 0]
+
+        summary = summarize(records, top=2)
+
+        assert summary['total_ms'] == 6.2
+        assert summary['top_imports'] == [('core.podcast', 6.0), ('_io', 0.1)]
+        assert summary['top_packages'][0] == ('vertexai', 5.3)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+バックグラウンドジョブキューのテスト
+"""
+
+import asyncio
+
+from core.job_queue import JobQueue, JOB_SUCCEEDED, JOB_FAILED, make_dedupe_key
+
+
+class FakeDocument:
+    def __init__(self, store, doc_id):
+        self.store = store
+        self.doc_id = doc_id
+
+    def set(self, fields, merge=False):
+        self.store.setdefault(self.doc_id, {}).update(fields)
+
+
+class FakeCollection:
+    def __init__(self, store):
+        self.store = store
+
+    def document(self, doc_id):
+        return FakeDocument(self.store, doc_id)
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+
+    def collection(self, name):
+        return FakeCollection(self.docs)
+
+
+class TestJobQueue:
+    """JobQueue のテスト"""
+
+    def test_identical_requests_are_deduplicated(self):
+        async def scenario():
+            queue = JobQueue(max_workers=2)
+            release = asyncio.Event()
+            runs = []
+            notified = []
+
+            async def handler(job):
+                runs.append(job.id)
+                await release.wait()
+                await job.update_progress('done')
+                return {}
+
+            async def listener(text, **extra):
+                notified.append(text)
+
+            first, created_first = await queue.submit('podcast', {'days': 7}, handler, listener=listener)
+            second, created_second = await queue.submit('podcast', {'days': 7}, handler, listener=listener)
+            release.set()
+            await first.done
+            await queue.shutdown()
+            return first, created_first, second, created_second, runs, notified
+
+        first, created_first, second, created_second, runs, notified = asyncio.run(scenario())
+
+        assert created_first and not created_second
+        assert first is second
+        assert len(runs) == 1
+        assert notified == ['done', 'done']
+
+    def test_explicit_dedupe_key_ignores_other_params(self):
+        async def scenario():
+            queue = JobQueue(max_workers=2)
+            release = asyncio.Event()
+            runs = []
+
+            async def handler(job):
+                runs.append(job.params)
+                await release.wait()
+                return {}
+
+            key = make_dedupe_key('weekly_content', {'days': 7})
+            first, _ = await queue.submit('weekly_content', {'days': 7, 'force': False}, handler, dedupe_key=key)
+            second, created = await queue.submit('weekly_content', {'days': 7, 'force': True}, handler, dedupe_key=key)
+            release.set()
+            await first.done
+            await queue.shutdown()
+            return first, second, created, runs
+
+        first, second, created, runs = asyncio.run(scenario())
+
+        assert not created and first is second
+        assert runs == [{'days': 7, 'force': False}]
+
+    def test_worker_pool_is_bounded(self):
+        async def scenario():
+            queue = JobQueue(max_workers=2)
+            running = 0
+            peak = 0
+
+            async def handler(job):
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+                return {}
+
+            jobs = [(await queue.submit('podcast', {'days': days}, handler))[0] for days in range(1, 6)]
+            await asyncio.gather(*(job.done for job in jobs))
+            await queue.shutdown()
+            return peak, jobs
+
+        peak, jobs = asyncio.run(scenario())
+
+        assert peak == 2
+        assert all(job.status == JOB_SUCCEEDED for job in jobs)
+
+    def test_failure_is_persisted(self):
+        async def scenario():
+            db = FakeFirestore()
+            queue = JobQueue(db, max_workers=1)
+
+            async def handler(job):
+                raise RuntimeError('TTS quota exceeded')
+
+            job, _ = await queue.submit('weekly_content', {'days': 7}, handler, requested_by='42')
+            await job.done
+            await queue.shutdown()
+            return job, db.docs[job.id]
+
+        job, doc = asyncio.run(scenario())
+
+        assert job.status == JOB_FAILED
+        assert doc['status'] == JOB_FAILED
+        assert doc['error'] == 'TTS quota exceeded'
+        assert doc['requestedBy'] == '42'
+        assert 'finishedAt' in doc
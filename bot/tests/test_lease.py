@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分散リースのテスト
+"""
+
+import asyncio
+import datetime
+import pytest
+
+from core.lease import (
+    InMemoryLeaseBackend, LeaseManager, LeaseLostError, LeaseBusyError, ensure_lease, current_lease
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime.datetime(2025, 6, 9, 9, 0, tzinfo=datetime.timezone.utc)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += datetime.timedelta(seconds=seconds)
+
+
+class TestInMemoryLease:
+    """InMemoryLeaseBackend のテスト"""
+
+    def test_expired_lease_is_taken_over_with_higher_token(self):
+        async def scenario():
+            clock = FakeClock()
+            backend = InMemoryLeaseBackend(clock)
+
+            first = await backend.acquire('scheduler_weekly_content', 'miya', 60)
+            blocked = await backend.acquire('scheduler_weekly_content', 'eve', 60)
+            clock.advance(61)
+            second = await backend.acquire('scheduler_weekly_content', 'eve', 60)
+            stale_renewed = await backend.renew(first, 60)
+            return first, blocked, second, stale_renewed
+
+        first, blocked, second, stale_renewed = asyncio.run(scenario())
+
+        assert blocked is None
+        assert second.token > first.token
+        assert not stale_renewed
+
+    def test_completed_slot_is_not_run_twice(self):
+        async def scenario():
+            manager_a = LeaseManager(InMemoryLeaseBackend(), holder_id='a', ttl_seconds=60)
+            manager_b = LeaseManager(manager_a.backend, holder_id='b', ttl_seconds=60)
+            slot = '2025-06-09T09:00:00+09:00'
+
+            async with manager_a.hold('scheduler_weekly_content', slot) as lease:
+                lease.completed = True
+            async with manager_b.hold('scheduler_weekly_content', slot) as late:
+                late_for_slot = late
+            async with manager_b.hold('scheduler_weekly_content') as manual:
+                manual_token = manual.token
+            return lease.token, late_for_slot, manual_token
+
+        token, late_for_slot, manual_token = asyncio.run(scenario())
+
+        assert late_for_slot is None
+        assert manual_token == token + 1
+
+
+def take_over(backend, name, holder='other'):
+    """他のインスタンスがリースを引き継いだ状態にする"""
+    record = backend.records[name]
+    record['holder'] = holder
+    record['token'] += 1
+
+
+class TestLeaseFencing:
+    """フェンシングトークンの確認とリースを失ったときの中断"""
+
+    def test_ensure_lease_rejects_stale_token(self):
+        async def scenario():
+            await ensure_lease()  # リースなしでは何もしない
+            manager = LeaseManager(InMemoryLeaseBackend(), holder_id='miya', ttl_seconds=60)
+            async with manager.hold('scheduler_weekly_content') as lease:
+                assert current_lease() is lease
+                await ensure_lease()
+                take_over(manager.backend, 'scheduler_weekly_content')
+                with pytest.raises(LeaseLostError):
+                    await ensure_lease()
+            return lease, current_lease()
+
+        lease, after = asyncio.run(scenario())
+
+        assert lease.lost
+        assert after is None
+
+    def test_lost_renewal_cancels_holder(self):
+        async def scenario():
+            manager = LeaseManager(InMemoryLeaseBackend(), holder_id='miya', ttl_seconds=0.06)
+            reached_end = False
+
+            async def job():
+                nonlocal reached_end
+                async with manager.hold('scheduler_weekly_content'):
+                    take_over(manager.backend, 'scheduler_weekly_content')
+                    await asyncio.sleep(1)
+                    reached_end = True
+
+            task = asyncio.create_task(job())
+            await asyncio.gather(task, return_exceptions=True)
+            return task, reached_end
+
+        task, reached_end = asyncio.run(scenario())
+
+        assert task.cancelled()
+        assert not reached_end
+
+
+class TestRunExclusive:
+    """手動実行用の LeaseManager.run_exclusive"""
+
+    def test_manual_run_waits_for_scheduled_run_on_same_instance(self):
+        async def scenario():
+            manager = LeaseManager(InMemoryLeaseBackend(), holder_id='miya', ttl_seconds=60)
+
+            async def manual():
+                return 'done'
+
+            async with manager.hold('scheduler_weekly_content'):
+                with pytest.raises(LeaseBusyError):
+                    await manager.run_exclusive('scheduler_weekly_content', manual)
+
+            async def scheduled_during_manual():
+                # 手動実行中は同じインスタンスの定期実行も取得できない
+                async with manager.hold('scheduler_weekly_content') as lease:
+                    return lease
+
+            overlapped = await manager.run_exclusive('scheduler_weekly_content', scheduled_during_manual)
+            finished = await manager.run_exclusive('scheduler_weekly_content', manual)
+            return overlapped, finished
+
+        overlapped, finished = asyncio.run(scenario())
+
+        assert overlapped is None
+        assert finished == 'done'
+
+    def test_lost_lease_raises_without_cancelling_caller(self):
+        async def scenario():
+            manager = LeaseManager(InMemoryLeaseBackend(), holder_id='miya', ttl_seconds=0.06)
+
+            async def manual():
+                take_over(manager.backend, 'scheduler_weekly_content')
+                await asyncio.sleep(1)
+
+            with pytest.raises(LeaseLostError):
+                await manager.run_exclusive('scheduler_weekly_content', manual)
+            # 呼び出し元のタスクは中断されずに続行できる
+            await asyncio.sleep(0)
+            return True
+
+        assert asyncio.run(scenario())
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+イベントループ監視のテスト
+"""
+
+import time
+import asyncio
+
+from utils.loop_watchdog import LoopLagMonitor
+
+
+def blocking_call():
+    time.sleep(0.4)
+
+
+class TestLoopLagMonitor:
+    """LoopLagMonitor のテスト"""
+
+    def test_blocking_call_is_detected_with_stack(self):
+        async def scenario():
+            monitor = LoopLagMonitor(interval=0.05, block_threshold=0.1, capture_stacks=True)
+            monitor.start()
+            await asyncio.sleep(0.1)
+            blocking_call()
+            await asyncio.sleep(0.1)
+            await monitor.stop()
+            return monitor
+
+        monitor = asyncio.run(scenario())
+        blocks = monitor.recent_blocks()
+
+        assert len(blocks) == 1
+        assert blocks[0]['duration_seconds'] >= 0.3
+        assert any('blocking_call' in line for line in blocks[0]['stack'])
+        assert monitor.max_lag_seconds >= 0.3
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+集計データのコンパクションのテスト
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+from core.maintenance import RollupCompactor, DELETE_BATCH_SIZE
+from core.lease import InMemoryLeaseBackend, LeaseManager, LeaseLostError
+
+
+def make_db(expired_count):
+    """期限切れのドキュメントを返し、コミットされた削除件数を記録するFirestoreのフェイク"""
+    db = Mock()
+    db.committed = []
+    docs = [Mock(reference=f'ref{i}') for i in range(expired_count)]
+    db.collection.return_value.where.return_value.get.return_value = docs
+
+    def batch():
+        refs = []
+        return Mock(delete=refs.append, commit=lambda: db.committed.append(list(refs)))
+
+    db.batch.side_effect = batch
+    return db
+
+
+class TestRollupCompactor:
+    """RollupCompactor のテスト"""
+
+    def test_deletes_in_batches(self):
+        db = make_db(DELETE_BATCH_SIZE + 1)
+        compactor = RollupCompactor(db)
+
+        deleted = asyncio.run(compactor._delete_refs([f'ref{i}' for i in range(DELETE_BATCH_SIZE + 1)]))
+
+        assert deleted == DELETE_BATCH_SIZE + 1
+        assert [len(refs) for refs in db.committed] == [DELETE_BATCH_SIZE, 1]
+
+    def test_lost_lease_stops_deletes(self):
+        db = make_db(3)
+        compactor = RollupCompactor(db)
+        manager = LeaseManager(InMemoryLeaseBackend(), holder_id='miya', ttl_seconds=60)
+
+        async def scheduled_run():
+            async with manager.hold('scheduler_rollup_compaction'):
+                # 他のインスタンスがリースを引き継いだ後の古い保持者の実行
+                manager.backend.records['scheduler_rollup_compaction']['token'] += 1
+                await compactor.run()
+
+        with pytest.raises(LeaseLostError):
+            asyncio.run(scheduled_run())
+
+        assert db.committed == []
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+メトリクスのテスト
+"""
+
+import pytest
+
+from utils.metrics import MetricsRegistry, track, FIRESTORE_OPERATIONS, FIRESTORE_DURATION
+from utils.firestore_metrics import instrument_firestore
+
+
+class FakeDocument:
+    def __init__(self, path):
+        self._path = path
+
+    def get(self):
+        return {'path': '/'.join(self._path)}
+
+    def collection(self, name):
+        return FakeCollection(self._path + (name,))
+
+
+class FakeCollection:
+    def __init__(self, path):
+        self._path = path
+
+    def document(self, doc_id):
+        return FakeDocument(self._path + (doc_id,))
+
+    def where(self, *args):
+        return self
+
+    def stream(self):
+        yield from ('a', 'b')
+
+    def add(self, data):
+        raise RuntimeError('unavailable')
+
+
+class FakeClient:
+    def collection(self, name):
+        return FakeCollection((name,))
+
+    def transaction(self):
+        return 'transaction'
+
+
+class TestMetricsRegistry:
+    """MetricsRegistry / track のテスト"""
+
+    def test_track_records_status_and_histogram(self):
+        registry = MetricsRegistry()
+        requests = registry.counter('test_requests_total', 'テスト', ['purpose', 'status'])
+        duration = registry.histogram('test_duration_seconds', 'テスト', ['purpose'], buckets=(1.0,))
+
+        with track(requests, duration, purpose='summary'):
+            pass
+        with pytest.raises(ValueError):
+            with track(requests, duration, purpose='summary'):
+                raise ValueError()
+
+        text = registry.render()
+
+        assert 'test_requests_total{purpose="summary",status="ok"} 1' in text
+        assert 'test_requests_total{purpose="summary",status="error"} 1' in text
+        assert 'test_duration_seconds_bucket{purpose="summary",le="+Inf"} 2' in text
+        assert 'test_duration_seconds_count{purpose="summary"} 2' in text
+
+
+class TestInstrumentedFirestore:
+    """instrument_firestore のテスト"""
+
+    def test_operations_are_counted_by_collection(self):
+        db = instrument_firestore(FakeClient())
+        before_get = FIRESTORE_OPERATIONS.value(collection='guilds/members', op='get', status='ok')
+        before_stream = FIRESTORE_DURATION.count(collection='interactions', op='stream')
+
+        doc = db.collection('guilds').document('1').collection('members').document('2').get()
+        streamed = list(db.collection('interactions').where('a', '==', 1).stream())
+        with pytest.raises(RuntimeError):
+            db.collection('bot_actions').add({})
+
+        assert doc == {'path': 'guilds/1/members/2'}
+        assert streamed == ['a', 'b']
+        assert db.transaction() == 'transaction'
+        assert FIRESTORE_OPERATIONS.value(collection='guilds/members', op='get', status='ok') == before_get + 1
+        assert FIRESTORE_DURATION.count(collection='interactions', op='stream') == before_stream + 1
+        assert FIRESTORE_OPERATIONS.value(collection='bot_actions', op='add', status='error') >= 1
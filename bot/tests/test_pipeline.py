@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ステージ並列実行パイプライン・チェックポイントのテスト
+"""
+
+import asyncio
+import datetime
+import pytest
+
+from core.pipeline import Pipeline, STAGE_SUCCEEDED, STAGE_FAILED, STAGE_SKIPPED
+from core.checkpoint import CheckpointStore, weekly_idempotency_key
+
+
+class TestPipeline:
+    """Pipeline のテスト"""
+
+    def test_independent_stages_overlap(self):
+        async def slow(results):
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        pipeline = (Pipeline('overlap')
+                    .add_stage('a', slow)
+                    .add_stage('b', slow)
+                    .add_stage('c', slow))
+
+        run = asyncio.run(pipeline.run())
+
+        assert run.success
+        # 3ステージが並行に進むので合計は1ステージ分に近い
+        assert run.total_seconds < 0.12
+        assert all(run.timings[name]['started_at_offset'] < 0.03 for name in ('a', 'b', 'c'))
+
+    def test_dependencies_receive_results(self):
+        order = []
+
+        async def summary(results):
+            order.append('summary')
+            return 'text'
+
+        async def tts(results):
+            order.append('tts')
+            return results['summary'] + '.mp3'
+
+        async def post(results):
+            order.append('post')
+            return results['tts']
+
+        pipeline = (Pipeline('deps')
+                    .add_stage('summary', summary)
+                    .add_stage('tts', tts, depends_on=['summary'])
+                    .add_stage('post', post, depends_on=['tts']))
+
+        run = asyncio.run(pipeline.run())
+
+        assert order == ['summary', 'tts', 'post']
+        assert run.results['post'] == 'text.mp3'
+        assert run.timing_summary()['stages']['post']['status'] == STAGE_SUCCEEDED
+
+    def test_failure_skips_dependents(self):
+        async def fail(results):
+            raise RuntimeError('quota exceeded')
+
+        async def ok(results):
+            return True
+
+        pipeline = (Pipeline('failure')
+                    .add_stage('tts', fail)
+                    .add_stage('text', ok)
+                    .add_stage('upload_audio', ok, depends_on=['tts'])
+                    .add_stage('post', ok, depends_on=['upload_audio', 'text']))
+
+        run = asyncio.run(pipeline.run())
+
+        assert not run.success
+        assert run.errors == {'tts': 'quota exceeded'}
+        assert run.status('tts') == STAGE_FAILED
+        assert run.status('text') == STAGE_SUCCEEDED
+        assert run.status('upload_audio') == STAGE_SKIPPED
+        assert run.status('post') == STAGE_SKIPPED
+
+    def test_unknown_dependency_is_rejected(self):
+        async def ok(results):
+            return True
+
+        with pytest.raises(ValueError):
+            Pipeline('invalid').add_stage('post', ok, depends_on=['upload'])
+
+
+class TestCheckpointStore:
+    """CheckpointStore のテスト"""
+
+    def test_weekly_idempotency_key(self):
+        now = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+        assert weekly_idempotency_key('weekly_content', 7, now) == 'weekly_content_2025-W01_7d'
+
+    def test_blob_round_trip(self, tmp_path):
+        store = CheckpointStore(blob_dir=str(tmp_path))
+
+        digest = asyncio.run(store.save_blob(b'ID3 audio'))
+
+        assert asyncio.run(store.load_blob(digest)) == b'ID3 audio'
+        store.delete_blob(digest)
+        assert asyncio.run(store.load_blob(digest)) is None
+
+    def test_stages_round_trip(self, fake_firestore, tmp_path):
+        store = CheckpointStore(fake_firestore, blob_dir=str(tmp_path))
+
+        asyncio.run(store.save_stage('week', 'summary', {'summary_text': 'まとめ'}))
+        asyncio.run(store.save_stage('week', 'upload_text', {'view_link': 'https://drive/text'}))
+
+        assert asyncio.run(store.load('week')) == {
+            'summary': {'summary_text': 'まとめ'},
+            'upload_text': {'view_link': 'https://drive/text'}
+        }
+
+    def test_completed_week_is_not_resumed(self, fake_firestore, tmp_path):
+        store = CheckpointStore(fake_firestore, blob_dir=str(tmp_path))
+        asyncio.run(store.save_stage('week', 'post', True))
+
+        asyncio.run(store.mark_completed('week'))
+
+        state = asyncio.run(store.load_state('week'))
+        assert state['completed']
+        assert state['stages'] == {'post': True}
+        assert asyncio.run(store.load('week')) == {}
+
+    def test_clear_removes_completed_state(self, fake_firestore, tmp_path):
+        store = CheckpointStore(fake_firestore, blob_dir=str(tmp_path))
+        asyncio.run(store.save_stage('week', 'post', True))
+        asyncio.run(store.mark_completed('week'))
+
+        asyncio.run(store.clear('week'))
+
+        assert asyncio.run(store.load_state('week')) == {'stages': {}, 'completed': False}
+
+    def test_corrupted_blob_is_ignored(self, tmp_path):
+        store = CheckpointStore(blob_dir=str(tmp_path))
+        digest = asyncio.run(store.save_blob(b'ID3 audio'))
+
+        (tmp_path / digest).write_bytes(b'truncated')
+
+        assert asyncio.run(store.load_blob(digest)) is None
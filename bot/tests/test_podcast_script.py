@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ポッドキャスト台本モデルのテスト
+"""
+
+from core.podcast_script import Utterance, NARRATOR, parse_script, render_script_text
+
+CHARACTERS = {
+    'miya': {'name': 'みやにゃん', 'emoji': '🐈'},
+    'eve': {'name': 'イヴにゃん', 'emoji': '🐱'},
+}
+
+
+class TestPodcastScript:
+    """台本の生成・変換のテスト"""
+
+    def test_render_script_text(self):
+        script = [
+            Utterance('miya', 'こんにちは！', 'excited'),
+            Utterance('eve', '始めましょうにゃ', 'thoughtful'),
+        ]
+
+        text = render_script_text(script, CHARACTERS)
+
+        assert text == "🐈 **みやにゃん**: こんにちは！\n\n🐱 **イヴにゃん**: 始めましょうにゃ"
+
+    def test_parse_rendered_script_round_trip(self):
+        script = [
+            Utterance('miya', 'こんにちは！'),
+            Utterance('eve', '始めましょうにゃ'),
+            Utterance(NARRATOR, '今週のまとめです'),
+        ]
+
+        assert parse_script(render_script_text(script, CHARACTERS), CHARACTERS) == script
+
+    def test_parse_plain_speaker_labels(self):
+        content = "みやにゃん: やあ\n\n\n  イヴにゃん:   どうもですにゃ  \nみやにゃん: "
+
+        assert parse_script(content, CHARACTERS) == [
+            Utterance('miya', 'やあ'),
+            Utterance('eve', 'どうもですにゃ'),
+        ]
+
+    def test_parse_records_blank_lines_as_pauses(self):
+        content = "\nみやにゃん: やあ\nイヴにゃん: どうもですにゃ\n\n\nまとめです\n"
+
+        script = parse_script(content, CHARACTERS)
+
+        assert [(u.pause_before, u.pause_after) for u in script] == [(1, 0), (0, 0), (2, 1)]
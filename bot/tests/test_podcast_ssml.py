@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会話全体のSSML生成のテスト
+"""
+
+from unittest.mock import Mock
+
+from core.podcast import PodcastGenerator
+from core.podcast_script import Utterance
+
+PAUSE = '<break time="300ms"/>'
+MIYA = '<prosody rate="1.2" pitch="+0.5st" volume="medium"><prosody rate="1.15" pitch="+0.2st">こんにちは</prosody></prosody><break time="500ms"/>'
+EVE = '<prosody rate="1.0" pitch="-1.5st" volume="medium"><prosody rate="0.9" pitch="-1.8st">始めますにゃ</prosody></prosody><break time="800ms"/>'
+NARRATION = '<prosody rate="1.0" pitch="0st" volume="medium">今週のまとめです</prosody><break time="800ms"/>'
+
+
+CACHED_METHODS = ('detect_emotion_from_content', 'create_ssml_content', '_create_utterance', '_render_utterance_ssml')
+REPEATED_SCRIPT = "🐈 **みやにゃん**: こんにちは！\n\n🐱 **イヴにゃん**: データを見ますにゃ\n\n" * 3
+
+
+def make_generator():
+    return PodcastGenerator(firestore_client=Mock())
+
+
+def make_uncached_generator():
+    """発話レンダリングのキャッシュを外したジェネレーター"""
+    generator = make_generator()
+    for name in CACHED_METHODS:
+        setattr(generator, name, getattr(generator, name).__wrapped__)
+    return generator
+
+
+class TestFullConversationSsml:
+    """create_full_conversation_ssml のテスト"""
+
+    def test_markdown_script_pauses_only_on_blank_lines(self):
+        content = "\n🐈 **みやにゃん**: こんにちは\nイヴにゃん: 始めますにゃ\n\n\n今週のまとめです\n\n"
+
+        ssml = make_generator().create_full_conversation_ssml(content)
+
+        # 従来どおり空行1行につき1回休止し、連続した行の間には休止を入れない
+        assert ssml == (
+            '<speak>' + PAUSE + MIYA + EVE + PAUSE * 2 + NARRATION + PAUSE * 2 + '</speak>'
+        )
+
+    def test_utterance_list_pauses_between_utterances(self):
+        generator = make_generator()
+        script = [
+            Utterance('miya', 'こんにちは', 'calm'),
+            Utterance('eve', '始めますにゃ', 'thoughtful'),
+        ]
+
+        assert generator.create_full_conversation_ssml(script) == '<speak>' + MIYA + PAUSE + EVE + '</speak>'
+
+
+class TestRenderCache:
+    """発話レンダリングキャッシュのテスト"""
+
+    def test_repeated_lines_hit_cache(self):
+        generator = make_generator()
+
+        generator.create_full_conversation_ssml(REPEATED_SCRIPT)
+        first = generator.get_render_cache_stats()
+        generator.create_full_conversation_ssml(REPEATED_SCRIPT)
+        second = generator.get_render_cache_stats()
+
+        # 同じセリフの2回目以降はキャッシュから返す
+        assert first['_render_utterance_ssml'] == {'hits': 4, 'misses': 2, 'size': 2}
+        assert second['_create_utterance']['hits'] > first['_create_utterance']['hits']
+        assert second['_render_utterance_ssml']['hits'] > first['_render_utterance_ssml']['hits']
+        assert second['_render_utterance_ssml']['misses'] == first['_render_utterance_ssml']['misses']
+
+    def test_cached_ssml_matches_uncached(self):
+        generator = make_generator()
+        uncached = make_uncached_generator()
+
+        for _ in range(2):
+            expected = uncached.create_full_conversation_ssml(REPEATED_SCRIPT)
+            assert generator.create_full_conversation_ssml(REPEATED_SCRIPT) == expected
+            assert generator.group_character_lines(REPEATED_SCRIPT) == uncached.group_character_lines(REPEATED_SCRIPT)
+
+    def test_cache_is_per_instance(self):
+        first = make_generator()
+        second = make_generator()
+
+        first.create_full_conversation_ssml(REPEATED_SCRIPT)
+
+        assert all(stats['size'] == 0 for stats in second.get_render_cache_stats().values())
+        second.create_full_conversation_ssml(REPEATED_SCRIPT)
+        assert second.get_render_cache_stats()['_render_utterance_ssml']['misses'] == 2
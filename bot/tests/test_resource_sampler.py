@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+リソース計測のテスト
+"""
+
+import os
+
+from utils.resource_sampler import ResourceSampler
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResourceSampler:
+    """ResourceSampler のテスト"""
+
+    def test_sample_reads_proc_and_cgroup_limit(self, tmp_path):
+        proc, cgroup = str(tmp_path / 'proc'), str(tmp_path / 'cgroup')
+        stat = '42 (python bot) S 1 42 42 0 -1 4194304 0 0 0 0 {utime} {stime} 0 0 20 0 7 0 100 0 2560 0'
+        write(os.path.join(proc, 'self', 'stat'), stat.format(utime=100, stime=100))
+        os.makedirs(os.path.join(proc, 'self', 'fd'))
+        write(os.path.join(cgroup, 'memory.max'), '1073741824\n')
+        write(os.path.join(cgroup, 'memory.current'), '268435456\n')
+        clock = FakeClock()
+        sampler = ResourceSampler(proc_root=proc, cgroup_root=cgroup, disk_path=str(tmp_path), clock=clock)
+        sampler.clock_ticks, sampler.page_size, sampler.cpus = 100, 4096, 2
+
+        first = sampler.sample()
+        write(os.path.join(proc, 'self', 'stat'), stat.format(utime=150, stime=150))
+        clock.now += 1.0
+        second = sampler.sample()
+
+        assert first['cpu_percent'] is None
+        assert second['cpu_percent'] == 50.0
+        assert second['threads'] == 7
+        assert second['rss_bytes'] == 2560 * 4096
+        assert second['open_fds'] == 0
+        assert second['memory_percent'] == 25.0
+        assert second['disk_percent'] is not None
+        assert sampler.recent_errors() == []
+
+    def test_unreadable_sources_are_recorded_with_bounded_history(self, tmp_path):
+        sampler = ResourceSampler(proc_root=str(tmp_path / 'missing'), cgroup_root=str(tmp_path), disk_path=str(tmp_path))
+
+        for _ in range(30):
+            result = sampler.sample()
+
+        assert result['rss_bytes'] is None and result['memory_percent'] is None
+        assert result['disk_percent'] is not None
+        assert len(sampler.recent_errors()) == 20
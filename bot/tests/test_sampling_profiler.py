@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+サンプリングプロファイラーのテスト
+"""
+
+import threading
+
+import pytest
+
+from utils import sampling_profiler
+from utils.sampling_profiler import SamplingProfiler, ProfilerBusyError
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSamplingProfiler:
+    """SamplingProfiler のテスト"""
+
+    def test_samples_other_threads_as_collapsed_stacks(self):
+        stop = threading.Event()
+        loop_thread = threading.Thread(target=busy_worker, args=(stop,), name='MainThread-loop')
+        worker = threading.Thread(target=busy_worker, args=(stop,), name='asyncio_3')
+        loop_thread.start()
+        worker.start()
+        try:
+            result = SamplingProfiler(interval=0.005, loop_thread_id=loop_thread.ident).run(0.2)
+        finally:
+            stop.set()
+            loop_thread.join()
+            worker.join()
+
+        assert result.samples > 0
+        threads = result.summary()['threads']
+        # ループのスレッドは event-loop、to_thread のワーカーは番号を除いた名前にまとめる
+        assert threads['event-loop'] > 0 and threads['asyncio'] > 0
+        for line in result.to_collapsed().splitlines():
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) > 0
+            if stack.startswith(('event-loop;', 'asyncio;')):
+                assert 'busy_worker (test_sampling_profiler.py:' in stack
+        assert result.top_functions(1)[0][1] > 0
+
+    def test_idle_threads_are_excluded(self):
+        stop = threading.Event()
+        waiter = threading.Thread(target=stop.wait, name='idle')
+        waiter.start()
+        try:
+            result = SamplingProfiler(interval=0.005).run(0.1)
+        finally:
+            stop.set()
+            waiter.join()
+        assert result.idle_samples > 0
+        assert not any(stack.startswith('idle;') for stack in result.stacks)
+
+    def test_only_one_profile_at_a_time(self):
+        assert sampling_profiler._running.acquire(blocking=False)
+        try:
+            with pytest.raises(ProfilerBusyError):
+                SamplingProfiler().run(0.1)
+        finally:
+            sampling_profiler._running.release()
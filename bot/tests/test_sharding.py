@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+シャード設定と状態管理のテスト
+"""
+
+import pytest
+
+from core.sharding import ShardTracker, parse_shard_ids, shard_options, SHARD_DISCONNECTS
+
+
+class TestShardOptions:
+    """parse_shard_ids・shard_options のテスト"""
+
+    def test_parse_ranges_and_lists(self):
+        assert parse_shard_ids('') is None
+        assert parse_shard_ids('0-3') == [0, 1, 2, 3]
+        assert parse_shard_ids('4, 0-1,1') == [0, 1, 4]
+        with pytest.raises(ValueError):
+            parse_shard_ids('3-1')
+
+    def test_shard_options(self):
+        assert shard_options('', '') == {}
+        assert shard_options('8', '') == {'shard_count': 8}
+        assert shard_options('8', '4-7') == {'shard_count': 8, 'shard_ids': [4, 5, 6, 7]}
+        with pytest.raises(ValueError):
+            shard_options('', '0-1')
+        with pytest.raises(ValueError):
+            shard_options('4', '3-4')
+
+
+class TestShardTracker:
+    """ShardTracker のテスト"""
+
+    def test_state_transitions(self):
+        tracker = ShardTracker(clock=lambda: 100.0)
+        before = SHARD_DISCONNECTS.value(shard='91')
+        tracker.connected(90)
+        tracker.ready(90)
+        tracker.ready(91)
+        tracker.disconnected(91)
+        tracker.message(90)
+
+        shards = {shard['shard_id']: shard for shard in tracker.snapshot({90: 0.05, 91: float('inf')}, {90: 3})}
+        assert shards[90]['up'] and shards[90]['messages'] == 1 and shards[90]['guilds'] == 3
+        assert shards[90]['latency_seconds'] == 0.05
+        assert not shards[91]['up'] and shards[91]['latency_seconds'] is None
+        assert shards[91]['last_disconnect_at'] == 100.0
+        assert SHARD_DISCONNECTS.value(shard='91') == before + 1
+
+        tracker.resumed(91)
+        assert tracker.snapshot()[1]['status'] == 'ready'
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SSML分割・読み上げ用テキスト正規化ユーティリティのテスト
+"""
+
+import re
+
+from utils.ssml import split_ssml, split_plain_text, TTS_MAX_REQUEST_BYTES
+from utils.tts_text import get_text_normalizer
+
+CHARACTERS = {
+    'miya': {'name': 'みやにゃん', 'emoji': '🐈'},
+    'eve': {'name': 'イヴにゃん', 'emoji': '🐱'},
+}
+
+
+def _build_conversation_ssml(lines: int) -> str:
+    """create_full_conversation_ssml と同じ形のSSMLを組み立てる"""
+    parts = ['<speak>']
+    for i in range(lines):
+        parts.append('<prosody rate="1.2" pitch="+0.5st" volume="medium">')
+        parts.append('<prosody rate="1.3" pitch="+1.5st">')
+        parts.append(f'<emphasis level="strong">今週は{i}件のやり取り！とても活発だったにゃー。みんなありがとう。</emphasis>')
+        parts.append('</prosody></prosody>')
+        parts.append('<break time="500ms"/>')
+    parts.append('</speak>')
+    return ''.join(parts)
+
+
+def _assert_balanced(chunk: str):
+    """タグの開閉が対応していることを確認"""
+    stack = []
+    for tag in re.findall(r'<[^>]+>', chunk):
+        if tag.endswith('/>'):
+            continue
+        name = re.match(r'</?\s*([a-zA-Z:_-]+)', tag).group(1)
+        if tag.startswith('</'):
+            assert stack and stack[-1] == name, f"閉じタグの不整合: {tag}"
+            stack.pop()
+        else:
+            stack.append(name)
+    assert not stack
+
+
+class TestSplitSsml:
+    """split_ssml のテスト"""
+
+    def test_short_ssml_is_returned_as_is(self):
+        ssml = '<speak><prosody rate="1.2">こんにちは</prosody></speak>'
+        assert split_ssml(ssml) == [ssml]
+
+    def test_chunks_fit_byte_limit(self):
+        ssml = _build_conversation_ssml(200)
+        assert len(ssml.encode('utf-8')) > TTS_MAX_REQUEST_BYTES
+
+        chunks = split_ssml(ssml)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert len(chunk.encode('utf-8')) <= TTS_MAX_REQUEST_BYTES
+            assert chunk.startswith('<speak>') and chunk.endswith('</speak>')
+            _assert_balanced(chunk)
+
+    def test_text_is_preserved(self):
+        ssml = _build_conversation_ssml(200)
+        chunks = split_ssml(ssml, max_bytes=1500)
+
+        def strip_tags(value):
+            return re.sub(r'<[^>]+>', '', value)
+
+        assert ''.join(strip_tags(chunk) for chunk in chunks) == strip_tags(ssml)
+
+    def test_open_prosody_is_reopened_in_next_chunk(self):
+        body = '。'.join(['長い文章が続くにゃ'] * 200)
+        ssml = f'<speak><prosody rate="0.9" pitch="-1.8st">{body}</prosody></speak>'
+
+        chunks = split_ssml(ssml, max_bytes=1000)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.startswith('<speak><prosody rate="0.9" pitch="-1.8st">')
+            _assert_balanced(chunk)
+
+    def test_text_without_sentence_breaks_is_split(self):
+        ssml = '<speak>' + 'にゃ' * 2000 + '</speak>'
+
+        chunks = split_ssml(ssml, max_bytes=1000)
+
+        assert len(chunks) > 1
+        assert all(len(chunk.encode('utf-8')) <= 1000 for chunk in chunks)
+
+
+class TestSplitPlainText:
+    """split_plain_text のテスト"""
+
+    def test_splits_at_sentence_end(self):
+        text = '今週もありがとうにゃ。' * 300
+
+        chunks = split_plain_text(text, max_bytes=1000)
+
+        assert ''.join(chunks) == text
+        assert all(len(chunk.encode('utf-8')) <= 1000 for chunk in chunks)
+        assert all(chunk.endswith('。') for chunk in chunks)
+
+
+class TestTextNormalizer:
+    """読み上げ用テキスト正規化のテスト"""
+
+    def test_normalizer_is_cached_per_character_set(self):
+        assert get_text_normalizer(CHARACTERS) is get_text_normalizer(dict(CHARACTERS))
+
+    def test_removes_speaker_labels_and_emoji(self):
+        content = "🐈 **みやにゃん**: 今週もありがとうにゃ〜！！\n\n🐱 **イヴにゃん**: #general が活発でしたにゃ✅"
+
+        cleaned = get_text_normalizer(CHARACTERS).clean(content)
+
+        assert cleaned == "今週もありがとうにゃー！。generalチャンネル が活発でしたにゃ"
+
+    def test_keeps_speaker_labels_when_requested(self):
+        cleaned = get_text_normalizer(CHARACTERS).clean("みやにゃん: こんにちは", remove_character_names=False)
+
+        assert cleaned == "みやにゃん: こんにちは"
+
+    def test_speaker_prefix_pattern(self):
+        pattern = get_text_normalizer(CHARACTERS).speaker_prefix_patterns['イヴにゃん']
+
+        assert pattern.sub('', "🐱 **イヴにゃん**: データを分析しましたにゃ") == "データを分析しましたにゃ"
@@ -0,0 +1,41 @@
+"""structured_logging のテスト"""
+
+import json
+import logging
+
+from utils.structured_logging import (
+    ContextFilter, JsonFormatter, SamplingFilter, correlation_scope, get_correlation_id
+)
+
+
+def _record(message, level=logging.INFO, **extra):
+    record = logging.LogRecord('test', level, __file__, 1, message, (), None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_json_formatter_includes_correlation_id_and_extras():
+    with correlation_scope('msg-1'):
+        record = _record('📝 記録', action_type='mention')
+        ContextFilter().filter(record)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['severity'] == 'INFO'
+    assert entry['message'] == '📝 記録'
+    assert entry['correlation_id'] == 'msg-1'
+    assert entry['action_type'] == 'mention'
+    assert get_correlation_id() is None
+
+
+def test_sampling_filter_passes_one_in_n_per_key():
+    sampler = SamplingFilter(every=5)
+    passed = [sampler.filter(_record('x', sample='bot_action')) for _ in range(10)]
+    assert passed.count(True) == 2
+    assert sampler.filter(_record('x', sample='other'))
+    assert sampler.filter(_record('x'))
+
+
+def test_sampling_filter_keeps_warnings():
+    sampler = SamplingFilter(every=100)
+    sampler.filter(_record('x', sample='bot_action'))
+    assert all(sampler.filter(_record('x', logging.WARNING, sample='bot_action')) for _ in range(3))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+トレース（スパン）のテスト
+"""
+
+import json
+import time
+import asyncio
+
+from utils.tracing import (
+    Tracer, InMemorySpanExporter, FileSpanExporter, STATUS_ERROR, format_collapsed, timing_report
+)
+
+
+def _tracer(*exporters):
+    return Tracer(enabled=True, exporters=list(exporters) or [InMemorySpanExporter()])
+
+
+class TestTracing:
+    """Tracer・timing_report のテスト"""
+
+    def test_spans_follow_tasks_and_threads(self):
+        tracer = _tracer()
+
+        def blocking_call():
+            with tracer.child_span('firestore.get', collection='users'):
+                time.sleep(0.01)
+
+        async def stage(name, delay):
+            with tracer.span(name):
+                await asyncio.sleep(delay)
+                await asyncio.to_thread(blocking_call)
+
+        async def scenario():
+            with tracer.span('weekly_content') as root:
+                await asyncio.gather(
+                    asyncio.create_task(stage('stage.tts', 0.05)),
+                    asyncio.create_task(stage('stage.text', 0.0))
+                )
+            return root
+
+        root = asyncio.run(scenario())
+        by_name = {}
+        for span in root.trace_spans:
+            by_name.setdefault(span.name, []).append(span)
+        assert by_name['stage.tts'][0].parent_span_id == root.span_id
+        assert {span.parent_span_id for span in by_name['firestore.get']} == {
+            by_name['stage.tts'][0].span_id, by_name['stage.text'][0].span_id
+        }
+
+        report = timing_report(root)
+        assert [step['name'] for step in report['critical_path']] == ['weekly_content', 'stage.tts', 'firestore.get']
+        stacks = {entry['stack']: entry for entry in report['stacks']}
+        assert stacks['weekly_content;stage.tts;firestore.get']['count'] == 1
+        # 並行した子スパンを二重に数えないので、ルートの自己時間は負にならない
+        assert stacks['weekly_content']['self_ms'] >= 0
+        assert 'weekly_content;stage.tts ' in format_collapsed(report)
+
+    def test_child_span_is_noop_without_trace(self):
+        exporter = InMemorySpanExporter()
+        tracer = _tracer(exporter)
+        with tracer.child_span('firestore.get') as span:
+            assert span is None
+        assert exporter.traces() == []
+
+    def test_errors_and_file_export(self, tmp_path):
+        path = tmp_path / 'traces.jsonl'
+        tracer = _tracer(FileSpanExporter(str(path)))
+        try:
+            with tracer.span('weekly_content', days=7) as root:
+                with tracer.span('stage.summary'):
+                    raise RuntimeError('boom')
+        except RuntimeError:
+            pass
+        assert timing_report(root)['errors'] == ['weekly_content', 'stage.summary']
+
+        line = json.loads(path.read_text(encoding='utf-8'))
+        spans = line['resourceSpans'][0]['scopeSpans'][0]['spans']
+        assert [span['name'] for span in spans] == ['weekly_content', 'stage.summary']
+        assert spans[1]['parentSpanId'] == spans[0]['spanId']
+        assert spans[1]['status']['code'] == 2
+        assert spans[0]['attributes'] == [{'key': 'days', 'value': {'intValue': '7'}}]
+        assert root.status == STATUS_ERROR
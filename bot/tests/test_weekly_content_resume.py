@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+週次コンテンツ制作のチェックポイント再開のテスト
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock
+
+from core.content_creator import ContentCreator
+from core.checkpoint import CheckpointStore, weekly_idempotency_key
+from core.lease import InMemoryLeaseBackend, LeaseManager, LeaseLostError
+
+
+class FakeAnalytics:
+    """まとめ生成の呼び出し回数を数えるフェイク"""
+
+    def __init__(self):
+        self.summary_calls = 0
+
+    async def get_activity_snapshot(self, days):
+        return Mock(describe=Mock(return_value={'days': days}))
+
+    async def generate_and_save_weekly_summary(self, days, activity):
+        self.summary_calls += 1
+        return {
+            'success': True,
+            'summary_id': f'summary{self.summary_calls}',
+            'summary_text': '今週のまとめ',
+            'activities_stats': {'total_messages': 3}
+        }
+
+
+def drive_upload(media_factory, filename, folder_id):
+    """Drive API 呼び出し（_upload_media_sync）の成功時の応答"""
+    return {'id': f'id-{filename}', 'name': filename, 'webViewLink': f'https://drive/{filename}'}
+
+
+def fail_audio_upload(media_factory, filename, folder_id):
+    if filename.endswith('.mp3'):
+        raise RuntimeError('Drive quota exceeded')
+    return drive_upload(media_factory, filename, folder_id)
+
+
+def make_creator(firestore_client, blob_dir, post_target=True, drive=True):
+    creator = ContentCreator.__new__(ContentCreator)
+    creator.db = firestore_client
+    creator.bot = object() if post_target else None
+    creator.target_channel_id = '123' if post_target else None
+    creator.analytics = FakeAnalytics()
+    creator.checkpoints = CheckpointStore(firestore_client, blob_dir=str(blob_dir))
+    creator.generate_enhanced_tts_audio_bytes = AsyncMock(return_value=b'ID3 audio')
+    # Drive はAPI呼び出しだけを差し替え、upload_artifact_to_google_drive からの処理はそのまま使う
+    creator._drive_initialized = True
+    creator._drive_service = Mock() if drive else None
+    creator.drive_upload_chunk_size = 256 * 1024
+    creator._upload_media_sync = Mock(side_effect=drive_upload)
+    creator.prepare_discord_post = Mock(return_value=('channel', 'embed'))
+    creator.send_discord_post = AsyncMock(return_value=True)
+    return creator
+
+
+def uploaded_names(creator):
+    return [call.args[1] for call in creator._upload_media_sync.call_args_list]
+
+
+def content_records(firestore_client):
+    return list(firestore_client.collections.get('content_records', {}).values())
+
+
+def checkpoint_state(creator):
+    return asyncio.run(creator.checkpoints.load_state(weekly_idempotency_key('weekly_content', 7)))
+
+
+class TestWeeklyContentResume:
+    """create_weekly_content のチェックポイント再開"""
+
+    def test_resume_after_failed_upload(self, fake_firestore, tmp_path):
+        creator = make_creator(fake_firestore, tmp_path)
+        creator._upload_media_sync.side_effect = fail_audio_upload
+
+        first = asyncio.run(creator.create_weekly_content())
+
+        assert not first['success']
+        assert 'upload_audio' in first['error']
+        # リンクのない投稿はせず、週も完了にしない
+        creator.send_discord_post.assert_not_called()
+        state = checkpoint_state(creator)
+        assert not state['completed']
+        assert 'upload_audio' not in state['stages']
+
+        creator._upload_media_sync.reset_mock(side_effect=True)
+        creator._upload_media_sync.side_effect = drive_upload
+
+        second = asyncio.run(creator.create_weekly_content())
+
+        assert second['success']
+        assert set(second['resumed_stages']) == {'summary', 'tts', 'upload_text'}
+        # まとめと音声は作り直さず、失敗した音声のアップロードだけやり直す
+        assert creator.analytics.summary_calls == 1
+        assert creator.generate_enhanced_tts_audio_bytes.await_count == 1
+        uploaded = uploaded_names(creator)
+        assert len(uploaded) == 1 and uploaded[0].endswith('.mp3')
+        assert second['discord_posted']
+        audio_info = creator.send_discord_post.await_args.args[1]
+        assert audio_info['view_link'] == f'https://drive/{uploaded[0]}'
+        assert checkpoint_state(creator)['completed']
+
+    def test_completed_week_is_not_replayed(self, fake_firestore, tmp_path):
+        creator = make_creator(fake_firestore, tmp_path)
+        assert asyncio.run(creator.create_weekly_content())['discord_posted']
+
+        result = asyncio.run(creator.create_weekly_content())
+
+        assert result['success'] and result['already_completed']
+        assert not result['discord_posted']
+        assert creator.send_discord_post.await_count == 1
+        assert creator.analytics.summary_calls == 1
+        # 完了済みの週では制作記録を追加しない
+        assert len(content_records(fake_firestore)) == 1
+
+    def test_force_starts_completed_week_fresh(self, fake_firestore, tmp_path):
+        creator = make_creator(fake_firestore, tmp_path)
+        asyncio.run(creator.create_weekly_content())
+
+        result = asyncio.run(creator.create_weekly_content(resume=False))
+
+        assert result['success'] and not result.get('already_completed')
+        assert result['resumed_stages'] == []
+        assert creator.analytics.summary_calls == 2
+        assert creator.send_discord_post.await_count == 2
+        assert len(content_records(fake_firestore)) == 2
+
+    def test_missing_audio_blob_is_resynthesized(self, fake_firestore, tmp_path):
+        creator = make_creator(fake_firestore, tmp_path)
+        creator._upload_media_sync.side_effect = fail_audio_upload
+        asyncio.run(creator.create_weekly_content())
+        digest = checkpoint_state(creator)['stages']['tts']['sha256']
+
+        creator.checkpoints.delete_blob(digest)
+        creator._upload_media_sync.side_effect = drive_upload
+        result = asyncio.run(creator.create_weekly_content())
+
+        assert result['success']
+        assert creator.generate_enhanced_tts_audio_bytes.await_count == 2
+        assert result['audio_file']['drive_info']['view_link'].endswith('.mp3')
+
+    def test_corrupted_audio_blob_is_resynthesized(self, fake_firestore, tmp_path):
+        creator = make_creator(fake_firestore, tmp_path)
+        creator._upload_media_sync.side_effect = fail_audio_upload
+        asyncio.run(creator.create_weekly_content())
+        digest = checkpoint_state(creator)['stages']['tts']['sha256']
+
+        (tmp_path / digest).write_bytes(b'truncated')
+        creator._upload_media_sync.side_effect = drive_upload
+        result = asyncio.run(creator.create_weekly_content())
+
+        assert result['success']
+        assert creator.generate_enhanced_tts_audio_bytes.await_count == 2
+        assert result['audio_file']['size_bytes'] == len(b'ID3 audio')
+        assert uploaded_names(creator)[-1].endswith('.mp3')
+
+    def test_failed_post_is_retried(self, fake_firestore, tmp_path):
+        creator = make_creator(fake_firestore, tmp_path)
+        creator.send_discord_post.return_value = False
+
+        first = asyncio.run(creator.create_weekly_content())
+
+        assert not first['success']
+        assert 'post' in first['error']
+        assert not checkpoint_state(creator)['completed']
+
+        creator.send_discord_post.return_value = True
+        second = asyncio.run(creator.create_weekly_content())
+
+        assert second['success'] and second['discord_posted']
+        assert creator.analytics.summary_calls == 1
+        assert checkpoint_state(creator)['completed']
+
+    def test_week_without_post_target_is_completed(self, fake_firestore, tmp_path):
+        creator = make_creator(fake_firestore, tmp_path, post_target=False)
+
+        result = asyncio.run(creator.create_weekly_content())
+
+        assert result['success'] and not result['discord_posted']
+        creator.send_discord_post.assert_not_called()
+        assert checkpoint_state(creator)['completed']
+        assert asyncio.run(creator.create_weekly_content())['already_completed']
+
+    def test_lost_lease_stops_writes(self, fake_firestore, tmp_path):
+        creator = make_creator(fake_firestore, tmp_path)
+        manager = LeaseManager(InMemoryLeaseBackend(), holder_id='miya', ttl_seconds=60)
+
+        async def scheduled_run():
+            async with manager.hold('scheduler_weekly_content'):
+                # 他のインスタンスがリースを引き継いだ後の古い保持者の実行
+                manager.backend.records['scheduler_weekly_content']['token'] += 1
+                await creator.create_weekly_content()
+
+        with pytest.raises(LeaseLostError):
+            asyncio.run(scheduled_run())
+
+        creator.send_discord_post.assert_not_called()
+        assert checkpoint_state(creator)['stages'] == {}
+        assert content_records(fake_firestore) == []
+
+    def test_week_without_drive_is_posted_without_links(self, fake_firestore, tmp_path):
+        creator = make_creator(fake_firestore, tmp_path, drive=False)
+
+        result = asyncio.run(creator.create_weekly_content())
+
+        # Drive が設定されていない場合だけ、リンクなしで投稿して完了とする
+        assert result['success'] and result['discord_posted']
+        assert result['audio_file']['drive_info'] is None
+        creator._upload_media_sync.assert_not_called()
+        assert checkpoint_state(creator)['completed']
+
+    def test_resume_on_another_instance_resynthesizes_audio(self, fake_firestore, tmp_path):
+        first_instance = make_creator(fake_firestore, tmp_path / 'instance_a')
+        first_instance._upload_media_sync.side_effect = fail_audio_upload
+        asyncio.run(first_instance.create_weekly_content())
+
+        # 音声の一時保存は別インスタンスからは見えない
+        second_instance = make_creator(fake_firestore, tmp_path / 'instance_b')
+        result = asyncio.run(second_instance.create_weekly_content())
+
+        assert result['success'] and result['discord_posted']
+        assert second_instance.analytics.summary_calls == 0
+        assert second_instance.generate_enhanced_tts_audio_bytes.await_count == 1
+        assert uploaded_names(second_instance)[-1].endswith('.mp3')